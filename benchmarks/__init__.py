@@ -0,0 +1,8 @@
+"""
+ManiBench Benchmarks
+======================
+Performance benchmarks for the evaluation pipeline.
+
+Usage:
+    python -m benchmarks.bench_metrics
+"""
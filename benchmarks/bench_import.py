@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+ManiBench Benchmarks — Import Time
+====================================
+Measures how long the evaluation entry points take to import, using
+`python -X importtime` in a fresh interpreter per module, and checks each
+against a budget so quick commands (`--help`, analysis) and worker
+processes stay fast to start.
+
+Each module is imported REPEAT times; the best cumulative time is kept
+to smooth out disk-cache noise. The heaviest transitive imports are
+listed so a regression points at its cause.
+
+Usage:
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --repeat 10 --top 15
+    python -m benchmarks.bench_import --budget-scale 2     # slow CI machine
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "bench_import.json"
+
+# Cumulative import-time budgets in milliseconds
+IMPORT_BUDGETS_MS: dict[str, float] = {
+    "evaluation.config": 40.0,
+    "evaluation.metrics": 60.0,
+    "evaluation.analysis": 60.0,
+    "evaluation.run": 120.0,
+}
+
+# Modules that must NOT be imported as a side effect of the module above
+FORBIDDEN_IMPORTS: dict[str, list[str]] = {
+    "evaluation.config": ["dotenv"],
+    "evaluation.metrics": ["requests", "httpx", "numpy", "dotenv"],
+    "evaluation.analysis": ["requests", "httpx", "numpy", "dotenv"],
+    "evaluation.run": ["requests", "httpx", "numpy", "dotenv"],
+}
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list[dict[str, Any]]:
+    """Parse `-X importtime` output into [{module, self_us, cumulative_us, depth}]."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            rows.append({
+                "module": m.group(4),
+                "self_us": int(m.group(1)),
+                "cumulative_us": int(m.group(2)),
+                "depth": len(m.group(3)) // 2,
+            })
+    return rows
+
+
+def measure_import(module: str, repeat: int = 5) -> dict[str, Any]:
+    """Import `module` in `repeat` fresh interpreters and keep the fastest."""
+    best_rows: list[dict[str, Any]] | None = None
+    best_us = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            cwd=ROOT_DIR,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+        rows = parse_importtime(proc.stderr)
+        top = next((r for r in rows if r["module"] == module), None)
+        if top is None:
+            continue
+        if best_us is None or top["cumulative_us"] < best_us:
+            best_us, best_rows = top["cumulative_us"], rows
+
+    rows = best_rows or []
+    return {
+        "module": module,
+        "cumulative_ms": round((best_us or 0) / 1000, 2),
+        "imported": sorted({r["module"].split(".")[0] for r in rows}),
+        "heaviest": sorted(rows, key=lambda r: r["self_us"], reverse=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ManiBench import-time benchmark")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Fresh interpreters per module; best is kept (default: 5)")
+    parser.add_argument("--top", type=int, default=8,
+                        help="Heaviest imports to list per module (default: 8)")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="Multiply every budget (e.g. 2 on slow machines)")
+    parser.add_argument("--output", type=str, default=str(DEFAULT_OUTPUT))
+    args = parser.parse_args()
+
+    print("ManiBench import-time benchmark")
+    print(f"{'─'*78}")
+    failures = []
+    report = []
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        res = measure_import(module, repeat=args.repeat)
+        budget *= args.budget_scale
+        forbidden = [m for m in FORBIDDEN_IMPORTS.get(module, []) if m in res["imported"]]
+        ok = res["cumulative_ms"] <= budget and not forbidden
+        mark = "✓" if ok else "✗"
+        print(f"  {mark} {module:<24} {res['cumulative_ms']:>8.1f} ms  (budget {budget:.0f} ms)")
+        for row in res["heaviest"][:args.top]:
+            print(f"        {row['self_us'] / 1000:>7.2f} ms  {row['module']}")
+        if res["cumulative_ms"] > budget:
+            failures.append(f"{module}: {res['cumulative_ms']} ms > {budget:.0f} ms")
+        if forbidden:
+            failures.append(f"{module}: eagerly imports {', '.join(forbidden)}")
+        report.append({
+            "module": module,
+            "cumulative_ms": res["cumulative_ms"],
+            "budget_ms": budget,
+            "forbidden_imported": forbidden,
+            "heaviest": res["heaviest"][:args.top],
+        })
+
+    out_path = Path(args.output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump({"python": sys.version.split()[0], "modules": report}, f, indent=2)
+    print(f"{'─'*78}")
+    print(f"Report saved: {out_path}")
+
+    if failures:
+        print(f"\n✗ {len(failures)} import budget violation(s):")
+        for msg in failures:
+            print(f"    {msg}")
+        sys.exit(1)
+    print("✓ All imports within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+ManiBench Benchmarks — End-to-End Load Test
+=============================================
+Measures evaluation throughput at different worker counts against the local
+mock server (benchmarks/mock_server.py), so concurrency can be tuned without
+spending API credits.
+
+Each configuration drives `run.run_samples` — the same generate → save →
+score path as a real run, with rendering skipped — through the real
+OpenRouter / Inference.net client pointed at the mock server. Generated
+code and logs go to a temporary directory.
+
+Usage:
+    python -m benchmarks.bench_load
+    python -m benchmarks.bench_load --workers 1 4 16 --latency-ms 500 --rate-429 0.1
+    python -m benchmarks.bench_load --provider inference --trials 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from benchmarks.mock_server import MockServerConfig, ReplayCorpus, start_mock_server
+from evaluation.config import EvalConfig, get_models_for_provider
+from evaluation.inference_client import InferenceNetClient
+from evaluation.logger import StructuredLogger
+from evaluation.openrouter_client import OpenRouterClient
+from evaluation.run import run_samples
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "bench_load.json"
+
+
+def _make_client(provider: str, base_url: str, retry_delay: float):
+    if provider == "inference":
+        return InferenceNetClient(api_key="mock", base_url=base_url, retry_delay=retry_delay)
+    return OpenRouterClient(api_key="mock", base_url=base_url, retry_delay=retry_delay)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run_load(
+    provider: str,
+    workers: int,
+    trials: int,
+    server,
+    retry_delay: float,
+    problem_ids: list[str] | None = None,
+) -> dict[str, Any]:
+    """Run one (provider, workers) configuration and return its metrics."""
+    corpus = server.corpus
+    problems = [
+        p for pid, p in corpus.problems.items()
+        if problem_ids is None or pid in problem_ids
+    ]
+    models = get_models_for_provider(provider)
+    config = EvalConfig(
+        trials=trials,
+        skip_render=True,
+        workers=workers,
+        provider=provider,
+    )
+    client = _make_client(provider, server.base_url, retry_delay)
+    before = server.stats.as_dict()
+
+    with tempfile.TemporaryDirectory(prefix="manibench_load_") as tmpdir:
+        tmp = Path(tmpdir)
+        # Silence per-sample progress lines; only the summary is printed
+        with contextlib.redirect_stdout(io.StringIO()):
+            logger = StructuredLogger(run_id=f"load_{provider}_{workers}", log_dir=tmp)
+            t0 = time.perf_counter()
+            records = run_samples(client, models, problems, config, logger, code_dir=tmp)
+            wall = time.perf_counter() - t0
+            logger.close()
+
+    after = server.stats.as_dict()
+    latencies = [r["generation"]["latency_s"] for r in records if "generation" in r]
+    n_ok = sum(1 for r in records if not r.get("error"))
+    return {
+        "provider": provider,
+        "workers": workers,
+        "samples": len(records),
+        "ok": n_ok,
+        "failed": len(records) - n_ok,
+        "wall_s": round(wall, 3),
+        "samples_per_s": round(len(records) / max(wall, 1e-9), 2),
+        "gen_latency_p50_s": round(_percentile(latencies, 0.50), 3),
+        "gen_latency_p95_s": round(_percentile(latencies, 0.95), 3),
+        "gen_latency_mean_s": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "server": {k: after[k] - before[k] for k in after},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="ManiBench load test against the local mock server",
+    )
+    parser.add_argument("--provider", choices=["openrouter", "inference", "both"],
+                        default="both")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="Worker counts to sweep (default: 1 2 4 8 16)")
+    parser.add_argument("--trials", type=int, default=1)
+    parser.add_argument("--problems", nargs="+", default=None,
+                        help="Problem IDs (default: all)")
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--rate-429", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--retry-delay", type=float, default=0.05,
+                        help="Client back-off base in seconds (real default: 5)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=str(DEFAULT_OUTPUT))
+    args = parser.parse_args()
+
+    server_config = MockServerConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    providers = ["openrouter", "inference"] if args.provider == "both" else [args.provider]
+
+    print("ManiBench load test (mock server)")
+    print(f"  latency={args.latency_ms:.0f}±{args.jitter_ms:.0f}ms  "
+          f"429={args.rate_429:.0%}  5xx={args.error_rate:.0%}  "
+          f"retry_delay={args.retry_delay}s")
+    print(f"{'─'*78}")
+    print(f"{'Provider':<12} {'Workers':>7} {'Samples':>8} {'OK':>5} "
+          f"{'Wall s':>8} {'Samples/s':>10} {'p50 s':>7} {'p95 s':>7} {'429s':>5}")
+
+    server = start_mock_server(server_config, corpus=ReplayCorpus())
+    runs = []
+    try:
+        for provider in providers:
+            for workers in args.workers:
+                res = run_load(provider, workers, args.trials, server,
+                               args.retry_delay, args.problems)
+                runs.append(res)
+                print(f"{provider:<12} {workers:>7} {res['samples']:>8} {res['ok']:>5} "
+                      f"{res['wall_s']:>8.2f} {res['samples_per_s']:>10.2f} "
+                      f"{res['gen_latency_p50_s']:>7.2f} {res['gen_latency_p95_s']:>7.2f} "
+                      f"{res['server']['rate_limited']:>5}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    report = {
+        "mock_server": {
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "rate_429": args.rate_429,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+        },
+        "retry_delay_s": args.retry_delay,
+        "trials": args.trials,
+        "runs": runs,
+    }
+    out_path = Path(args.output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"{'─'*78}")
+    print(f"Report saved: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
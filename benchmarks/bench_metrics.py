@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+ManiBench Benchmarks — Metrics Engine
+=======================================
+Times the static metrics engine over the committed generated_code/ corpus:
+
+    1. `compute_all_metrics(..., skip_render=True)` end to end
+    2. Each metric in isolation
+    3. `detect_version_conflicts` over the raw_code/ reference files
+
+Reports throughput (samples/s, lines/s) and peak traced memory as JSON.
+Pass `--baseline` to compare against an earlier report and exit non-zero
+when any benchmark regresses beyond `--tolerance`.
+
+Usage:
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --repeat 5 --output bench.json
+    python -m benchmarks.bench_metrics --baseline benchmarks/baseline_metrics.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.corpus import iter_generated_samples, iter_raw_code_files, load_problems
+from evaluation.metrics import (
+    compute_alignment,
+    compute_coverage,
+    compute_executability,
+    detect_specific_conflicts,
+    detect_version_conflicts,
+)
+from evaluation.run import compute_all_metrics
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "bench_metrics.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline_metrics.json"
+
+
+# ══════════════════════════════════════════════════════════════════════════
+# Workloads
+# ══════════════════════════════════════════════════════════════════════════
+
+def _known_incompat(problem: dict) -> list[str]:
+    vcn = problem.get("version_conflict_notes", {})
+    if isinstance(vcn, dict):
+        return vcn.get("known_incompatibilities", [])
+    return []
+
+
+def build_workloads() -> tuple[dict[str, tuple[Callable, list]], dict[str, Any]]:
+    """
+    Load the corpus into memory and return the benchmark table.
+
+    Returns:
+        ({name: (fn, items)}, corpus_info) where `fn(item)` runs one call
+        and each item is a `(code, problem)` pair. Files are read up front
+        so disk I/O is not part of the timings.
+    """
+    problems = load_problems()
+    samples = [
+        (s.read(), problems[s.problem_id])
+        for s in iter_generated_samples()
+        if s.problem_id in problems
+    ]
+    raw = [(p.read_text(encoding="utf-8", errors="replace"), {})
+           for p in iter_raw_code_files()]
+
+    workloads: dict[str, tuple[Callable, list]] = {
+        "compute_all_metrics": (
+            lambda item: compute_all_metrics(item[0], item[1], skip_render=True),
+            samples,
+        ),
+        "executability_static": (
+            lambda item: compute_executability(item[0], skip_render=True),
+            samples,
+        ),
+        "version_conflict": (
+            lambda item: detect_version_conflicts(item[0]),
+            samples,
+        ),
+        "specific_conflicts": (
+            lambda item: detect_specific_conflicts(item[0], _known_incompat(item[1])),
+            samples,
+        ),
+        "alignment": (
+            lambda item: compute_alignment(
+                item[0], item[1].get("required_visual_events", []),
+            ),
+            samples,
+        ),
+        "coverage": (
+            lambda item: compute_coverage(
+                item[0], item[1].get("coverage_requirements", []),
+            ),
+            samples,
+        ),
+        "version_conflict_raw_code": (
+            lambda item: detect_version_conflicts(item[0]),
+            raw,
+        ),
+    }
+
+    corpus_info = {
+        "n_samples": len(samples),
+        "sample_lines": sum(_count_lines(c) for c, _ in samples),
+        "n_raw_files": len(raw),
+        "raw_lines": sum(_count_lines(c) for c, _ in raw),
+    }
+    return workloads, corpus_info
+
+
+def _count_lines(code: str) -> int:
+    return len(code.split("\n")) if code else 0
+
+
+# ══════════════════════════════════════════════════════════════════════════
+# Measurement
+# ══════════════════════════════════════════════════════════════════════════
+
+def time_workload(fn: Callable, items: list, repeat: int = 3) -> dict[str, Any]:
+    """
+    Time `fn` over every item, `repeat` times, then trace one extra pass
+    for peak memory (tracing is kept out of the timed passes).
+    """
+    n_lines = sum(_count_lines(item[0]) for item in items)
+
+    # Warm-up pass so regex compilation caches are populated
+    for item in items:
+        fn(item)
+
+    durations = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for item in items:
+            fn(item)
+        durations.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        for item in items:
+            fn(item)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(durations)
+    return {
+        "n_items": len(items),
+        "n_lines": n_lines,
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(durations), 6),
+        "samples_per_s": round(len(items) / max(best, 1e-9), 2),
+        "lines_per_s": round(n_lines / max(best, 1e-9), 2),
+        "peak_mem_bytes": peak,
+    }
+
+
+def run_benchmarks(repeat: int = 3, only: list[str] | None = None) -> dict[str, Any]:
+    """Run every workload (or those named in `only`) and return a report."""
+    workloads, corpus_info = build_workloads()
+    if only:
+        workloads = {k: v for k, v in workloads.items() if k in only}
+
+    results = {}
+    for name, (fn, items) in workloads.items():
+        print(f"  {name:<28} ", end="", flush=True)
+        res = time_workload(fn, items, repeat=repeat)
+        results[name] = res
+        print(f"{res['samples_per_s']:>10.1f} samples/s  "
+              f"{res['lines_per_s']:>12.0f} lines/s  "
+              f"peak {res['peak_mem_bytes'] / 1024:>8.1f} KiB")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            **corpus_info,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare_to_baseline(
+    report: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = 0.25,
+) -> list[str]:
+    """
+    Compare a report against a baseline.
+
+    A benchmark regresses when its best time or peak memory exceeds the
+    baseline by more than `tolerance` (fractional, 0.25 = 25%).
+
+    Returns:
+        Human-readable regression descriptions (empty = no regressions).
+    """
+    regressions = []
+    base = baseline.get("benchmarks", {})
+    for name, cur in report["benchmarks"].items():
+        ref = base.get(name)
+        if ref is None:
+            continue
+        for key, label in (("best_s", "time"), ("peak_mem_bytes", "peak memory")):
+            old, new = ref.get(key), cur.get(key)
+            if not old or new is None:
+                continue
+            if new > old * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {label} {old} → {new} (+{(new / old - 1):.0%})"
+                )
+    return regressions
+
+
+# ══════════════════════════════════════════════════════════════════════════
+# CLI
+# ══════════════════════════════════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="ManiBench metrics-engine benchmark",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="Timed passes per workload; best time is reported (default: 3)",
+    )
+    parser.add_argument(
+        "--only", nargs="+", default=None,
+        help="Run only the named workloads (e.g. alignment coverage)",
+    )
+    parser.add_argument(
+        "--output", type=str, default=str(DEFAULT_OUTPUT),
+        help=f"Where to write the JSON report (default: {DEFAULT_OUTPUT.relative_to(BENCH_DIR.parent)})",
+    )
+    parser.add_argument(
+        "--baseline", type=str, default=None,
+        help="Baseline JSON to compare against; exits 1 on regression",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="Allowed slowdown / memory growth vs. baseline (default: 0.25)",
+    )
+    args = parser.parse_args()
+
+    print("ManiBench metrics benchmark")
+    print(f"{'─'*78}")
+    report = run_benchmarks(repeat=args.repeat, only=args.only)
+    meta = report["meta"]
+    print(f"{'─'*78}")
+    print(f"Corpus: {meta['n_samples']} samples ({meta['sample_lines']} lines), "
+          f"{meta['n_raw_files']} raw_code files ({meta['raw_lines']} lines)")
+
+    out_path = Path(args.output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved: {out_path}")
+
+    if args.baseline:
+        baseline_path = Path(args.baseline)
+        if not baseline_path.exists():
+            print(f"No baseline at {baseline_path} — skipping comparison.")
+            return
+        with open(baseline_path, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n✗ {len(regressions)} regression(s) vs. {baseline_path}:")
+            for r in regressions:
+                print(f"    {r}")
+            sys.exit(1)
+        print(f"✓ No regressions vs. {baseline_path} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+ManiBench Benchmarks — Corpus Helpers
+=======================================
+Locates the committed generated_code/ samples and raw_code/ reference files
+that the benchmarks replay.
+
+Generated samples follow the layout written by `run.save_generated_code`:
+
+    evaluation/generated_code/<model>/<strategy>/<problem_id>_trial<N>.py
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from evaluation.config import DATASET_PATH, GENERATED_CODE_DIR, RAW_CODE_DIR
+
+_SAMPLE_NAME = re.compile(r"^(MB-\d+)_trial(\d+)\.py$")
+
+
+@dataclass
+class Sample:
+    """One generated code sample on disk."""
+    model: str
+    strategy: str
+    problem_id: str
+    trial: int
+    path: Path
+
+    def read(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+
+def load_problems(path: Path = DATASET_PATH) -> dict[str, dict]:
+    """Load dataset problems keyed by problem ID."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    return {p["id"]: p for p in data.get("problems", [])}
+
+
+def iter_generated_samples(root: Path = GENERATED_CODE_DIR) -> list[Sample]:
+    """Return every generated sample under `root`, sorted by path."""
+    samples = []
+    for path in sorted(root.glob("*/*/*.py")):
+        match = _SAMPLE_NAME.match(path.name)
+        if not match:
+            continue
+        samples.append(Sample(
+            model=path.parent.parent.name,
+            strategy=path.parent.name,
+            problem_id=match.group(1),
+            trial=int(match.group(2)),
+            path=path,
+        ))
+    return samples
+
+
+def iter_raw_code_files(root: Path = RAW_CODE_DIR) -> list[Path]:
+    """Return every reference .py file under raw_code/, sorted by path."""
+    return sorted(root.rglob("*.py"))
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+ManiBench Benchmarks — Mock OpenAI-Compatible Server
+======================================================
+Local stand-in for OpenRouter / Inference.net that speaks the
+`/chat/completions` and `/models` schema used by both clients, plus the
+OpenAI-style batch flow (`/files`, `/batches`) used by
+`InferenceNetClient.submit_batch`.
+
+Instead of calling a model it replays stored generations from
+evaluation/generated_code/, matched by model, prompt strategy, and problem
+(the problem is recognised from its `full_prompt` inside the user message).
+Latency, HTTP 429 rate limiting, and HTTP 500 errors are injected at
+configurable rates so client concurrency can be load-tested for free.
+
+Usage:
+    python -m benchmarks.mock_server --port 8765 --latency-ms 200 --rate-429 0.05
+
+    # Point a real run at it:
+    OPENROUTER_API_KEY=mock OPENROUTER_BASE_URL=http://127.0.0.1:8765/v1 \\
+        python -m evaluation.run --skip-render --workers 8
+
+    # Batch mode (batches complete after --batch-delay-s seconds):
+    INFERENCE_API_KEY=mock INFERENCE_BASE_URL=http://127.0.0.1:8765/v1 \\
+        python -m evaluation.run --provider inference --batch --batch-poll 1 --skip-render
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from email.parser import BytesParser
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from benchmarks.corpus import iter_generated_samples, load_problems
+from evaluation.config import DEFAULT_MODELS, INFERENCE_MODELS
+
+
+@dataclass
+class MockServerConfig:
+    """Fault-injection and latency knobs for the mock server."""
+    latency_ms: float = 0.0          # mean response latency
+    latency_jitter_ms: float = 0.0   # uniform ± jitter around the mean
+    rate_429: float = 0.0            # fraction of requests answered with HTTP 429
+    error_rate: float = 0.0          # fraction of requests answered with HTTP 500
+    batch_delay_s: float = 1.0       # time a batch spends in_progress
+    seed: int = 42
+
+
+@dataclass
+class MockServerStats:
+    """Request counters, updated from handler threads."""
+    requests: int = 0
+    ok: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def bump(self, key: str):
+        with self._lock:
+            self.requests += 1
+            setattr(self, key, getattr(self, key) + 1)
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "requests": self.requests,
+            "ok": self.ok,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+        }
+
+
+# ══════════════════════════════════════════════════════════════════════════
+# Replay corpus
+# ══════════════════════════════════════════════════════════════════════════
+
+# Markers that identify each strategy in prompts.build_messages output
+_STRATEGY_MARKERS: list[tuple[str, str]] = [
+    ("Solve this animation problem step-by-step", "cot"),
+    ("STRICT CONSTRAINTS", "constraint"),
+    ("VERSION TRAPS", "version_aware"),
+]
+
+
+class ReplayCorpus:
+    """
+    Stored generations indexed by (model, strategy, problem).
+
+    Lookups fall back from the exact cell to any strategy for the same
+    model, then to any model, so every known problem gets an answer.
+    Repeated requests for a cell cycle through its stored trials.
+    """
+
+    def __init__(self):
+        self.problems = load_problems()
+        self._by_cell: dict[tuple[str, str, str], list[str]] = defaultdict(list)
+        self._by_model: dict[tuple[str, str], list[str]] = defaultdict(list)
+        self._by_problem: dict[str, list[str]] = defaultdict(list)
+        for s in iter_generated_samples():
+            code = s.read()
+            self._by_cell[(s.model, s.strategy, s.problem_id)].append(code)
+            self._by_model[(s.model, s.problem_id)].append(code)
+            self._by_problem[s.problem_id].append(code)
+
+        self._short_names = {
+            m.id: m.short_name for m in (*DEFAULT_MODELS, *INFERENCE_MODELS)
+        }
+        self._cursor: dict[tuple, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def identify(self, messages: list[dict]) -> tuple[str | None, str]:
+        """Return (problem_id, strategy) for a chat request."""
+        user = next(
+            (m.get("content", "") for m in reversed(messages) if m.get("role") == "user"),
+            "",
+        )
+        problem_id = None
+        for pid, problem in self.problems.items():
+            prompt = problem.get("full_prompt", "")
+            if prompt and prompt[:200] in user:
+                problem_id = pid
+                break
+
+        strategy = "zero_shot"
+        if any(m.get("role") == "assistant" for m in messages):
+            strategy = "few_shot"
+        for marker, name in _STRATEGY_MARKERS:
+            if marker in user:
+                strategy = name
+                break
+        return problem_id, strategy
+
+    def next_code(self, model_id: str, problem_id: str, strategy: str) -> str | None:
+        """Return the next stored generation for a cell (round-robin)."""
+        model = self._short_names.get(model_id, model_id)
+        for key, pool in (
+            ((model, strategy, problem_id), self._by_cell),
+            ((model, problem_id), self._by_model),
+            (problem_id, self._by_problem),
+        ):
+            codes = pool.get(key)
+            if codes:
+                with self._lock:
+                    i = self._cursor[key]
+                    self._cursor[key] = i + 1
+                return codes[i % len(codes)]
+        return None
+
+    def model_list(self) -> list[dict[str, Any]]:
+        return [{"id": mid, "object": "model"} for mid in self._short_names]
+
+
+# ══════════════════════════════════════════════════════════════════════════
+# HTTP server
+# ══════════════════════════════════════════════════════════════════════════
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """
+    Routes /chat/completions, /models, /files, and /batches (any path
+    prefix, e.g. /v1).
+    """
+
+    server: "MockServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # keep load tests quiet
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b"{}"
+        return json.loads(raw or b"{}")
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _not_found(self):
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        parts = path.split("/")
+        srv = self.server
+        if path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": srv.corpus.model_list()})
+        elif len(parts) >= 3 and parts[-2] == "batches":
+            batch = srv.batch_object(parts[-1])
+            if batch is None:
+                self._not_found()
+            else:
+                self._send_json(200, batch)
+        elif len(parts) >= 4 and parts[-3] == "files" and parts[-1] == "content":
+            content = srv.files.get(parts[-2])
+            if content is None:
+                self._not_found()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self._not_found()
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path.endswith("/chat/completions"):
+            self._chat_completion(self._read_json())
+        elif path.endswith("/files"):
+            self._upload_file()
+        elif path.endswith("/batches"):
+            batch = self.server.create_batch(self._read_json())
+            if batch is None:
+                self._send_json(400, {"error": {"message": "Unknown input_file_id"}})
+            else:
+                self._send_json(200, batch)
+        else:
+            self._not_found()
+
+    def _upload_file(self):
+        """Accept a multipart/form-data upload with a `file` part."""
+        ctype = self.headers.get("Content-Type", "")
+        message = BytesParser().parsebytes(
+            f"Content-Type: {ctype}\r\n\r\n".encode("latin-1") + self._read_body()
+        )
+        content = None
+        for part in message.walk():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_payload(decode=True)
+        if content is None:
+            self._send_json(400, {"error": {"message": "Missing file part"}})
+            return
+        file_id = self.server.store_file(content)
+        self._send_json(200, {"id": file_id, "object": "file", "bytes": len(content),
+                              "purpose": "batch"})
+
+    def _chat_completion(self, payload: dict):
+        srv = self.server
+        cfg = srv.config
+        srv.simulate_latency()
+
+        roll = srv.roll()
+        if roll < cfg.rate_429:
+            srv.stats.bump("rate_limited")
+            self._send_json(429, {"error": {"message": "Rate limit exceeded (mock)"}},
+                            headers={"Retry-After": "1"})
+            return
+        if roll < cfg.rate_429 + cfg.error_rate:
+            srv.stats.bump("errors")
+            self._send_json(500, {"error": {"message": "Injected server error (mock)"}})
+            return
+
+        model_id = payload.get("model", "")
+        messages = payload.get("messages", [])
+        srv.stats.bump("ok")
+        self._send_json(200, srv.completion_body(model_id, messages))
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded mock server; one handler thread per connection."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: MockServerConfig,
+                 corpus: ReplayCorpus | None = None):
+        super().__init__(address, MockRequestHandler)
+        self.config = config
+        self.corpus = corpus or ReplayCorpus()
+        self.stats = MockServerStats()
+        self._rng = random.Random(config.seed)
+        self._rng_lock = threading.Lock()
+        self._ids = 0
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict[str, Any]] = {}
+
+    def _next_id(self, prefix: str) -> str:
+        with self._rng_lock:
+            self._ids += 1
+            return f"{prefix}-{self._ids}"
+
+    # ── Batch API ──────────────────────────────────────────────────────
+
+    def store_file(self, content: bytes) -> str:
+        file_id = self._next_id("file")
+        self.files[file_id] = content
+        return file_id
+
+    def create_batch(self, payload: dict) -> dict[str, Any] | None:
+        """Register a batch and complete it on a timer thread."""
+        content = self.files.get(payload.get("input_file_id", ""))
+        if content is None:
+            return None
+        lines = [json.loads(l) for l in content.decode("utf-8").splitlines() if l.strip()]
+        batch = {
+            "id": self._next_id("batch"),
+            "object": "batch",
+            "endpoint": payload.get("endpoint", "/v1/chat/completions"),
+            "input_file_id": payload["input_file_id"],
+            "completion_window": payload.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+        }
+        self.batches[batch["id"]] = batch
+        timer = threading.Timer(self.config.batch_delay_s, self._run_batch, (batch, lines))
+        timer.daemon = True
+        timer.start()
+        return dict(batch)
+
+    def _run_batch(self, batch: dict[str, Any], lines: list[dict]):
+        """Answer every request line; injected errors go to the error file."""
+        output, errors = [], []
+        for line in lines:
+            body = line.get("body", {})
+            entry = {"id": self._next_id("batch_req"), "custom_id": line.get("custom_id")}
+            if self.roll() < self.config.error_rate:
+                self.stats.bump("errors")
+                entry["response"] = {"status_code": 500, "body": {
+                    "error": {"message": "Injected server error (mock)"}}}
+                entry["error"] = None
+                errors.append(entry)
+                continue
+            self.stats.bump("ok")
+            entry["response"] = {"status_code": 200, "body": self.completion_body(
+                body.get("model", ""), body.get("messages", []))}
+            entry["error"] = None
+            output.append(entry)
+
+        def _dump(entries):
+            return "".join(json.dumps(e) + "\n" for e in entries).encode("utf-8")
+
+        batch["output_file_id"] = self.store_file(_dump(output))
+        if errors:
+            batch["error_file_id"] = self.store_file(_dump(errors))
+        batch["request_counts"] = {
+            "total": len(lines), "completed": len(output), "failed": len(errors),
+        }
+        batch["completed_at"] = int(time.time())
+        batch["status"] = "completed"
+
+    def batch_object(self, batch_id: str) -> dict[str, Any] | None:
+        batch = self.batches.get(batch_id)
+        return dict(batch) if batch else None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def roll(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def simulate_latency(self):
+        cfg = self.config
+        if cfg.latency_ms <= 0 and cfg.latency_jitter_ms <= 0:
+            return
+        jitter = (self.roll() * 2 - 1) * cfg.latency_jitter_ms
+        time.sleep(max(0.0, cfg.latency_ms + jitter) / 1000)
+
+    def completion_body(self, model_id: str, messages: list[dict]) -> dict[str, Any]:
+        """Build an OpenAI-style chat completion for a replayed sample."""
+        problem_id, strategy = self.corpus.identify(messages)
+        code = self.corpus.next_code(model_id, problem_id, strategy) if problem_id else None
+        if code is None:
+            content = "I could not find a stored generation for this prompt."
+        else:
+            content = f"```python\n{code}\n```"
+
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        return {
+            "id": self._next_id("mock"),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model_id,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (prompt_chars + len(content)) // 4,
+            },
+        }
+
+
+def start_mock_server(
+    config: MockServerConfig | None = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    corpus: ReplayCorpus | None = None,
+) -> MockServer:
+    """
+    Start a mock server on a background thread and return it.
+
+    Port 0 picks a free port; read it back from `server.base_url`.
+    Call `server.shutdown()` when done.
+    """
+    server = MockServer((host, port), config or MockServerConfig(), corpus)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# ══════════════════════════════════════════════════════════════════════════
+# CLI
+# ══════════════════════════════════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mock OpenAI-compatible server replaying generated_code/",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Mean response latency in milliseconds")
+    parser.add_argument("--jitter-ms", type=float, default=0.0,
+                        help="Uniform ± latency jitter in milliseconds")
+    parser.add_argument("--rate-429", type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--batch-delay-s", type=float, default=1.0,
+                        help="Seconds a batch stays in_progress before completing")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = MockServerConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        error_rate=args.error_rate,
+        batch_delay_s=args.batch_delay_s,
+        seed=args.seed,
+    )
+    server = MockServer((args.host, args.port), config)
+    print(f"Mock server listening on {server.base_url}  "
+          f"(latency={config.latency_ms:.0f}±{config.latency_jitter_ms:.0f}ms, "
+          f"429={config.rate_429:.0%}, 5xx={config.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nStats: {server.stats.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+ManiBench Evaluation — Adaptive Trials and pass@k
+===================================================
+With `--adaptive-trials`, trials are allocated where they change the
+estimate instead of a fixed `--trials` per (strategy, model, problem)
+cell. Executability is the pass/fail outcome.
+
+Allocation runs in rounds:
+  1. every cell gets `min_trials` trials
+  2. each later round gives one more trial to every open cell, highest
+     posterior uncertainty first (the standard deviation of its pass
+     rate under a Jeffreys Beta(c + ½, n − c + ½) prior), until the total
+     budget of API calls is spent
+
+A cell is settled, and gets no more trials, when
+  - duplicates   all its trials produced the same program (AST
+                 fingerprint); at temperature 0 further trials repeat it
+  - precise      its posterior SD is below `target_sd`
+  - max_trials   it has had `max_trials` trials
+
+pass@k is reported with the unbiased estimator of Chen et al. (2021),
+1 − C(n−c, k) / C(n, k) per cell, averaged over cells. Cells with fewer
+than k trials count only when settled as duplicates: their outcome is
+then known to be all-pass or all-fail. Intervals are percentile
+bootstraps, resampling trials within each cell.
+"""
+
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from evaluation.config import (
+    ADAPTIVE_TARGET_SD,
+    PASS_AT_K,
+    PASS_AT_K_BOOTSTRAP,
+)
+
+
+@dataclass
+class CellState:
+    """Trials observed so far for one (strategy, model, problem) cell."""
+    strategy: str
+    model: Any                      # ModelSpec
+    problem: dict
+    n: int = 0
+    passes: int = 0
+    fingerprints: set[str] = field(default_factory=set)
+    fingerprinted: int = 0          # trials that produced code
+    allocated: int = 0              # trials handed out (observed or in flight)
+    settled: str | None = None      # duplicates | precise | max_trials
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return self.strategy, self.model.short_name, self.problem["id"]
+
+    def posterior_sd(self) -> float:
+        a = self.passes + 0.5
+        b = self.n - self.passes + 0.5
+        return math.sqrt(a * b / ((a + b) ** 2 * (a + b + 1)))
+
+
+class TrialAllocator:
+    """Hands out trials round by round within a total budget."""
+
+    def __init__(
+        self,
+        strategies: list[str],
+        models,
+        problems: list[dict],
+        budget: int,
+        min_trials: int = 2,
+        max_trials: int = 10,
+        target_sd: float = ADAPTIVE_TARGET_SD,
+    ):
+        self.cells = {
+            c.key: c for c in (
+                CellState(strategy, model, problem)
+                for strategy in strategies
+                for model in models
+                for problem in problems
+            )
+        }
+        self.budget = budget
+        self.min_trials = max(1, min_trials)
+        self.max_trials = max(self.min_trials, max_trials)
+        self.target_sd = target_sd
+        self.used = 0
+
+    def _take(self, cell: CellState) -> tuple:
+        cell.allocated += 1
+        self.used += 1
+        return cell.strategy, cell.model, cell.problem, cell.allocated
+
+    def initial(self) -> list[tuple]:
+        """The first `min_trials` trials of every cell, as far as the budget goes."""
+        out = []
+        for _ in range(self.min_trials):
+            for cell in self.cells.values():
+                if self.used < self.budget:
+                    out.append(self._take(cell))
+        return out
+
+    def observe(self, record: dict) -> None:
+        """Fold one finished record into its cell."""
+        cell = self.cells.get((record["strategy"], record["model"], record["problem_id"]))
+        if cell is None:
+            return
+        cell.n += 1
+        cell.passes += int((record.get("metrics") or {}).get("executability", 0) == 1)
+        if record.get("code_fingerprint"):
+            cell.fingerprints.add(record["code_fingerprint"])
+            cell.fingerprinted += 1
+        self._settle(cell)
+
+    def _settle(self, cell: CellState) -> None:
+        if cell.n < self.min_trials:
+            return
+        if len(cell.fingerprints) == 1 and cell.fingerprinted == cell.n:
+            cell.settled = "duplicates"
+        elif cell.posterior_sd() < self.target_sd:
+            cell.settled = "precise"
+        elif cell.n >= self.max_trials:
+            cell.settled = "max_trials"
+
+    def next_round(self) -> list[tuple]:
+        """One more trial for each open cell, most uncertain first, within budget."""
+        open_cells = sorted(
+            (c for c in self.cells.values() if c.settled is None and c.allocated == c.n),
+            key=lambda c: (-c.posterior_sd(), c.n),
+        )
+        room = max(0, self.budget - self.used)
+        return [self._take(c) for c in open_cells[:room]]
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "used": self.used,
+            "cells": len(self.cells),
+            "settled": dict(Counter(c.settled or "open" for c in self.cells.values())),
+            "trials_per_cell": dict(sorted(Counter(c.n for c in self.cells.values()).items())),
+        }
+
+
+# ── pass@k ────────────────────────────────────────────────────────────────
+
+def pass_at_k(n: int, c: int, k: int) -> float:
+    """Unbiased pass@k from n trials with c passes (requires n >= k)."""
+    if n - c < k:
+        return 1.0
+    return 1.0 - math.comb(n - c, k) / math.comb(n, k)
+
+
+def _cell_outcomes(results: list[dict], group_of) -> dict[str, dict[tuple, dict]]:
+    """{group: {cell: {"outcomes": [0/1, ...], "fingerprints": set, "fingerprinted": int}}}"""
+    groups: dict[str, dict[tuple, dict]] = {}
+    for r in results:
+        if "metrics" not in r:
+            continue
+        cell = (r.get("strategy"), r["model"], r["problem_id"])
+        entry = groups.setdefault(group_of(r), {}).setdefault(
+            cell, {"outcomes": [], "fingerprints": set(), "fingerprinted": 0},
+        )
+        entry["outcomes"].append(int(r["metrics"].get("executability", 0) == 1))
+        if r.get("code_fingerprint"):
+            entry["fingerprints"].add(r["code_fingerprint"])
+            entry["fingerprinted"] += 1
+    return groups
+
+
+def _cell_estimate(outcomes: list[int], deterministic: bool, k: int) -> float | None:
+    n, c = len(outcomes), sum(outcomes)
+    if n >= k:
+        return pass_at_k(n, c, k)
+    if deterministic:
+        return float(c == n)
+    return None
+
+
+def _group_pass_at_k(cells: dict[tuple, dict], k: int, rng: random.Random,
+                     n_boot: int) -> dict[str, Any]:
+    usable = []
+    for entry in cells.values():
+        outcomes = entry["outcomes"]
+        deterministic = (len(entry["fingerprints"]) == 1
+                         and entry["fingerprinted"] == len(outcomes))
+        if _cell_estimate(outcomes, deterministic, k) is not None:
+            usable.append((outcomes, deterministic))
+    if not usable:
+        return {"estimate": None, "ci95": None, "cells": 0, "excluded": len(cells)}
+
+    estimate = sum(_cell_estimate(o, d, k) for o, d in usable) / len(usable)
+    boots = []
+    for _ in range(n_boot):
+        total = 0.0
+        for outcomes, deterministic in usable:
+            resampled = [outcomes[rng.randrange(len(outcomes))] for _ in outcomes]
+            total += _cell_estimate(resampled, deterministic, k)
+        boots.append(total / len(usable))
+    boots.sort()
+    lo = boots[int(0.025 * (n_boot - 1))]
+    hi = boots[int(0.975 * (n_boot - 1))]
+    return {
+        "estimate": round(estimate, 4),
+        "ci95": [round(lo, 4), round(hi, 4)],
+        "cells": len(usable),
+        "excluded": len(cells) - len(usable),
+    }
+
+
+def pass_at_k_report(
+    results: list[dict],
+    ks: tuple[int, ...] = PASS_AT_K,
+    seed: int = 42,
+    n_boot: int = PASS_AT_K_BOOTSTRAP,
+) -> dict[str, Any]:
+    """pass@k per model and per strategy (means over their cells) with 95% intervals."""
+    rng = random.Random(seed)
+    report: dict[str, Any] = {"k": list(ks)}
+    for name, group_of in (("per_model", lambda r: r["model"]),
+                           ("per_strategy", lambda r: r.get("strategy"))):
+        groups = _cell_outcomes(results, group_of)
+        report[name] = {
+            group: {f"pass@{k}": _group_pass_at_k(cells, k, rng, n_boot) for k in ks}
+            for group, cells in groups.items()
+        }
+    return report
@@ -14,11 +14,14 @@ Generates:
 Usage:
     python -m evaluation.analysis --results results/results_<run_id>.json
     python -m evaluation.analysis --results-dir results/
+    python -m evaluation.analysis --results-dir results/ --incremental
 """
 
 import argparse
 import csv
+import hashlib
 import json
+import os
 import sys
 from pathlib import Path
 from typing import Any
@@ -113,35 +116,233 @@ def aggregate_results(results: list[dict]) -> dict:
     }
 
 
+# (short name, key in record["metrics"]) for the four headline metrics
+_METRIC_FIELDS: list[tuple[str, str]] = [
+    ("exec", "executability"),
+    ("vc", "version_conflict_rate"),
+    ("align", "alignment_score"),
+    ("cov", "coverage_score"),
+]
+
+
 def _agg_scores(records: list[dict]) -> dict:
     """Compute mean ± std for all four metrics."""
-    scores = [r["metrics"] for r in records if "metrics" in r]
-    n = len(scores)
+    moments = _empty_moments()
+    for r in records:
+        _add_record(moments, r)
+    return _agg_from_moments(moments)
+
+
+def _empty_moments() -> dict:
+    """Running (count, Σx, Σx²) per metric — mergeable partial aggregates."""
+    return {"n": 0, **{short: [0.0, 0.0] for short, _ in _METRIC_FIELDS}}
+
+
+def _add_record(moments: dict, record: dict):
+    scores = record.get("metrics")
+    if scores is None:
+        return
+    moments["n"] += 1
+    for short, key in _METRIC_FIELDS:
+        v = float(scores[key])
+        moments[short][0] += v
+        moments[short][1] += v * v
+
+
+def _agg_from_moments(moments: dict) -> dict:
+    n = moments["n"]
     if n == 0:
         return {"n": 0, "exec": 0, "vc": 0, "align": 0, "cov": 0}
+    out = {"n": n}
+    for short, _ in _METRIC_FIELDS:
+        total, total_sq = moments[short]
+        mean = total / n
+        var = max(total_sq / n - mean * mean, 0.0)    # population variance
+        out[f"{short}_mean"] = round(mean, 4)
+        out[f"{short}_std"] = round(var ** 0.5, 4)
+    return out
 
-    exec_vals = [s["executability"] for s in scores]
-    vc_vals = [s["version_conflict_rate"] for s in scores]
-    align_vals = [s["alignment_score"] for s in scores]
-    cov_vals = [s["coverage_score"] for s in scores]
 
-    def mean(vs):
-        return sum(vs) / len(vs)
+# ══════════════════════════════════════════════════════════════════════════
+# Incremental aggregation
+# ══════════════════════════════════════════════════════════════════════════
 
-    def std(vs):
-        m = mean(vs)
-        return (sum((v - m) ** 2 for v in vs) / len(vs)) ** 0.5
+INCREMENTAL_STATE_VERSION = 1
 
+
+def _group_keys(record: dict) -> list[str]:
+    """Every aggregate a record contributes to, as flat string keys."""
+    m, p = record["model"], record["problem_id"]
+    return [
+        "global",
+        f"model\x1f{m}",
+        f"problem\x1f{p}",
+        f"difficulty\x1f{record.get('difficulty', '?')}",
+        f"strategy\x1f{record.get('strategy', 'zero_shot')}",
+        f"grid\x1f{m}\x1f{p}",
+    ]
+
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _fresh_state() -> dict:
+    return {"version": INCREMENTAL_STATE_VERSION, "files": {}, "groups": {}}
+
+
+def update_incremental_state(
+    results_dir: Path,
+    state_path: Path,
+) -> tuple[dict, list[dict], bool]:
+    """
+    Merge results files not yet seen into the saved partial aggregates.
+
+    The manifest records each ingested file's size, mtime, and BLAKE2
+    digest; unchanged files are skipped on (size, mtime) alone and never
+    re-read. If an ingested file was modified or deleted the state is
+    rebuilt from scratch, since its old contribution cannot be subtracted.
+
+    Returns:
+        (state, new_records, rebuilt) — `new_records` are the records merged
+        by this call (everything, when `rebuilt`).
+    """
+    state = _fresh_state()
+    fresh = True
+    if state_path.exists():
+        with open(state_path, "r") as f:
+            loaded = json.load(f)
+        if loaded.get("version") == INCREMENTAL_STATE_VERSION:
+            state, fresh = loaded, False
+
+    paths = sorted(results_dir.glob("results_*.json"))
+    current = {p.name: p for p in paths}
+    pending: list[tuple[Path, dict]] = []
+    rebuilt = False
+
+    for name in state["files"]:
+        if name not in current:
+            rebuilt = True          # an ingested file disappeared
+
+    for p in paths:
+        st = p.stat()
+        seen = state["files"].get(p.name)
+        if seen and seen["size"] == st.st_size and seen["mtime"] == st.st_mtime:
+            continue
+        entry = {"size": st.st_size, "mtime": st.st_mtime, "hash": _file_digest(p)}
+        if seen:
+            if seen["hash"] == entry["hash"]:
+                seen.update(entry)  # touched but identical
+                continue
+            rebuilt = True          # content changed under us
+        pending.append((p, entry))
+
+    if rebuilt:
+        state = _fresh_state()
+        pending = [
+            (p, {"size": p.stat().st_size, "mtime": p.stat().st_mtime,
+                 "hash": _file_digest(p)})
+            for p in paths
+        ]
+
+    new_records: list[dict] = []
+    groups = state["groups"]
+    for p, entry in pending:
+        print(f"Ingesting {p.name}")
+        records = load_results(p)
+        for r in records:
+            for key in _group_keys(r):
+                _add_record(groups.setdefault(key, _empty_moments()), r)
+        entry["records"] = len(records)
+        state["files"][p.name] = entry
+        new_records.extend(records)
+
+    _save_state(state, state_path)
+
+    n_files = len(state["files"])
+    print(f"Incremental: {len(pending)} new file(s) merged, "
+          f"{n_files - len(pending)} unchanged"
+          f"{' (state rebuilt)' if rebuilt else ''}")
+    return state, new_records, rebuilt or fresh
+
+
+def _save_state(state: dict, state_path: Path):
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, state_path)
+
+
+def sync_incremental_csv(state: dict, state_path: Path, results_dir: Path, csv_path: Path):
+    """
+    Make `csv_path` hold exactly the rows of the files ingested in `state`.
+
+    The manifest's "csv" entry records which files (by digest) the CSV was
+    written from, and the CSV's size and mtime afterwards. If the CSV still
+    matches, only rows of files ingested since are appended; if anything
+    else rewrote it (e.g. a full `make analyze` into the same directory) or
+    the state was rebuilt, it is rewritten from every ingested file.
+    """
+    ingested = {name: entry["hash"] for name, entry in state["files"].items()}
+    info = state.get("csv")
+    valid = False
+    if info is not None and csv_path.exists():
+        st = csv_path.stat()
+        valid = (
+            st.st_size == info["size"] and st.st_mtime_ns == info["mtime_ns"]
+            and all(ingested.get(n) == h for n, h in info["files"].items())
+        )
+    names = [n for n in sorted(ingested) if not (valid and n in info["files"])]
+    records = [r for n in names for r in load_results(results_dir / n)]
+    if not valid and csv_path.exists():
+        print("CSV out of step with incremental state; rewriting")
+    export_csv(records, csv_path, append=valid)
+
+    st = csv_path.stat()
+    state["csv"] = {"files": ingested, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    _save_state(state, state_path)
+
+
+def aggregate_from_state(state: dict) -> dict:
+    """Build the `aggregate_results` structure from saved partial aggregates."""
+    groups = state["groups"]
+    sections: dict[str, dict[str, dict]] = {
+        "model": {}, "problem": {}, "difficulty": {}, "strategy": {},
+    }
+    grid_moments: dict[str, dict[str, dict]] = {}
+    for key, moments in groups.items():
+        parts = key.split("\x1f")
+        if parts[0] in sections:
+            sections[parts[0]][parts[1]] = moments
+        elif parts[0] == "grid":
+            grid_moments.setdefault(parts[1], {})[parts[2]] = moments
+
+    models = sorted(sections["model"])
+    problems = sorted(sections["problem"])
+    strategies = sorted(sections["strategy"])
     return {
-        "n": n,
-        "exec_mean": round(mean(exec_vals), 4),
-        "exec_std": round(std(exec_vals), 4),
-        "vc_mean": round(mean(vc_vals), 4),
-        "vc_std": round(std(vc_vals), 4),
-        "align_mean": round(mean(align_vals), 4),
-        "align_std": round(std(align_vals), 4),
-        "cov_mean": round(mean(cov_vals), 4),
-        "cov_std": round(std(cov_vals), 4),
+        "models": models,
+        "problems": problems,
+        "strategies": strategies,
+        "per_model": {m: _agg_from_moments(sections["model"][m]) for m in models},
+        "per_problem": {p: _agg_from_moments(sections["problem"][p]) for p in problems},
+        "per_difficulty": {
+            d: _agg_from_moments(mo) for d, mo in sections["difficulty"].items()
+        },
+        "per_strategy": {s: _agg_from_moments(sections["strategy"][s]) for s in strategies},
+        "grid": {
+            m: {
+                p: _agg_from_moments(grid_moments.get(m, {}).get(p, _empty_moments()))
+                for p in problems
+            }
+            for m in models
+        },
+        "global": _agg_from_moments(groups.get("global", _empty_moments())),
     }
 
 
@@ -299,9 +500,10 @@ def _latex_escape(text: str) -> str:
 # CSV Export
 # ══════════════════════════════════════════════════════════════════════════
 
-def export_csv(results: list[dict], output_path: Path):
-    """Export flat CSV of all results for plotting."""
+def export_csv(results: list[dict], output_path: Path, append: bool = False):
+    """Export flat CSV of all results for plotting (or append new rows)."""
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    append = append and output_path.exists()
 
     fieldnames = [
         "model", "model_id", "problem_id", "trial", "strategy",
@@ -309,9 +511,10 @@ def export_csv(results: list[dict], output_path: Path):
         "coverage_score", "latency_s", "code_lines", "error",
     ]
 
-    with open(output_path, "w", newline="") as f:
+    with open(output_path, "a" if append else "w", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+        if not append:
+            writer.writeheader()
 
         for r in results:
             metrics = r.get("metrics", {})
@@ -331,7 +534,7 @@ def export_csv(results: list[dict], output_path: Path):
                 "error": r.get("error", ""),
             })
 
-    print(f"CSV exported: {output_path}")
+    print(f"CSV {'appended' if append else 'exported'}: {output_path} ({len(results)} rows)")
 
 
 # ══════════════════════════════════════════════════════════════════════════
@@ -428,24 +631,37 @@ def main():
         "--output-dir", type=str, default=None,
         help="Output directory for generated tables (default: results/analysis/)",
     )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="With --results-dir: merge only results files not seen before, "
+             "using partial aggregates saved in the output directory",
+    )
     args = parser.parse_args()
-
-    # Load results
-    if args.results:
-        results = load_results(Path(args.results))
-    else:
-        results = load_results_dir(Path(args.results_dir))
-
-    if not results:
-        print("ERROR: No results found.")
-        sys.exit(1)
+    if args.incremental and not args.results_dir:
+        parser.error("--incremental requires --results-dir")
 
     # Output directory
     out_dir = Path(args.output_dir) if args.output_dir else RESULTS_DIR / "analysis"
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    # Aggregate
-    agg = aggregate_results(results)
+    # Load + aggregate
+    state = None
+    state_path = out_dir / "incremental_state.json"
+    if args.incremental:
+        state, _, _ = update_incremental_state(Path(args.results_dir), state_path)
+        agg = aggregate_from_state(state)
+        if agg["global"]["n"] == 0:
+            print("ERROR: No results found.")
+            sys.exit(1)
+    else:
+        if args.results:
+            results = load_results(Path(args.results))
+        else:
+            results = load_results_dir(Path(args.results_dir))
+        if not results:
+            print("ERROR: No results found.")
+            sys.exit(1)
+        agg = aggregate_results(results)
 
     # ── Generate all outputs ──
 
@@ -466,7 +682,10 @@ def main():
 
     # 2. CSV export
     csv_path = out_dir / "results_flat.csv"
-    export_csv(results, csv_path)
+    if state is not None:
+        sync_incremental_csv(state, state_path, Path(args.results_dir), csv_path)
+    else:
+        export_csv(results, csv_path)
 
     # 3. Markdown summary
     md_report = generate_markdown_summary(agg)
@@ -0,0 +1,365 @@
+"""
+ManiBench Evaluation — Render Broker
+======================================
+Serves a job queue (job_queue.py) over HTTP so render workers on other
+machines can drain it, while code generation stays in this process.
+
+    python -m evaluation.job_queue enqueue --strategy zero_shot --trials 3
+    python -m evaluation.broker --host 0.0.0.0 --generate-workers 4
+    python -m evaluation.worker --broker http://buildbox:8642 --processes 8    # each box
+
+The broker owns the queue file. Its `--generate-workers` threads claim
+`pending` items and call the model API through one shared client, so the
+provider's rate limit is respected in one place; generated code is stored
+exactly as `job_queue work` stores it. Render workers claim `generated`
+items, receive the code with the queue's settings, render and score on
+their own machine, and post the finished record back.
+
+Endpoints (JSON in, JSON out):
+
+    GET  /settings                       stored EvalConfig settings
+    GET  /status                         item counts and workers seen
+    POST /claim      {worker}            {"item": {..., "code"} | null, "done"}
+    POST /heartbeat  {id, worker}        renew the lease on a running render
+    POST /complete   {id, worker, record}
+    POST /fail       {id, worker, error, record}
+    POST /release    {id, worker}        hand an item back (worker shutting down)
+
+Every render is a lease: an item whose worker has not been heard from for
+`--lease` seconds returns to `generated` for another worker, and a late
+result for it from the original worker is refused (`"ok": false`). Workers
+renew the lease every BROKER_HEARTBEAT_S while rendering.
+
+`--local-workers N` starts N render workers on this machine against the
+broker and exits once the queue is drained — the whole pipeline on one box.
+
+There is no authentication: bind to a trusted network only.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from evaluation.config import (
+    BROKER_HEARTBEAT_S,
+    BROKER_LEASE_S,
+    BROKER_POLL_S,
+    BROKER_PORT,
+    DATASET_PATH,
+    QUEUE_DB_PATH,
+    ensure_dirs,
+    get_models_for_provider,
+    load_env,
+)
+from evaluation.job_queue import (
+    JobQueue,
+    config_from_settings,
+    generate_item,
+    print_status,
+    stored_code,
+    worker_id,
+)
+
+# States from which render work can still reach a worker
+_OPEN_STATES = ("pending", "generating", "generated", "rendering")
+
+
+class Broker:
+    """Queue operations behind the HTTP endpoints, plus central generation."""
+
+    def __init__(self, db_path: Path | str = QUEUE_DB_PATH, lease_s: float = BROKER_LEASE_S,
+                 verbose: bool = True):
+        self.db_path = Path(db_path)
+        self.lease_s = lease_s
+        self.verbose = verbose                      # print each record as it arrives
+        self.worker = worker_id()
+        self.stop = threading.Event()
+        self.seen: dict[str, float] = {}            # render worker → last contact
+        self._generating: set[int] = set()          # item ids in flight here
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def queue(self):
+        """A JobQueue for the calling thread (SQLite connections are per thread)."""
+        queue = JobQueue(self.db_path)
+        try:
+            yield queue
+        finally:
+            queue.close()
+
+    def _touch(self, worker: str):
+        with self._lock:
+            self.seen[worker] = time.time()
+
+    # ── Render endpoints ───────────────────────────────────────────────
+
+    def settings(self, _: dict) -> dict[str, Any]:
+        with self.queue() as q:
+            return q.settings()
+
+    def status(self, _: dict) -> dict[str, Any]:
+        now = time.time()
+        with self.queue() as q:
+            counts = q.counts()
+        with self._lock:
+            workers = {w: round(now - t, 1) for w, t in sorted(self.seen.items())}
+        return {"counts": counts, "workers_last_seen_s": workers}
+
+    def claim(self, body: dict) -> dict[str, Any]:
+        worker = body["worker"]
+        self._touch(worker)
+        with self.queue() as q:
+            while True:
+                item = q.claim(worker, states=("generated",))
+                if item is None:
+                    counts = q.counts()
+                    return {"item": None,
+                            "done": not any(counts[s] for s in _OPEN_STATES)}
+                record, code = stored_code(q, item)
+                if code is not None:
+                    return {"item": {
+                        "id": item.id, "model": item.model, "problem_id": item.problem_id,
+                        "trial": item.trial, "strategy": item.strategy,
+                        "record": record, "code": code,
+                    }, "done": False}
+
+    def heartbeat(self, body: dict) -> dict[str, Any]:
+        self._touch(body["worker"])
+        with self.queue() as q:
+            return {"ok": q.heartbeat(body["id"], "rendering", body["worker"])}
+
+    def complete(self, body: dict) -> dict[str, Any]:
+        from evaluation.run import format_outcome
+
+        self._touch(body["worker"])
+        record = body["record"]
+        with self.queue() as q:
+            ok = q.mark_scored(body["id"], "rendering", record, owner=body["worker"])
+        if self.verbose:
+            print(f"    [{body['worker']}] {record['model']} {record['problem_id']} "
+                  f"t{record['trial']} {record.get('strategy', '')}  "
+                  f"{format_outcome(record) if ok else 'lease lost, result dropped'}",
+                  flush=True)
+        return {"ok": ok}
+
+    def fail(self, body: dict) -> dict[str, Any]:
+        self._touch(body["worker"])
+        with self.queue() as q:
+            return {"ok": q.mark_failed(
+                body["id"], "rendering", body["error"], body.get("record"),
+                owner=body["worker"],
+            )}
+
+    def release(self, body: dict) -> dict[str, Any]:
+        self._touch(body["worker"])
+        with self.queue() as q:
+            return {"ok": q.release(body["id"], "rendering", owner=body["worker"])}
+
+    # ── Background threads ─────────────────────────────────────────────
+
+    def expire_leases(self):
+        """Return renders whose worker went quiet for `lease_s` to the queue."""
+        with self.queue() as q:
+            while not self.stop.wait(BROKER_HEARTBEAT_S):
+                n = q.recover(stale_after=self.lease_s, states=("rendering",))
+                if n:
+                    print(f"  Lease expired on {n} render(s); re-queued", flush=True)
+
+    def generate(self, ctx: dict):
+        """
+        Claim pending items and generate their code until the broker stops
+        or the queue has no open work left. Items can become pending again
+        later (enqueued, retried, or released by a lease expiry), so an empty
+        claim waits BROKER_POLL_S rather than ending the thread.
+        """
+        with self.queue() as q:
+            while not self.stop.is_set():
+                item = q.claim(self.worker, states=("pending",))
+                if item is None:
+                    counts = q.counts()
+                    if not any(counts[s] for s in _OPEN_STATES):
+                        return
+                    self.stop.wait(BROKER_POLL_S)
+                    continue
+                with self._lock:
+                    self._generating.add(item.id)
+                record, code = generate_item(q, item, ctx)
+                with self._lock:
+                    self._generating.discard(item.id)
+                print(f"    [generate] {record['model']} {record['problem_id']} "
+                      f"t{record['trial']} {record.get('strategy', '')}  "
+                      f"{'ok' if code else record.get('error', '✗')[:60]}", flush=True)
+
+    def release_generating(self):
+        """Hand back items whose generation was cut short by shutdown."""
+        with self._lock:
+            pending = list(self._generating)
+        with self.queue() as q:
+            for item_id in pending:
+                q.release(item_id, "generating", owner=self.worker)
+
+
+ROUTES = {
+    ("GET", "/settings"): Broker.settings,
+    ("GET", "/status"): Broker.status,
+    ("POST", "/claim"): Broker.claim,
+    ("POST", "/heartbeat"): Broker.heartbeat,
+    ("POST", "/complete"): Broker.complete,
+    ("POST", "/fail"): Broker.fail,
+    ("POST", "/release"): Broker.release,
+}
+
+
+class BrokerHandler(BaseHTTPRequestHandler):
+    """JSON request/response wrapper around ROUTES."""
+    broker: Broker                  # set on the server subclass in make_server
+
+    def _dispatch(self, method: str):
+        handler = ROUTES.get((method, self.path))
+        if handler is None:
+            return self._reply(404, {"error": f"no route {method} {self.path}"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else {}
+        except ValueError as e:
+            return self._reply(400, {"error": f"bad JSON: {e}"})
+        try:
+            return self._reply(200, handler(self.server.broker, body))
+        except KeyError as e:
+            return self._reply(400, {"error": f"missing field {e}"})
+        except Exception:
+            return self._reply(500, {"error": traceback.format_exc()})
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def log_message(self, format, *args):
+        pass                        # one line per request would drown the progress output
+
+
+def make_server(broker: Broker, host: str = "127.0.0.1",
+                port: int = BROKER_PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), BrokerHandler)
+    server.daemon_threads = True
+    server.broker = broker
+    return server
+
+
+def _generation_context(config) -> dict:
+    """Shared state for the generation threads (one API client between them)."""
+    from evaluation.logger import StructuredLogger
+    from evaluation.run import create_client, load_dataset
+
+    clients: list = []
+    lock = threading.Lock()
+
+    def client():
+        with lock:                             # built on first generation only
+            if not clients:
+                clients.append(create_client(config.provider))
+            return clients[0]
+
+    return {
+        "models": {m.short_name: m for m in get_models_for_provider(config.provider)},
+        "problems": {p["id"]: p for p in load_dataset(DATASET_PATH)},
+        "client": client,
+        "logger": StructuredLogger(
+            run_id=f"{time.strftime('%Y%m%d_%H%M%S', time.gmtime())}_{os.getpid()}",
+        ),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Serve a ManiBench job queue to remote render workers",
+    )
+    parser.add_argument("--db", type=str, default=str(QUEUE_DB_PATH),
+                        help=f"Queue database (default: {QUEUE_DB_PATH})")
+    parser.add_argument("--host", type=str, default="127.0.0.1",
+                        help="Interface to bind (default: 127.0.0.1; 0.0.0.0 for other machines)")
+    parser.add_argument("--port", type=int, default=BROKER_PORT,
+                        help=f"Port (default: {BROKER_PORT})")
+    parser.add_argument("--generate-workers", type=int, default=1,
+                        help="Concurrent generation API calls (default: 1)")
+    parser.add_argument("--lease", type=float, default=BROKER_LEASE_S,
+                        help=f"Seconds without a heartbeat before a render is re-queued "
+                             f"(default: {BROKER_LEASE_S})")
+    parser.add_argument("--local-workers", type=int, default=0,
+                        help="Start this many render workers here and exit when done")
+    return parser.parse_args()
+
+
+def main():
+    """Entry point."""
+    args = parse_args()
+    load_env()
+    ensure_dirs()
+    broker = Broker(args.db, lease_s=args.lease, verbose=args.local_workers == 0)
+    with broker.queue() as q:
+        recovered = q.recover()                # items of a previous broker or dead workers
+        config = config_from_settings(q.settings())
+        print_status(q)
+    if recovered:
+        print(f"Recovered {recovered} in-progress items")
+
+    server = make_server(broker, args.host, args.port)
+    url = f"http://{args.host}:{server.server_address[1]}"
+    print(f"Broker listening on {url}  (lease {args.lease:g}s, "
+          f"{args.generate_workers} generation worker(s))", flush=True)
+
+    threads = [threading.Thread(target=broker.expire_leases, daemon=True)]
+    ctx = _generation_context(config) if args.generate_workers > 0 else None
+    if ctx is not None:
+        threads += [threading.Thread(target=broker.generate, args=(ctx,), daemon=True)
+                    for _ in range(args.generate_workers)]
+    for t in threads:
+        t.start()
+
+    try:
+        if args.local_workers > 0:
+            from evaluation.worker import run_worker
+
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            mp = multiprocessing.get_context("spawn")
+            procs = [mp.Process(target=run_worker, args=(url,))
+                     for _ in range(args.local_workers)]
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+        else:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        broker.stop.set()
+        server.shutdown()
+        server.server_close()
+        broker.release_generating()
+        if ctx is not None:
+            ctx["logger"].close()
+        with broker.queue() as q:
+            print_status(q)
+
+
+if __name__ == "__main__":
+    main()
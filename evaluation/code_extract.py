@@ -0,0 +1,254 @@
+"""
+ManiBench Evaluation — Code Extraction
+========================================
+Pulls the Manim program out of a model response. Shared by both API
+clients.
+
+The response is scanned once and every fenced block is recorded with its
+offsets and language tag. The scanner is incremental:
+`feed()` accepts arbitrary text chunks (or `feed_sse()` raw server-sent
+event lines), so a streamed response can be parsed as it arrives.
+
+Block choice, in order:
+  1. the longest block tagged python / py / python3 / manim
+  2. the longest untagged block
+  3. from the first `from manim import` / `import manim` line to the end
+  4. the whole response
+
+Fences follow what models actually emit rather than strict Markdown: an
+opening fence may follow prose on the same line ("Sure! ```python") if
+only a language tag comes after it, and a closing fence may end a code
+line ("print(1)```") instead of standing on its own.
+
+A fence still open at the end of the response (typically a
+`finish_reason == "length"` truncation) counts as a block. When the
+response was truncated, its cut-off last line is dropped so the recovered
+code at least ends on a line boundary.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+PYTHON_TAGS = {"python", "py", "python3", "manim"}
+_FENCE_CHARS = "`~"
+_IMPORT_MARKERS = ("from manim import", "import manim")
+_LANG_TAG = re.compile(r"[\w+#.-]*")     # info string allowed after a mid-line opening fence
+
+
+@dataclass
+class CodeBlock:
+    """One fenced block found in a response."""
+    start: int                  # offset of the opening fence line
+    end: int | None             # offset just past the closing fence; None if unterminated
+    lang: str                   # first word of the info string, lowercased ("" if none)
+    code: str
+
+    @property
+    def closed(self) -> bool:
+        return self.end is not None
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "start": self.start,
+            "end": self.end,
+            "lang": self.lang,
+            "chars": len(self.code),
+            "closed": self.closed,
+        }
+
+
+@dataclass
+class Extraction:
+    """Result of code extraction: the chosen code plus how it was found."""
+    code: str
+    source: str                 # fence | unterminated_fence | import_scan | raw
+    chosen: int | None          # index into `blocks`, if a block was chosen
+    blocks: list[CodeBlock] = field(default_factory=list)
+    truncated: bool = False     # response ended with finish_reason == "length"
+
+    def metadata(self) -> dict[str, Any]:
+        """Compact summary for results records (no code bodies)."""
+        return {
+            "source": self.source,
+            "chosen": self.chosen,
+            "truncated": self.truncated,
+            "blocks": [b.describe() for b in self.blocks],
+        }
+
+
+def _fence_lines(text: str, pos: int, end: int):
+    """
+    Yield (line_start, line_end, at, fence, info) for the first run of three
+    or more fence characters on each line of text[pos:end]; `at` is where
+    the run starts and `info` the rest of the line. `pos` must be at a line
+    start.
+    """
+    upcoming = {c: text.find(c * 3, pos, end) for c in _FENCE_CHARS}
+    while True:
+        hits = [i for i in upcoming.values() if i >= 0]
+        if not hits:
+            return
+        i = min(hits)
+        line_start = text.rfind("\n", pos, i) + 1 or pos
+        line_end = text.find("\n", i, end)
+        if line_end < 0:
+            line_end = end
+        j = i
+        while j < line_end and text[j] == text[i]:
+            j += 1
+        yield line_start, line_end, i, text[i:j], text[j:line_end].strip()
+        pos = line_end + 1
+        for c, at in upcoming.items():
+            if 0 <= at < pos:
+                upcoming[c] = text.find(c * 3, pos, end)
+
+
+class CodeFenceScanner:
+    """
+    Single-pass, incremental fenced-block scanner.
+
+    Fence candidates are located with `str.find`, so the text between
+    fences is never walked line by line in Python.
+    """
+
+    def __init__(self):
+        self.blocks: list[CodeBlock] = []
+        self.finish_reason: str | None = None
+        self._text = ""
+        self._scanned = 0               # text[:_scanned] is whole lines, already scanned
+        self._fence: str | None = None  # open fence marker, e.g. "```" or "````"
+        self._lang = ""
+        self._start = 0                 # offset of the open fence line
+        self._body = 0                  # offset of the open block's first code line
+        self._import_at: int | None = None
+
+    # ── Input ──────────────────────────────────────────────────────────
+
+    def feed(self, chunk: str) -> None:
+        """Consume the next piece of response text."""
+        if not chunk:
+            return
+        self._text += chunk
+        end = self._text.rfind("\n", self._scanned) + 1
+        if end > self._scanned:
+            self._scan(end)
+
+    def feed_sse(self, line: str) -> bool:
+        """
+        Consume one server-sent-events line of a streamed chat completion.
+
+        Returns False once the `data: [DONE]` sentinel is seen.
+        """
+        if not line.startswith("data:"):
+            return True
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return False
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return True
+        for choice in event.get("choices", [])[:1]:
+            delta = choice.get("delta") or {}
+            self.feed(delta.get("content") or "")
+            if choice.get("finish_reason"):
+                self.finish_reason = choice["finish_reason"]
+        return True
+
+    # ── Scanning ───────────────────────────────────────────────────────
+
+    def _scan(self, end: int) -> None:
+        """Scan text[_scanned:end] (whole lines) for fences and imports."""
+        text = self._text
+        for line_start, line_end, at, fence, info in _fence_lines(text, self._scanned, end):
+            leading = not text[line_start:at].strip(" \t")
+            if self._fence is None:
+                if fence[0] == "`" and "`" in info:
+                    continue                # inline code span, not a fence
+                if not leading and not _LANG_TAG.fullmatch(info):
+                    continue                # prose that mentions a fence
+                self._fence = fence
+                self._lang = info.split()[0].lower() if info else ""
+                self._start = line_start
+                self._body = min(line_end + 1, len(text))
+            elif fence[0] == self._fence[0] and len(fence) >= len(self._fence) and not info:
+                # on its own line, or closing the block at the end of a code line
+                self.blocks.append(CodeBlock(
+                    start=self._start,
+                    end=min(line_end + 1, len(text)),
+                    lang=self._lang,
+                    code=text[self._body:at].strip(),
+                ))
+                self._fence = None
+
+        if self._import_at is None:
+            hits = [i for i in (text.find(marker, self._scanned, end)
+                                for marker in _IMPORT_MARKERS) if i >= 0]
+            if hits:
+                self._import_at = text.rfind("\n", 0, min(hits)) + 1
+        self._scanned = end
+
+    # ── Result ─────────────────────────────────────────────────────────
+
+    def finish(self, finish_reason: str | None = None) -> Extraction:
+        """Flush the scanner and choose the code."""
+        if finish_reason is not None:
+            self.finish_reason = finish_reason
+        truncated = self.finish_reason == "length"
+        text = self._text
+
+        body_end = len(text)
+        if self._scanned < len(text):
+            tail = text[self._scanned:].strip()
+            closes = self._fence is not None and (
+                tail.startswith(self._fence) or tail.endswith(self._fence))
+            if truncated and self._fence is not None and not closes:
+                body_end = self._scanned    # drop the cut-off last line
+            else:
+                self._scan(len(text))
+        if self._fence is not None:
+            self.blocks.append(CodeBlock(
+                start=self._start,
+                end=None,
+                lang=self._lang,
+                code=text[self._body:body_end].strip(),
+            ))
+            self._fence = None
+
+        for wanted in (lambda b: b.lang in PYTHON_TAGS, lambda b: b.lang == ""):
+            candidates = [i for i, b in enumerate(self.blocks) if wanted(b) and b.code]
+            if candidates:
+                i = max(candidates, key=lambda j: len(self.blocks[j].code))
+                block = self.blocks[i]
+                return Extraction(
+                    code=block.code,
+                    source="fence" if block.closed else "unterminated_fence",
+                    chosen=i,
+                    blocks=self.blocks,
+                    truncated=truncated,
+                )
+
+        if self._import_at is not None:
+            return Extraction(
+                code=text[self._import_at:].strip(),
+                source="import_scan",
+                chosen=None,
+                blocks=self.blocks,
+                truncated=truncated,
+            )
+        return Extraction(
+            code=text.strip(),
+            source="raw",
+            chosen=None,
+            blocks=self.blocks,
+            truncated=truncated,
+        )
+
+
+def extract_code(content: str, finish_reason: str | None = None) -> Extraction:
+    """Extract the Manim program from a complete response."""
+    scanner = CodeFenceScanner()
+    scanner.feed(content)
+    return scanner.finish(finish_reason)
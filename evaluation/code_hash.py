@@ -0,0 +1,46 @@
+"""
+ManiBench Evaluation — Code Hashing
+=====================================
+Stable content hashes for generated code, used as cache keys, in
+results records and logs, and as the key of the code index (code_index.py).
+
+Hashes use BLAKE2b, so they are identical across processes and Python
+versions (unlike the built-in `hash()`, which is salted per process).
+"""
+
+import ast
+import hashlib
+
+HASH_DIGEST_SIZE = 16          # bytes → 32 hex characters
+
+
+def normalize_code(code: str) -> str:
+    """
+    Canonicalize source text so cosmetic differences do not change its hash:
+    CRLF/CR line endings become LF, trailing whitespace is stripped from
+    every line, and leading/trailing blank lines are dropped.
+    """
+    code = code.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [line.rstrip() for line in code.split("\n")]
+    return "\n".join(lines).strip("\n")
+
+
+def code_hash(code: str, normalize: bool = True) -> str:
+    """Hex BLAKE2b digest of `code` (normalized first unless told otherwise)."""
+    if normalize:
+        code = normalize_code(code)
+    return hashlib.blake2b(code.encode("utf-8"), digest_size=HASH_DIGEST_SIZE).hexdigest()
+
+
+def ast_fingerprint(code: str) -> str:
+    """
+    Hash of the code's abstract syntax tree, so samples that differ only in
+    comments, blank lines, or formatting share a fingerprint. Code that does
+    not parse falls back to `code_hash`.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return code_hash(code)
+    dump = ast.dump(tree, annotate_fields=False, include_attributes=False)
+    return hashlib.blake2b(dump.encode("utf-8"), digest_size=HASH_DIGEST_SIZE).hexdigest()
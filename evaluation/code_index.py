@@ -0,0 +1,229 @@
+"""
+ManiBench Evaluation — Cross-Run Code Index
+=============================================
+Maps the stable content hash of every generated sample (code_hash.py) to
+where it came from: (model, problem, trial, strategy, run). Each GENERATION
+event in the JSONL logs carries that hash, so the index is built from the
+logs alone and covers every run, queue worker and broker that wrote one.
+
+The index is a SQLite file (CODE_INDEX_PATH). `update()` is incremental:
+it remembers how far each log file was read and only parses what was
+appended since, so refreshing it at the end of every run costs little.
+Log lines written before hashes were stable (`hex(hash(code))`) are
+skipped.
+
+Joins it supports:
+
+  - lookup(hash)        every sample that produced this exact code
+  - shared(by="model")  code produced by more than one model (or run,
+                        problem, ...) — the starting point for
+                        memorization and boilerplate analysis
+  - render caches and results records key on the same hash
+
+Usage:
+    python -m evaluation.code_index update
+    python -m evaluation.code_index lookup evaluation/generated_code/GPT-4o/zero_shot/MB-001_trial1.py
+    python -m evaluation.code_index shared --by model
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from evaluation.code_hash import HASH_DIGEST_SIZE, code_hash
+from evaluation.config import CODE_INDEX_PATH, LOGS_DIR
+
+_HASH_RE = re.compile(rf"^[0-9a-f]{{{2 * HASH_DIGEST_SIZE}}}$")
+
+# Columns `shared` can group by
+SHARED_BY = ("model", "run_id", "problem_id", "strategy")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    code_hash   TEXT NOT NULL,
+    model       TEXT NOT NULL,
+    problem_id  TEXT NOT NULL,
+    trial       INTEGER NOT NULL,
+    strategy    TEXT NOT NULL,
+    run_id      TEXT NOT NULL,
+    code_path   TEXT,
+    timestamp   TEXT,
+    PRIMARY KEY (run_id, model, problem_id, trial, strategy)
+);
+CREATE INDEX IF NOT EXISTS samples_hash ON samples (code_hash);
+CREATE TABLE IF NOT EXISTS sources (
+    path    TEXT PRIMARY KEY,
+    offset  INTEGER NOT NULL
+);
+"""
+
+
+class CodeIndex:
+    """The hash → sample index in one SQLite file (one instance per thread)."""
+
+    def __init__(self, path: Path | str = CODE_INDEX_PATH):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    # ── Building ───────────────────────────────────────────────────────
+
+    def add(self, rows: list[dict[str, Any]]) -> int:
+        """Insert (or refresh) samples; each row needs the `samples` columns."""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO samples (code_hash, model, problem_id, trial, "
+                "strategy, run_id, code_path, timestamp) VALUES (:code_hash, :model, "
+                ":problem_id, :trial, :strategy, :run_id, :code_path, :timestamp)",
+                rows,
+            )
+        return len(rows)
+
+    def update(self, logs_dir: Path | str = LOGS_DIR) -> int:
+        """Index GENERATION events appended to the logs since the last update."""
+        conn = self._connect()
+        added = 0
+        for log_path in sorted(Path(logs_dir).glob("run_*.jsonl")):
+            key = str(log_path.resolve())
+            row = conn.execute("SELECT offset FROM sources WHERE path = ?", (key,)).fetchone()
+            offset = row["offset"] if row else 0
+            if log_path.stat().st_size <= offset:
+                continue
+            rows, offset = _read_generations(log_path, offset)
+            added += self.add(rows)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sources (path, offset) VALUES (?, ?)",
+                    (key, offset),
+                )
+        return added
+
+    # ── Queries ────────────────────────────────────────────────────────
+
+    def lookup(self, digest: str) -> list[dict[str, Any]]:
+        """Every indexed sample whose code has this hash, oldest run first."""
+        rows = self._connect().execute(
+            "SELECT * FROM samples WHERE code_hash = ? ORDER BY run_id, model, trial",
+            (digest,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def shared(self, by: str = "model", min_groups: int = 2,
+               limit: int | None = None) -> list[dict[str, Any]]:
+        """
+        Hashes produced in at least `min_groups` distinct values of `by`
+        (one of SHARED_BY), most widely shared first.
+        """
+        if by not in SHARED_BY:
+            raise ValueError(f"by must be one of {SHARED_BY}, got {by!r}")
+        rows = self._connect().execute(
+            f"SELECT code_hash, COUNT(DISTINCT {by}) AS groups, COUNT(*) AS samples, "
+            f"GROUP_CONCAT(DISTINCT {by}) AS members FROM samples "
+            f"GROUP BY code_hash HAVING groups >= ? ORDER BY groups DESC, samples DESC"
+            + (" LIMIT ?" if limit else ""),
+            (min_groups, limit) if limit else (min_groups,),
+        ).fetchall()
+        return [{**dict(r), "members": sorted(r["members"].split(","))} for r in rows]
+
+    def stats(self) -> dict[str, int]:
+        row = self._connect().execute(
+            "SELECT COUNT(*) AS samples, COUNT(DISTINCT code_hash) AS hashes, "
+            "COUNT(DISTINCT run_id) AS runs FROM samples"
+        ).fetchone()
+        return dict(row)
+
+
+def _read_generations(log_path: Path, offset: int) -> tuple[list[dict[str, Any]], int]:
+    """Index rows from a log's complete lines after `offset`; returns (rows, new offset)."""
+    rows = []
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break                              # line still being written
+            offset += len(line)
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            data = entry.get("data") or {}
+            if entry.get("level") != "GENERATION" or not _HASH_RE.match(
+                    str(data.get("code_hash", ""))):
+                continue
+            rows.append({
+                "code_hash": data["code_hash"],
+                "model": data["model"],
+                "problem_id": data["problem_id"],
+                "trial": data["trial"],
+                "strategy": data.get("prompt_strategy", ""),
+                "run_id": entry.get("run_id", ""),
+                "code_path": data.get("code_path"),
+                "timestamp": entry.get("timestamp"),
+            })
+    return rows, offset
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cross-run index of generated code by content hash",
+    )
+    parser.add_argument("--index", type=str, default=str(CODE_INDEX_PATH),
+                        help=f"Index file (default: {CODE_INDEX_PATH})")
+    parser.add_argument("--logs-dir", type=str, default=str(LOGS_DIR))
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("update", help="Index new generation events from the logs")
+    look = sub.add_parser("lookup", help="Samples with the same code as a hash or file")
+    look.add_argument("target", help="A code hash, or a path to a code file")
+    share = sub.add_parser("shared", help="Code produced under several models/runs/...")
+    share.add_argument("--by", choices=SHARED_BY, default="model")
+    share.add_argument("--min", type=int, default=2, help="Distinct groups (default: 2)")
+    share.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with CodeIndex(args.index) as index:
+        added = index.update(args.logs_dir)
+        if args.command == "update":
+            s = index.stats()
+            print(f"Indexed {added} new samples "
+                  f"({s['samples']} samples, {s['hashes']} distinct, {s['runs']} runs)")
+        elif args.command == "lookup":
+            target = Path(args.target)
+            digest = (code_hash(target.read_text(encoding="utf-8"))
+                      if target.is_file() else args.target)
+            rows = index.lookup(digest)
+            print(f"{digest}: {len(rows)} samples")
+            for r in rows:
+                print(f"  {r['run_id']:<24} {r['model']:<22} {r['problem_id']} "
+                      f"t{r['trial']} {r['strategy']}")
+        else:
+            for r in index.shared(args.by, args.min, args.limit):
+                print(f"{r['code_hash']}  {r['groups']:>3} {args.by}s  "
+                      f"{r['samples']:>4} samples  {', '.join(r['members'])[:90]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,20 @@
 ManiBench Evaluation — Configuration
 ======================================
 Central configuration for models, paths, API settings, and evaluation parameters.
-Loads secrets from .env file; everything else is hardcoded for reproducibility.
+Secrets come from the environment (optionally filled from .env by `load_env()`);
+everything else is hardcoded for reproducibility.
+
+Importing this module has no side effects: it reads no environment variables
+and writes nothing to disk, so `evaluation.metrics` stays safe to import from
+process pools and external harnesses. Entry points call `load_env()` and
+`ensure_dirs()` explicitly; the API clients also call `load_env()` when
+built without an explicit key.
 """
 
-import os
 from pathlib import Path
 from dataclasses import dataclass, field
 from typing import Optional
 
-# Load .env file if present (before reading os.getenv)
-try:
-    from dotenv import load_dotenv
-    load_dotenv(Path(__file__).resolve().parent.parent / ".env")
-except ImportError:
-    pass  # python-dotenv not installed; user must export vars manually
-
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -26,16 +25,41 @@ RAW_CODE_DIR = ROOT_DIR / "raw_code"
 RESULTS_DIR = ROOT_DIR / "evaluation" / "results"
 LOGS_DIR = ROOT_DIR / "evaluation" / "logs"
 GENERATED_CODE_DIR = ROOT_DIR / "evaluation" / "generated_code"
+CACHE_DIR = ROOT_DIR / "evaluation" / "cache"
+RENDER_CACHE_DIR = CACHE_DIR / "render"
+API_INDEX_DIR = CACHE_DIR / "api_index"
+CODE_INDEX_PATH = CACHE_DIR / "code_index.db"
+REFERENCE_INDEX_PATH = CACHE_DIR / "reference_index.npz"
+MEDIA_DIR = ROOT_DIR / "evaluation" / "media"
+QUEUE_DB_PATH = ROOT_DIR / "evaluation" / "queue.db"
+DOTENV_PATH = ROOT_DIR / ".env"
+
+
+def ensure_dirs():
+    """Create the output directories a run writes to (called by the runner)."""
+    for d in (RESULTS_DIR, LOGS_DIR, GENERATED_CODE_DIR):
+        d.mkdir(parents=True, exist_ok=True)
 
-# Ensure output dirs exist
-for _d in (RESULTS_DIR, LOGS_DIR, GENERATED_CODE_DIR):
-    _d.mkdir(parents=True, exist_ok=True)
+
+def load_env(path: Path | str = DOTENV_PATH) -> bool:
+    """
+    Load secrets from a .env file into os.environ (called by the runner).
+
+    Variables already set in the environment win. Returns False if the file
+    is missing or python-dotenv is not installed (vars must then be exported).
+    """
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return False
+    return load_dotenv(path)
 
 
 # ---------------------------------------------------------------------------
 # OpenRouter API
 # ---------------------------------------------------------------------------
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
+# OPENROUTER_API_KEY / OPENROUTER_BASE_URL are read from the environment
+# when a client is constructed; this is the default base URL.
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 OPENROUTER_HEADERS = {
     "HTTP-Referer": "https://huggingface.co/datasets/nabin2004/ManiBench",
@@ -45,8 +69,9 @@ OPENROUTER_HEADERS = {
 # ---------------------------------------------------------------------------
 # Inference.net API
 # ---------------------------------------------------------------------------
-INFERENCE_API_KEY = os.getenv("INFERENCE_API_KEY", "")
-INFERENCE_BASE_URL = os.getenv("INFERENCE_BASE_URL", "https://api.inference.net/v1")
+# INFERENCE_API_KEY / INFERENCE_BASE_URL are read from the environment
+# when a client is constructed; this is the default base URL.
+INFERENCE_BASE_URL = "https://api.inference.net/v1"
 
 # ---------------------------------------------------------------------------
 # Supported providers
@@ -59,6 +84,10 @@ MAX_RETRIES = 3
 RETRY_DELAY = 5                # seconds between retries
 MAX_TOKENS = 8192              # max generation length
 
+# Batch API (inference provider, `--batch`)
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_TERMINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
 
 # ---------------------------------------------------------------------------
 # Models (OpenRouter model IDs)
@@ -129,22 +158,134 @@ DEFAULT_MODELS: list[ModelSpec] = [
 ]
 
 
+# ---------------------------------------------------------------------------
+# Rendering (metrics/executability.py)
+# ---------------------------------------------------------------------------
+RENDER_OUTPUT_TAIL_BYTES = 64 * 1024        # ring buffer kept per stream (stdout/stderr)
+RENDER_MAX_OUTPUT_BYTES = 16 * 1024 * 1024  # combined output cap; render is killed beyond it
+RENDER_OUTPUT_KEEP_CHARS = 2000             # tail stored in results per stream
+
+# Adaptive per-problem render timeouts (render_timeouts.py, `--adaptive-timeout`)
+ADAPTIVE_TIMEOUT_PERCENTILE = 95            # of a problem's past render times
+ADAPTIVE_TIMEOUT_MARGIN = 1.5               # headroom multiplied onto that percentile
+ADAPTIVE_TIMEOUT_FLOOR_S = 15               # smallest learned timeout
+ADAPTIVE_TIMEOUT_CAP_S = 300                # largest timeout (matches RenderLimits.cpu_seconds)
+ADAPTIVE_TIMEOUT_MIN_RENDERS = 5            # fewer successful past renders → keep --timeout
+ADAPTIVE_TIMEOUT_HISTORY_FILES = 50         # newest results files read
+
+# Frame-based alignment (metrics/frame_alignment.py)
+FRAME_SAMPLE_COUNT = 16                     # frames decoded per video
+FRAME_SAMPLE_SIZE = (128, 72)               # (width, height) frames are scaled to
+
+# Reference similarity (metrics/reference_similarity.py)
+REFERENCE_AST_NGRAM = 3                     # AST node-type n-gram length
+REFERENCE_TOP_SCENES = 3                    # best-matching reference scenes kept per sample
+
+
+@dataclass
+class RenderLimits:
+    """
+    POSIX resource limits applied to each render and inherited by every
+    process it spawns (e.g. ffmpeg). None disables a limit.
+    """
+    cpu_seconds: Optional[int] = 300          # RLIMIT_CPU, per process
+    address_space_mb: Optional[int] = 8192    # RLIMIT_AS (virtual memory)
+    file_size_mb: Optional[int] = 1024        # RLIMIT_FSIZE, largest file written
+    max_processes: Optional[int] = 512        # RLIMIT_NPROC (per user; ignored for root)
+
+    def as_dict(self) -> dict:
+        return {
+            "cpu_seconds": self.cpu_seconds,
+            "address_space_mb": self.address_space_mb,
+            "file_size_mb": self.file_size_mb,
+            "max_processes": self.max_processes,
+        }
+
+
+@dataclass
+class RenderCap:
+    """
+    Bounds for a capped render (`render_mode` "capped" / "tiered"). Once a
+    scene has made `max_plays` play calls or reached `max_scene_s` seconds
+    of scene time, its remaining animations run in Manim's skip mode:
+    construct() still executes every call, but no frames are drawn or
+    encoded. None disables a bound.
+    """
+    max_plays: Optional[int] = 10
+    max_scene_s: Optional[float] = 20.0
+
+    def as_dict(self) -> dict:
+        return {"max_plays": self.max_plays, "max_scene_s": self.max_scene_s}
+
+    def label(self) -> str:
+        """Short form used in render-cache keys."""
+        return f"cap-p{self.max_plays}-s{self.max_scene_s}"
+
+
 # ---------------------------------------------------------------------------
 # Evaluation parameters
 # ---------------------------------------------------------------------------
+# Adaptive trials and pass@k (adaptive_trials.py, `--adaptive-trials`)
+ADAPTIVE_TARGET_SD = 0.1                    # cell settles once its pass-rate SD is below this
+PASS_AT_K = (1, 3)                          # k values reported in the summary
+PASS_AT_K_BOOTSTRAP = 1000                  # bootstrap resamples per interval
+
+# Near-duplicate detection (near_duplicates.py)
+NEAR_DUP_SHINGLE = 5                        # tokens per shingle
+NEAR_DUP_NUM_PERM = 128                     # MinHash permutations (signature length)
+NEAR_DUP_THRESHOLD = 0.7                    # estimated Jaccard for a near-duplicate pair
+NEAR_DUP_MAX_BUCKET = 64                    # larger LSH buckets are checked against one member
+
+# Distributed rendering (broker.py / worker.py)
+BROKER_PORT = 8642                          # default port of `python -m evaluation.broker`
+BROKER_LEASE_S = 120                        # a render unheard-from this long is re-queued
+BROKER_HEARTBEAT_S = 30                     # worker heartbeat interval while rendering
+BROKER_POLL_S = 2.0                         # worker back-off when no render is ready
+
+
 @dataclass
 class EvalConfig:
     """Runtime configuration for an evaluation run."""
     trials: int = 3                          # runs per (model, problem) pair
+    adaptive_trials: bool = False            # allocate trials by pass-rate uncertainty
+    trial_budget: int = 0                    # adaptive: total API calls (0 = trials × cells)
+    min_trials: int = 2                      # adaptive: trials every cell gets first
+    max_trials: int = 10                     # adaptive: most trials for one cell
     problems: Optional[list[str]] = None     # None = all 12
     models: Optional[list[str]] = None       # None = DEFAULT_MODELS
     prompt_strategy: str = "zero_shot"       # zero_shot | few_shot | cot | constraint
+    strategies: Optional[list[str]] = None   # sweep several strategies in one run
     manim_timeout: int = 60                  # seconds for rendering
+    adaptive_timeout: bool = False           # per-problem timeouts learned from past results
+    timeout_cap: int = ADAPTIVE_TIMEOUT_CAP_S  # largest adaptive timeout
+    timeout_profile: Optional[dict[str, dict]] = None  # learned per-problem stats (render_timeouts.py)
     skip_render: bool = False                # skip Manim execution (metrics 1-2 only via static)
-    save_video: bool = False                 # keep rendered .mp4 files
+    save_video: bool = False                 # keep rendered .mp4 files in MEDIA_DIR
+    frame_alignment: bool = False            # score sampled frames of kept videos
+    reference_similarity: bool = False       # TF-IDF similarity to the problem's raw_code scenes
     seed: int = 42                           # for reproducibility
     parallel_models: bool = False            # run models in parallel (careful with rate limits)
+    workers: int = 1                         # concurrent generations (API requests)
+    render_workers: int = 0                  # concurrent renders when workers > 1 (0 = CPU count)
+    render_limits: RenderLimits = field(default_factory=RenderLimits)  # per-render rlimits
+    render_mode: str = "full"                # full | capped | tiered (see metrics/render_tiers.py)
+    render_cap: RenderCap = field(default_factory=RenderCap)  # bounds for capped renders
+    audit_fraction: float = 0.1              # tiered: share of distinct code also rendered in full
+    render_cache: bool = True                # reuse stored results for unchanged code
+    dedup_samples: bool = True               # render AST-identical trials once per run
+    api_check: str = "off"                   # off | flag | skip (predicted failures; see api_index.py)
     provider: str = "openrouter"             # openrouter | inference
+    batch: bool = False                      # generate through the provider's batch API
+    batch_poll_s: float = 30.0               # seconds between batch status polls
+
+    def strategy_list(self) -> list[str]:
+        """Strategies this run covers: `strategies`, else [prompt_strategy]."""
+        return list(self.strategies) if self.strategies else [self.prompt_strategy]
+
+    def timeout_for(self, problem_id: str) -> int:
+        """Render timeout for `problem_id`: learned if profiled, else manim_timeout."""
+        stats = (self.timeout_profile or {}).get(problem_id)
+        return stats["timeout_s"] if stats else self.manim_timeout
 
 
 # ---------------------------------------------------------------------------
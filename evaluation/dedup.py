@@ -0,0 +1,112 @@
+"""
+ManiBench Evaluation — Sample Deduplication
+=============================================
+Deterministic models (temperature 0) often return the same program for
+every trial. Within a run, samples are grouped by `ast_fingerprint` —
+identical up to comments and formatting — and the expensive
+executability check (the Manim render) runs once per group; every other
+trial in the group reuses its result. Callers fold the render settings
+(timeout, cap, audit) into the key, so a verdict is only shared between
+samples that would have been rendered the same way.
+
+The static metrics (version conflicts, alignment, coverage) are still
+computed per sample: they read the raw source, comments included, and
+cost milliseconds.
+"""
+
+import copy
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+class SampleDeduper:
+    """
+    Run-scoped memo of executability results keyed by code fingerprint
+    (plus the render settings the caller folds into the key).
+
+    Safe under concurrent workers: while the first sample with a key
+    is rendering, later ones block on its result instead of
+    starting a second render.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: dict[str, Future] = {}
+
+    def executability(
+        self,
+        key: str,
+        compute: Callable[[], dict[str, Any]],
+    ) -> tuple[dict[str, Any], bool]:
+        """
+        Return (result, reused) — `compute()` runs only for the first
+        sample with this key.
+        """
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._results[key] = future
+
+        if owner:
+            try:
+                result = compute()
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            future.set_result(copy.deepcopy(result))    # the caller goes on to edit `result`
+            return result, False
+        return copy.deepcopy(future.result()), True
+
+
+def duplication_report(results: list[dict]) -> dict[str, Any]:
+    """
+    Per-(model, strategy, problem) duplication diagnostics from evaluated
+    records; `grid` is nested model → strategy → problem.
+
+    A cell's `dup_rate` is the fraction of its trials whose code repeats
+    an earlier trial's fingerprint: 0.0 = all distinct, (n-1)/n = all equal.
+    """
+    cells: dict[tuple[str, str, str], list[str]] = defaultdict(list)
+    for r in results:
+        fp = r.get("code_fingerprint")
+        if fp:
+            cells[(r["model"], r.get("strategy", ""), r["problem_id"])].append(fp)
+
+    grid: dict[str, dict[str, dict[str, dict]]] = defaultdict(lambda: defaultdict(dict))
+    n_total = n_unique_total = 0
+    for (model, strategy, pid), fps in cells.items():
+        n, n_unique = len(fps), len(set(fps))
+        n_total += n
+        n_unique_total += n_unique
+        grid[model][strategy][pid] = {
+            "n": n,
+            "unique": n_unique,
+            "dup_rate": round(1 - n_unique / n, 4),
+        }
+
+    per_model = {}
+    for model, by_strategy in grid.items():
+        row = [c for strategy_row in by_strategy.values() for c in strategy_row.values()]
+        n = sum(c["n"] for c in row)
+        n_unique = sum(c["unique"] for c in row)
+        per_model[model] = {
+            "n": n,
+            "unique": n_unique,
+            "dup_rate": round(1 - n_unique / max(n, 1), 4),
+        }
+
+    return {
+        "n": n_total,
+        "unique": n_unique_total,
+        "dup_rate": round(1 - n_unique_total / max(n_total, 1), 4),
+        "renders_saved": sum(
+            1 for r in results if r.get("metrics_detail", {})
+            .get("executability", {}).get("render_reused")
+        ),
+        "per_model": per_model,
+        "grid": {model: dict(by_strategy) for model, by_strategy in grid.items()},
+    }
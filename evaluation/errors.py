@@ -0,0 +1,21 @@
+"""
+ManiBench Evaluation — Client Errors
+======================================
+Exception types shared by the API clients. Kept free of HTTP-library
+imports so the runner can catch them without loading `requests`/`httpx`.
+"""
+
+
+class APIClientError(Exception):
+    """Base class for unrecoverable API errors from any provider."""
+    pass
+
+
+class OpenRouterError(APIClientError):
+    """Raised on unrecoverable API errors."""
+    pass
+
+
+class InferenceNetError(APIClientError):
+    """Raised on unrecoverable Inference.net API errors."""
+    pass
@@ -11,28 +11,28 @@ Uses httpx for reliable timeout enforcement (requests/urllib3 can hang
 on SSL reads when the server accepts but doesn't respond).
 """
 
+import json
+import os
 import time
-import re
 from typing import Any
 import httpx
 
+from evaluation.code_extract import extract_code
 from evaluation.config import (
-    INFERENCE_API_KEY,
+    BATCH_COMPLETION_WINDOW,
+    BATCH_TERMINAL_STATES,
     INFERENCE_BASE_URL,
     MAX_RETRIES,
     RETRY_DELAY,
     ModelSpec,
+    load_env,
 )
+from evaluation.errors import InferenceNetError
 
 # Hard timeout: (connect, read, write, pool) — all in seconds
 HTTPX_TIMEOUT = httpx.Timeout(10.0, read=120.0, write=30.0, pool=10.0)
 
 
-class InferenceNetError(Exception):
-    """Raised on unrecoverable Inference.net API errors."""
-    pass
-
-
 class InferenceNetClient:
     """
     Stateless client for Inference.net chat completions.
@@ -42,15 +42,23 @@ class InferenceNetClient:
         result = client.generate(model_spec, messages)
     """
 
-    def __init__(self, api_key: str | None = None):
-        self.api_key = api_key or INFERENCE_API_KEY
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        retry_delay: float = RETRY_DELAY,
+    ):
+        if api_key is None:
+            load_env()                     # .env fills in what the environment lacks
+        self.api_key = api_key or os.getenv("INFERENCE_API_KEY", "")
         if not self.api_key:
             raise InferenceNetError(
                 "INFERENCE_API_KEY not set. "
                 "Export it or add it to your .env file. "
                 "Get a key at https://inference.net"
             )
-        self.base_url = INFERENCE_BASE_URL
+        self.base_url = base_url or os.getenv("INFERENCE_BASE_URL", INFERENCE_BASE_URL)
+        self.retry_delay = retry_delay
 
     def generate(
         self,
@@ -66,6 +74,7 @@ class InferenceNetClient:
             {
                 "content": str,          # Generated text
                 "code": str,             # Extracted Python code block
+                "extraction": dict,      # How the code was found (code_extract.py)
                 "prompt_tokens": int,
                 "completion_tokens": int,
                 "total_tokens": int,
@@ -102,7 +111,8 @@ class InferenceNetClient:
                 latency_ms = (time.monotonic() - t0) * 1000
 
                 if resp.status_code == 429:
-                    wait = RETRY_DELAY * attempt
+                    last_error = InferenceNetError("HTTP 429: rate limited")
+                    wait = self.retry_delay * attempt
                     time.sleep(wait)
                     continue
 
@@ -112,84 +122,187 @@ class InferenceNetClient:
                         f"HTTP {resp.status_code}: {error_body}"
                     )
 
-                data = resp.json()
-
-                # Parse response (OpenAI-compatible schema)
-                choices = data.get("choices", [])
-                if not choices:
-                    raise InferenceNetError(
-                        f"No choices in API response: {str(data)[:300]}"
-                    )
-
-                choice = choices[0]
-                message = choice.get("message", {})
-                if isinstance(message, str):
-                    content = message
-                else:
-                    content = message.get("content", "")
-                usage = data.get("usage", {})
-
-                return {
-                    "content": content,
-                    "code": self._extract_code(content),
-                    "prompt_tokens": usage.get("prompt_tokens", 0),
-                    "completion_tokens": usage.get("completion_tokens", 0),
-                    "total_tokens": usage.get("total_tokens", 0),
-                    "latency_ms": latency_ms,
-                    "model_id": data.get("model", model.id),
-                    "finish_reason": choice.get("finish_reason", "unknown"),
-                }
+                return self._parse_completion(resp.json(), model, latency_ms)
 
             except httpx.TimeoutException as e:
                 last_error = e
                 if attempt < MAX_RETRIES:
-                    time.sleep(RETRY_DELAY * attempt)
+                    time.sleep(self.retry_delay * attempt)
                 continue
             except httpx.ConnectError as e:
                 last_error = e
                 if attempt < MAX_RETRIES:
-                    time.sleep(RETRY_DELAY * attempt)
+                    time.sleep(self.retry_delay * attempt)
                 continue
 
         raise InferenceNetError(
             f"Failed after {MAX_RETRIES} attempts: {last_error}"
         )
 
-    @staticmethod
-    def _extract_code(content: str) -> str:
+    def _parse_completion(
+        self, data: dict, model: ModelSpec, latency_ms: float,
+    ) -> dict[str, Any]:
+        """Turn an OpenAI-compatible chat completion body into a result dict."""
+        choices = data.get("choices", [])
+        if not choices:
+            raise InferenceNetError(
+                f"No choices in API response: {str(data)[:300]}"
+            )
+
+        choice = choices[0]
+        message = choice.get("message", {})
+        if isinstance(message, str):
+            content = message
+        else:
+            content = message.get("content", "")
+        usage = data.get("usage", {})
+
+        extraction = extract_code(content, choice.get("finish_reason"))
+        return {
+            "content": content,
+            "code": extraction.code,
+            "extraction": extraction.metadata(),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+            "latency_ms": latency_ms,
+            "model_id": data.get("model", model.id),
+            "finish_reason": choice.get("finish_reason", "unknown"),
+        }
+
+    # ── Batch API ──────────────────────────────────────────────────────
+    #
+    # OpenAI-compatible asynchronous batches: upload a JSONL file of
+    # /chat/completions requests, create a batch over it, poll until it
+    # reaches a terminal state, then download the output file. Cheaper and
+    # not rate limited per request, at the cost of latency.
+
+    def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """One authenticated request with the usual retry on 429/5xx/timeouts."""
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        last_error: Exception | None = None
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                with httpx.Client(timeout=HTTPX_TIMEOUT) as client:
+                    resp = client.request(
+                        method, f"{self.base_url}{path}", headers=headers, **kwargs,
+                    )
+            except (httpx.TimeoutException, httpx.ConnectError) as e:
+                last_error = e
+            else:
+                if resp.status_code == 200:
+                    return resp
+                if resp.status_code != 429 and resp.status_code < 500:
+                    raise InferenceNetError(
+                        f"HTTP {resp.status_code}: {resp.text[:500]}"
+                    )
+                last_error = InferenceNetError(f"HTTP {resp.status_code}")
+            if attempt < MAX_RETRIES:
+                time.sleep(self.retry_delay * attempt)
+        raise InferenceNetError(f"{method} {path} failed after {MAX_RETRIES} attempts: {last_error}")
+
+    def submit_batch(
+        self,
+        model: ModelSpec,
+        requests: list[tuple[str, list[dict[str, str]]]],
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+    ) -> str:
+        """
+        Upload `requests` — (custom_id, messages) pairs — as one batch.
+
+        Returns the batch id.
+        """
+        lines = []
+        for custom_id, messages in requests:
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model.id,
+                    "messages": messages,
+                    "temperature": temperature if temperature is not None else model.temperature,
+                    "max_tokens": max_tokens or model.max_tokens,
+                    "top_p": model.top_p,
+                },
+            }))
+        jsonl = ("\n".join(lines) + "\n").encode("utf-8")
+
+        upload = self._request(
+            "POST", "/files",
+            data={"purpose": "batch"},
+            files={"file": ("manibench_batch.jsonl", jsonl, "application/jsonl")},
+        ).json()
+        batch = self._request(
+            "POST", "/batches",
+            json={
+                "input_file_id": upload["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": BATCH_COMPLETION_WINDOW,
+            },
+        ).json()
+        return batch["id"]
+
+    def get_batch(self, batch_id: str) -> dict[str, Any]:
+        """Current batch object (status, request_counts, output_file_id, ...)."""
+        return self._request("GET", f"/batches/{batch_id}").json()
+
+    def wait_for_batch(
+        self,
+        batch_id: str,
+        poll_interval: float = 30.0,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """Poll until the batch reaches a terminal state; returns the batch object."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            batch = self.get_batch(batch_id)
+            if batch.get("status") in BATCH_TERMINAL_STATES:
+                return batch
+            if deadline is not None and time.monotonic() >= deadline:
+                raise InferenceNetError(
+                    f"Batch {batch_id} still {batch.get('status')} after {timeout:.0f}s"
+                )
+            time.sleep(poll_interval)
+
+    def batch_results(
+        self, batch: dict[str, Any], model: ModelSpec,
+    ) -> dict[str, dict[str, Any]]:
         """
-        Extract Python code from LLM response.
+        Download a finished batch's output.
 
-        Handles:
-          - ```python ... ``` blocks
-          - ``` ... ``` blocks
-          - Raw code (if no code fence found)
+        Returns {custom_id: result}, where result has the same shape as
+        `generate()` output, or {"error": str} for a request that failed.
+        Requests missing from the output (e.g. an expired batch) are absent.
         """
-        # Try python block first
-        pattern = r"```python\s*\n(.*?)```"
-        matches = re.findall(pattern, content, re.DOTALL)
-        if matches:
-            return max(matches, key=len).strip()
-
-        # Try generic block
-        pattern = r"```\s*\n(.*?)```"
-        matches = re.findall(pattern, content, re.DOTALL)
-        if matches:
-            return max(matches, key=len).strip()
-
-        # Fallback: look for 'from manim import' as code start
-        lines = content.split("\n")
-        code_start = None
-        for i, line in enumerate(lines):
-            if "from manim import" in line or "import manim" in line:
-                code_start = i
-                break
-
-        if code_start is not None:
-            return "\n".join(lines[code_start:]).strip()
-
-        # Last resort: return full content
-        return content.strip()
+        results: dict[str, dict[str, Any]] = {}
+        for file_key in ("output_file_id", "error_file_id"):
+            file_id = batch.get(file_key)
+            if not file_id:
+                continue
+            text = self._request("GET", f"/files/{file_id}/content").text
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                custom_id = entry.get("custom_id")
+                response = entry.get("response") or {}
+                if entry.get("error") or response.get("status_code", 200) != 200:
+                    err = entry.get("error") or response.get("body", {}).get("error")
+                    if isinstance(err, dict):
+                        err = err.get("message", err)
+                    results[custom_id] = {
+                        "error": f"batch request failed: {str(err)[:300]}",
+                    }
+                    continue
+                try:
+                    results[custom_id] = self._parse_completion(
+                        response.get("body", {}), model, latency_ms=0.0,
+                    )
+                except InferenceNetError as e:
+                    results[custom_id] = {"error": str(e)}
+        return results
 
     def list_models(self) -> list[dict]:
         """Fetch available models from Inference.net."""
@@ -0,0 +1,769 @@
+"""
+ManiBench Evaluation — Persistent Job Queue
+=============================================
+SQLite-backed queue of (model, problem, trial, strategy) work items for
+long sweeps. Each item moves through
+
+    pending → generating → generated → rendering → scored
+                  └──────────┬─────────────┘
+                           failed
+
+Any number of worker processes can drain one queue file at once: a claim
+is a single `BEGIN IMMEDIATE` transaction, so no two workers take the same
+item. Progress is committed at every step, so a killed sweep resumes where
+it stopped and generated code is never requested twice:
+
+  - recover()  puts items held by dead workers back (generating → pending,
+               rendering → generated); every worker runs it on start-up
+  - retry()    resets failed items selectively (by stage, model, problem,
+               strategy, or error text); items that failed while rendering
+               return to `generated`, so only the render is repeated
+
+Render settings (timeout, limits, cache, video) are stored with the queue
+at enqueue time, so every worker scores with the same configuration; a
+later enqueue with different settings is refused unless `--force`. With
+`--adaptive-timeout` the per-problem timeouts are learned once, at enqueue
+time, and stored the same way.
+
+To render on other machines, serve the queue with broker.py and run
+worker.py there; generation stays in the broker process.
+
+Usage:
+    python -m evaluation.job_queue enqueue --strategy zero_shot cot --trials 3
+    python -m evaluation.job_queue work --processes 4
+    python -m evaluation.job_queue status
+    python -m evaluation.job_queue retry --stage rendering --model GPT-4o
+    python -m evaluation.job_queue export
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import time
+import traceback
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any
+
+from evaluation.config import (
+    ADAPTIVE_TIMEOUT_CAP_S,
+    DATASET_PATH,
+    QUEUE_DB_PATH,
+    RESULTS_DIR,
+    SUPPORTED_PROVIDERS,
+    EvalConfig,
+    RenderCap,
+    RenderLimits,
+    ensure_dirs,
+    get_models_for_provider,
+    load_env,
+)
+from evaluation.errors import APIClientError
+
+STATES = ("pending", "generating", "generated", "rendering", "scored", "failed")
+
+# In-progress state → state it returns to when its worker is gone
+_RELEASE_TO = {"generating": "pending", "rendering": "generated"}
+
+# Settings that may differ between enqueue calls on one queue
+_PER_ENQUEUE_SETTINGS = ("trials", "timeout_profile")
+
+# Record fields written by scoring; dropped before an item is re-scored
+_SCORE_KEYS = ("error", "metrics", "metrics_detail", "code_fingerprint")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id           INTEGER PRIMARY KEY,
+    model        TEXT NOT NULL,
+    problem_id   TEXT NOT NULL,
+    trial        INTEGER NOT NULL,
+    strategy     TEXT NOT NULL,
+    state        TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    worker       TEXT,
+    failed_stage TEXT,
+    error        TEXT,
+    code_path    TEXT,
+    record       TEXT,
+    updated_at   REAL NOT NULL,
+    UNIQUE (model, problem_id, trial, strategy)
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (state, id);
+CREATE TABLE IF NOT EXISTS settings (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def worker_id() -> str:
+    """Identifier for this process: "<hostname>:<pid>"."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _worker_is_dead(worker: str | None) -> bool:
+    """True if `worker` ran on this host and its process no longer exists."""
+    if not worker:
+        return True
+    host, _, pid = worker.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False               # another machine; only stale_after can tell
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def _utc_stamp() -> str:
+    return time.strftime("%Y%m%d_%H%M%S", time.gmtime())
+
+
+def config_to_settings(config: EvalConfig) -> dict[str, Any]:
+    return asdict(config)
+
+
+def config_from_settings(settings: dict[str, Any]) -> EvalConfig:
+    """Rebuild an EvalConfig from stored settings, ignoring unknown keys."""
+    known = {f.name for f in fields(EvalConfig)}
+    values = {k: v for k, v in settings.items() if k in known}
+    values["render_limits"] = RenderLimits(**settings.get("render_limits", {}))
+    values["render_cap"] = RenderCap(**settings.get("render_cap", {}))
+    return EvalConfig(**values)
+
+
+@dataclass
+class WorkItem:
+    """One claimed (model, problem, trial, strategy) cell."""
+    id: int
+    model: str
+    problem_id: str
+    trial: int
+    strategy: str
+    state: str                      # generating | rendering once claimed
+    attempts: int
+    code_path: str | None = None
+    record: dict | None = None      # record so far (set once generated)
+
+
+class JobQueue:
+    """
+    Work items in one SQLite file. One instance per process (or thread):
+    the connection is opened lazily and is not shared.
+    """
+
+    def __init__(self, db_path: Path | str = QUEUE_DB_PATH, busy_timeout: float = 30.0):
+        self.db_path = Path(db_path)
+        self.busy_timeout = busy_timeout
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path, timeout=self.busy_timeout, isolation_level=None,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ── Settings ───────────────────────────────────────────────────────
+
+    def set_settings(self, settings: dict[str, Any], force: bool = False) -> list[str]:
+        """
+        Store the queue's settings. Settings already stored are kept; if
+        they differ from `settings` (apart from _PER_ENQUEUE_SETTINGS), nothing
+        is written and the differing keys are returned, unless `force`.
+        """
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM settings WHERE key = 'config'").fetchone()
+            if row is not None and not force:
+                stored = json.loads(row["value"])
+                return sorted(
+                    k for k in set(stored) | set(settings)
+                    if k not in _PER_ENQUEUE_SETTINGS
+                    and stored.get(k) != json.loads(json.dumps(settings.get(k)))
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('config', ?)",
+                (json.dumps(settings),),
+            )
+            return []
+
+    def settings(self) -> dict[str, Any]:
+        row = self._connect().execute(
+            "SELECT value FROM settings WHERE key = 'config'"
+        ).fetchone()
+        return json.loads(row["value"]) if row else {}
+
+    # ── Producing ──────────────────────────────────────────────────────
+
+    def enqueue(
+        self,
+        models: list[str],
+        problem_ids: list[str],
+        trials: int,
+        strategies: list[str],
+    ) -> int:
+        """Add every cell not already queued; returns how many were added."""
+        now = time.time()
+        cells = [
+            (model, pid, trial, strategy, now)
+            for strategy in strategies
+            for model in models
+            for pid in problem_ids
+            for trial in range(1, trials + 1)
+        ]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO items "
+                "(model, problem_id, trial, strategy, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                cells,
+            )
+            return conn.total_changes - before
+
+    # ── Consuming ──────────────────────────────────────────────────────
+
+    def claim(
+        self,
+        worker: str,
+        states: tuple[str, ...] = ("generated", "pending"),
+    ) -> WorkItem | None:
+        """
+        Take the next item in one of `states`: generated items first (their
+        code is already paid for), then pending ones. Returns None when
+        nothing is left.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                f"SELECT * FROM items WHERE state IN ({','.join('?' * len(states))}) "
+                "ORDER BY state = 'pending', id LIMIT 1",
+                states,
+            ).fetchone()
+            if row is None:
+                return None
+            state = "rendering" if row["state"] == "generated" else "generating"
+            conn.execute(
+                "UPDATE items SET state = ?, worker = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                (state, worker, time.time(), row["id"]),
+            )
+        return WorkItem(
+            id=row["id"],
+            model=row["model"],
+            problem_id=row["problem_id"],
+            trial=row["trial"],
+            strategy=row["strategy"],
+            state=state,
+            attempts=row["attempts"] + 1,
+            code_path=row["code_path"],
+            record=json.loads(row["record"]) if row["record"] else None,
+        )
+
+    def _set(self, item_id: int, expect: str, owner: str | None = None, **columns) -> bool:
+        """Update an item if it is still in state `expect` (and held by `owner`)."""
+        columns["updated_at"] = time.time()
+        assignments = ", ".join(f"{col} = ?" for col in columns)
+        where = "id = ? AND state = ?"
+        params: list[Any] = [item_id, expect]
+        if owner is not None:
+            where += " AND worker = ?"
+            params.append(owner)
+        with self._transaction() as conn:
+            cur = conn.execute(
+                f"UPDATE items SET {assignments} WHERE {where}",
+                (*columns.values(), *params),
+            )
+            return cur.rowcount == 1
+
+    def mark_generated(self, item_id: int, record: dict) -> bool:
+        return self._set(
+            item_id, "generating",
+            state="generated", code_path=record.get("code_path"),
+            record=json.dumps(record, default=str), error=None, failed_stage=None,
+        )
+
+    def start_render(self, item_id: int, worker: str) -> bool:
+        """Move a just-generated item straight on to rendering."""
+        return self._set(item_id, "generated", state="rendering", worker=worker)
+
+    def heartbeat(self, item_id: int, stage: str, worker: str) -> bool:
+        """Renew `worker`'s hold on an in-progress item (see recover's stale_after)."""
+        return self._set(item_id, stage, owner=worker)
+
+    def mark_scored(self, item_id: int, stage: str, record: dict,
+                    owner: str | None = None) -> bool:
+        return self._set(
+            item_id, stage, owner,
+            state="scored", record=json.dumps(record, default=str),
+            error=record.get("error"), failed_stage=None,
+        )
+
+    def mark_failed(self, item_id: int, stage: str, error: str,
+                    record: dict | None = None, drop_code: bool = False,
+                    owner: str | None = None) -> bool:
+        """Fail an in-progress item; `drop_code` makes a retry regenerate it."""
+        columns = {"state": "failed", "failed_stage": stage, "error": error}
+        if drop_code:
+            columns["code_path"] = None
+        if record is not None:
+            columns["record"] = json.dumps(record, default=str)
+        return self._set(item_id, stage, owner, **columns)
+
+    def release(self, item_id: int, stage: str, owner: str | None = None) -> bool:
+        """Hand an in-progress item back without counting it as a failure."""
+        return self._set(item_id, stage, owner, state=_RELEASE_TO[stage], worker=None)
+
+    def release_held(self, item_id: int, owner: str) -> bool:
+        """Hand back an item `owner` holds, whichever in-progress stage it reached."""
+        return any(self.release(item_id, stage, owner=owner) for stage in _RELEASE_TO)
+
+    # ── Maintenance ────────────────────────────────────────────────────
+
+    def recover(
+        self,
+        stale_after: float | None = None,
+        states: tuple[str, ...] = ("generating", "rendering"),
+    ) -> int:
+        """
+        Return in-progress items (in `states`) whose worker is gone to the queue.
+
+        Workers on this host are checked by pid. Items held by other hosts
+        are only reclaimed when untouched for `stale_after` seconds.
+        """
+        cutoff = time.time() - stale_after if stale_after is not None else None
+        recovered = 0
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, state, worker, updated_at FROM items "
+                f"WHERE state IN ({','.join('?' * len(states))})",
+                states,
+            ).fetchall()
+            for row in rows:
+                stale = cutoff is not None and row["updated_at"] < cutoff
+                if stale or _worker_is_dead(row["worker"]):
+                    conn.execute(
+                        "UPDATE items SET state = ?, worker = NULL, updated_at = ? "
+                        "WHERE id = ?",
+                        (_RELEASE_TO[row["state"]], time.time(), row["id"]),
+                    )
+                    recovered += 1
+        return recovered
+
+    def retry(
+        self,
+        stage: str | None = None,
+        model: str | None = None,
+        problem_id: str | None = None,
+        strategy: str | None = None,
+        error_contains: str | None = None,
+    ) -> int:
+        """
+        Re-queue failed items matching every given filter; returns the count.
+
+        Items with saved code go back to `generated` (render only); the
+        rest go back to `pending` (generate again).
+        """
+        where = ["state = 'failed'"]
+        params: list[Any] = []
+        for column, value in (("failed_stage", stage), ("model", model),
+                              ("problem_id", problem_id), ("strategy", strategy)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if error_contains:
+            where.append("instr(error, ?) > 0")
+            params.append(error_contains)
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE items SET "
+                "state = CASE WHEN code_path IS NULL THEN 'pending' ELSE 'generated' END, "
+                "worker = NULL, updated_at = ? "
+                f"WHERE {' AND '.join(where)}",
+                (time.time(), *params),
+            )
+            return cur.rowcount
+
+    # ── Reporting ──────────────────────────────────────────────────────
+
+    def counts(self) -> dict[str, int]:
+        """Items per state (every state present, zero if empty)."""
+        counts = dict.fromkeys(STATES, 0)
+        for row in self._connect().execute(
+            "SELECT state, COUNT(*) AS n FROM items GROUP BY state"
+        ):
+            counts[row["state"]] = row["n"]
+        return counts
+
+    def failures(self, limit: int = 20) -> list[dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT model, problem_id, trial, strategy, failed_stage, attempts, error "
+            "FROM items WHERE state = 'failed' ORDER BY id LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def records(self, include_failed: bool = True) -> list[dict]:
+        """Result records of finished items, in enqueue order."""
+        states = ("scored", "failed") if include_failed else ("scored",)
+        rows = self._connect().execute(
+            f"SELECT record FROM items WHERE state IN ({','.join('?' * len(states))}) "
+            "AND record IS NOT NULL ORDER BY id",
+            states,
+        ).fetchall()
+        return [json.loads(row["record"]) for row in rows]
+
+
+# ══════════════════════════════════════════════════════════════════════════
+# Worker
+# ══════════════════════════════════════════════════════════════════════════
+
+def _lookup(queue: JobQueue, item: WorkItem, ctx: dict):
+    """(model, problem, None) for an item, or fail it and return its error record last."""
+    model = ctx["models"].get(item.model)
+    problem = ctx["problems"].get(item.problem_id)
+    if model is None or problem is None:
+        error = f"unknown model or problem: {item.model} / {item.problem_id}"
+        queue.mark_failed(item.id, item.state, error)
+        return None, None, {"model": item.model, "problem_id": item.problem_id,
+                            "trial": item.trial, "error": error}
+    return model, problem, None
+
+
+def generate_item(queue: JobQueue, item: WorkItem, ctx: dict) -> tuple[dict, str | None]:
+    """
+    Generate code for an item claimed in `generating` and store it
+    (→ generated). Returns (record, code); code is None when the item is
+    already finished (failed, or scored with empty output).
+    """
+    from evaluation.run import fail_record, generate_sample, new_record
+
+    model, problem, failed = _lookup(queue, item, ctx)
+    if failed is not None:
+        return failed, None
+    record = new_record(model, item.problem_id, item.trial, item.strategy)
+    try:
+        code = generate_sample(
+            record, ctx["client"](), model, problem, ctx["logger"],
+        )
+    except APIClientError as e:
+        fail_record(record, str(e))
+        queue.mark_failed(item.id, "generating", record["error"], record)
+        return record, None
+    except Exception:
+        fail_record(record, traceback.format_exc())
+        queue.mark_failed(item.id, "generating", record["error"], record)
+        return record, None
+    if not code:                               # empty output is a final result
+        queue.mark_scored(item.id, "generating", record)
+        return record, None
+    queue.mark_generated(item.id, record)
+    return record, code
+
+
+def stored_code(queue: JobQueue, item: WorkItem) -> tuple[dict, str | None]:
+    """
+    Record and generated code of an item claimed in `rendering`, with any
+    earlier score dropped. Fails the item (for regeneration) when its code
+    file is gone; code is then None.
+    """
+    from evaluation.run import fail_record
+
+    record = {k: v for k, v in (item.record or {}).items() if k not in _SCORE_KEYS}
+    try:
+        return record, Path(item.code_path).read_text(encoding="utf-8")
+    except (OSError, TypeError) as e:
+        fail_record(record, f"generated code unavailable: {e}")
+        queue.mark_failed(item.id, "rendering", record["error"], record, drop_code=True)
+        return record, None
+
+
+def _process_item(queue: JobQueue, item: WorkItem, worker: str, ctx: dict) -> dict:
+    """Generate (if needed) and score one claimed item; returns its record."""
+    from evaluation.run import fail_record, score_sample
+
+    _, problem, failed = _lookup(queue, item, ctx)
+    if failed is not None:
+        return failed
+    config = replace(ctx["config"], prompt_strategy=item.strategy)
+
+    if item.state == "generating":
+        record, code = generate_item(queue, item, ctx)
+        if code is None or not queue.start_render(item.id, worker):
+            return record
+    else:
+        record, code = stored_code(queue, item)
+        if code is None:
+            return record
+
+    try:
+        score_sample(
+            record, code, problem, config, ctx["logger"],
+            ctx["render_cache"], None, ctx["media_store"],
+        )
+    except Exception:
+        fail_record(record, traceback.format_exc())
+        queue.mark_failed(item.id, "rendering", record["error"], record)
+        return record
+    queue.mark_scored(item.id, "rendering", record)
+    return record
+
+
+def run_worker(db_path: Path | str = QUEUE_DB_PATH, max_items: int | None = None) -> int:
+    """
+    Drain the queue until it is empty (or `max_items` are done).
+
+    Module-level so it can be the target of a spawned process. Returns the
+    number of items this worker finished.
+    """
+    from evaluation.logger import StructuredLogger
+    from evaluation.metrics import MediaStore, RenderCache
+    from evaluation.run import create_client, format_outcome, load_dataset
+
+    load_env()
+    ensure_dirs()
+    queue = JobQueue(db_path)
+    worker = worker_id()
+    queue.recover()
+    config = config_from_settings(queue.settings())
+
+    clients: list = []
+
+    def client():
+        if not clients:                        # built on first generation only
+            clients.append(create_client(config.provider))
+        return clients[0]
+
+    ctx = {
+        "config": config,
+        "models": {m.short_name: m for m in get_models_for_provider(config.provider)},
+        "problems": {p["id"]: p for p in load_dataset(DATASET_PATH)},
+        "client": client,
+        "logger": StructuredLogger(run_id=f"{_utc_stamp()}_{os.getpid()}"),
+        "render_cache": (RenderCache()
+                         if config.render_cache and not config.skip_render else None),
+        "media_store": (MediaStore()
+                        if config.save_video and not config.skip_render else None),
+    }
+
+    done = 0
+    item = None
+    try:
+        while max_items is None or done < max_items:
+            item = queue.claim(worker)
+            if item is None:
+                break
+            record = _process_item(queue, item, worker, ctx)
+            item = None
+            done += 1
+            print(f"    [{worker}] {record['model']} {record['problem_id']} "
+                  f"t{record['trial']} {record.get('strategy', '')}  "
+                  f"{format_outcome(record) if 'metrics' in record else '✗'}",
+                  flush=True)
+    except BaseException:
+        if item is not None:                   # interrupted mid-item: hand it back
+            queue.release_held(item.id, worker)
+        raise
+    finally:
+        ctx["logger"].close()
+        queue.close()
+    return done
+
+
+def print_status(queue: JobQueue):
+    counts = queue.counts()
+    total = sum(counts.values())
+    print(f"Queue: {queue.db_path}  ({total} items)")
+    for state in STATES:
+        print(f"  {state:<11} {counts[state]:>6}")
+    failures = queue.failures(limit=10)
+    if failures:
+        print("\nFailed (first 10):")
+        for f in failures:
+            last = (f["error"] or "").strip().splitlines()[-1:] or [""]
+            print(f"  {f['model']} {f['problem_id']} t{f['trial']} {f['strategy']} "
+                  f"[{f['failed_stage']}, {f['attempts']} attempts]  {last[0][:80]}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="ManiBench persistent evaluation queue",
+    )
+    parser.add_argument("--db", type=str, default=str(QUEUE_DB_PATH),
+                        help=f"Queue database (default: {QUEUE_DB_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    enq = sub.add_parser("enqueue", help="Add (model, problem, trial, strategy) items")
+    enq.add_argument("--models", nargs="+", default=None)
+    enq.add_argument("--problems", nargs="+", default=None)
+    enq.add_argument("--trials", type=int, default=3)
+    enq.add_argument("--strategy", nargs="+", default=["zero_shot"],
+                     choices=["zero_shot", "few_shot", "cot", "constraint", "version_aware"])
+    enq.add_argument("--provider", type=str, default="openrouter",
+                     choices=SUPPORTED_PROVIDERS)
+    enq.add_argument("--timeout", type=int, default=60)
+    enq.add_argument("--adaptive-timeout", action="store_true")
+    enq.add_argument("--timeout-cap", type=int, default=ADAPTIVE_TIMEOUT_CAP_S)
+    enq.add_argument("--skip-render", action="store_true")
+    enq.add_argument("--render-mode", choices=["full", "capped", "tiered"], default="full")
+    enq.add_argument("--cap-plays", type=int, default=RenderCap.max_plays)
+    enq.add_argument("--cap-scene-seconds", type=float, default=RenderCap.max_scene_s)
+    enq.add_argument("--audit-fraction", type=float, default=0.1)
+    enq.add_argument("--render-cpu-limit", type=int, default=RenderLimits.cpu_seconds)
+    enq.add_argument("--render-memory-mb", type=int, default=RenderLimits.address_space_mb)
+    enq.add_argument("--no-render-cache", action="store_true")
+    enq.add_argument("--save-video", action="store_true")
+    enq.add_argument("--frame-alignment", action="store_true")
+    enq.add_argument("--reference-similarity", action="store_true")
+    enq.add_argument("--api-check", choices=["off", "flag", "skip"], default="off")
+    enq.add_argument("--force", action="store_true",
+                     help="Replace settings stored by an earlier enqueue (items "
+                          "already processed keep the records they have)")
+
+    work = sub.add_parser("work", help="Drain the queue")
+    work.add_argument("--processes", type=int, default=1,
+                      help="Worker processes to start (default: 1)")
+    work.add_argument("--max-items", type=int, default=None,
+                      help="Stop each worker after this many items")
+
+    sub.add_parser("status", help="Item counts per state and recent failures")
+
+    retry = sub.add_parser("retry", help="Re-queue failed items")
+    retry.add_argument("--stage", choices=["generating", "rendering"], default=None)
+    retry.add_argument("--model", default=None)
+    retry.add_argument("--problem", default=None)
+    retry.add_argument("--strategy", default=None)
+    retry.add_argument("--error", default=None, help="Only errors containing this text")
+
+    rec = sub.add_parser("recover", help="Re-queue items held by dead workers")
+    rec.add_argument("--stale-after", type=float, default=None,
+                     help="Also reclaim items untouched for this many seconds")
+
+    exp = sub.add_parser("export", help="Write finished records as a results file")
+    exp.add_argument("--output", type=str, default=None)
+    return parser.parse_args()
+
+
+def main():
+    """Entry point."""
+    args = parse_args()
+    queue = JobQueue(args.db)
+
+    if args.command == "enqueue":
+        from evaluation.run import filter_problems, load_dataset, resolve_models
+        from evaluation.render_timeouts import learn_from_results, print_profile
+
+        config = EvalConfig(
+            trials=args.trials,
+            manim_timeout=args.timeout,
+            adaptive_timeout=args.adaptive_timeout,
+            timeout_cap=args.timeout_cap,
+            skip_render=args.skip_render,
+            render_limits=RenderLimits(
+                cpu_seconds=args.render_cpu_limit,
+                address_space_mb=args.render_memory_mb,
+            ),
+            render_mode=args.render_mode,
+            render_cap=RenderCap(
+                max_plays=args.cap_plays,
+                max_scene_s=args.cap_scene_seconds,
+            ),
+            audit_fraction=args.audit_fraction,
+            render_cache=not args.no_render_cache,
+            save_video=args.save_video or args.frame_alignment,
+            frame_alignment=args.frame_alignment,
+            reference_similarity=args.reference_similarity,
+            api_check=args.api_check,
+            provider=args.provider,
+        )
+        models = resolve_models(args.models, provider=args.provider)
+        problems = filter_problems(load_dataset(DATASET_PATH), args.problems)
+        if config.adaptive_timeout and not config.skip_render:
+            config.timeout_profile = learn_from_results(config.manim_timeout, config.timeout_cap)
+            print_profile(config.timeout_profile, [p["id"] for p in problems],
+                          default_s=config.manim_timeout)
+        changed = queue.set_settings(config_to_settings(config), force=args.force)
+        if changed:
+            print(f"ERROR: {queue.db_path} was enqueued with different settings "
+                  f"({', '.join(changed)}). Use another --db, or --force to replace them.")
+            sys.exit(1)
+        added = queue.enqueue(
+            [m.short_name for m in models], [p["id"] for p in problems],
+            args.trials, args.strategy,
+        )
+        print(f"Enqueued {added} new items ({len(args.strategy)} strategies × "
+              f"{len(models)} models × {len(problems)} problems × {args.trials} trials)")
+        print_status(queue)
+
+    elif args.command == "work":
+        if args.processes <= 1:
+            done = run_worker(args.db, args.max_items)
+            print(f"Worker finished {done} items")
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            procs = [
+                ctx.Process(target=run_worker, args=(args.db, args.max_items))
+                for _ in range(args.processes)
+            ]
+            for p in procs:
+                p.start()
+            for p in procs:
+                p.join()
+        print_status(queue)
+
+    elif args.command == "status":
+        print_status(queue)
+
+    elif args.command == "retry":
+        n = queue.retry(args.stage, args.model, args.problem, args.strategy, args.error)
+        print(f"Re-queued {n} failed items")
+
+    elif args.command == "recover":
+        n = queue.recover(stale_after=args.stale_after)
+        print(f"Recovered {n} in-progress items")
+
+    elif args.command == "export":
+        records = queue.records()
+        if args.output:
+            out_path = Path(args.output)
+        else:
+            out_path = RESULTS_DIR / f"results_queue_{_utc_stamp()}.json"
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(out_path, "w") as f:
+            json.dump(records, f, indent=2, default=str)
+        print(f"Exported {len(records)} records: {out_path}")
+
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
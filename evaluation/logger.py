@@ -8,10 +8,12 @@ Each log entry includes timestamp, run metadata, and metric values.
 import json
 import logging
 import sys
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+from evaluation.code_hash import code_hash
 from evaluation.config import LOGS_DIR
 
 
@@ -27,10 +29,12 @@ class StructuredLogger:
       2. Machine-readable JSONL file (all levels) for paper analysis
     """
 
-    def __init__(self, run_id: str | None = None):
+    def __init__(self, run_id: str | None = None, log_dir: Path | None = None):
         self.run_id = run_id or _make_run_id()
-        self.log_path = LOGS_DIR / f"run_{self.run_id}.jsonl"
-        self.summary_path = LOGS_DIR / f"run_{self.run_id}_summary.json"
+        log_dir = Path(log_dir) if log_dir else LOGS_DIR
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self.log_path = log_dir / f"run_{self.run_id}.jsonl"
+        self.summary_path = log_dir / f"run_{self.run_id}_summary.json"
 
         # Python logger for console
         self._logger = logging.getLogger(f"manibench.{self.run_id}")
@@ -47,7 +51,8 @@ class StructuredLogger:
             ch.setFormatter(fmt)
             self._logger.addHandler(ch)
 
-        # JSONL file handle
+        # JSONL file handle (shared by concurrent workers)
+        self._lock = threading.Lock()
         self._file = open(self.log_path, "a", encoding="utf-8")
         self.info(f"Logging to {self.log_path}")
 
@@ -62,8 +67,10 @@ class StructuredLogger:
         }
         if data:
             record["data"] = data
-        self._file.write(json.dumps(record, default=str) + "\n")
-        self._file.flush()
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
 
     def info(self, msg: str, **data):
         self._logger.info(msg)
@@ -86,8 +93,12 @@ class StructuredLogger:
     def log_generation(self, model: str, problem_id: str, trial: int,
                        prompt_strategy: str, prompt_tokens: int,
                        completion_tokens: int, latency_ms: float,
-                       code: str, raw_response: str | None = None):
-        """Log a single code generation event."""
+                       code: str, raw_response: str | None = None,
+                       code_path: str | None = None):
+        """
+        Log a single code generation event. `code_hash` is the stable
+        content hash (code_hash.py), the key of the cross-run code index.
+        """
         self._write("GENERATION", f"{model}/{problem_id}/t{trial}", {
             "model": model,
             "problem_id": problem_id,
@@ -97,7 +108,8 @@ class StructuredLogger:
             "completion_tokens": completion_tokens,
             "latency_ms": round(latency_ms, 1),
             "code_length": len(code),
-            "code_hash": hex(hash(code)),
+            "code_hash": code_hash(code),
+            "code_path": code_path,
         })
 
     def log_metrics(self, model: str, problem_id: str, trial: int,
@@ -117,6 +129,16 @@ class StructuredLogger:
             **metrics,
         })
 
+    def log_partial_metrics(self, model: str, problem_id: str, trial: int,
+                            metrics: dict[str, Any]):
+        """Log static metrics for one sample while its render is pending."""
+        self._write("PARTIAL_METRICS", f"{model}/{problem_id}/t{trial}", {
+            "model": model,
+            "problem_id": problem_id,
+            "trial": trial,
+            **metrics,
+        })
+
     def log_run_config(self, config: dict[str, Any]):
         """Log the full evaluation configuration at run start."""
         self._write("CONFIG", "run_config", config)
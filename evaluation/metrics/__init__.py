@@ -6,12 +6,20 @@ Four-tier scoring system:
   2. Version-Conflict Error Rate — static analysis for GL/deprecated patterns
   3. Alignment Score — weighted visual event detection via AST + heuristics
   4. Coverage Score — pedagogical element density via code analysis
+
+Importable as a plain library: no environment reads or filesystem writes at
+import, and the compute_* functions are module-level, so they pickle cleanly
+into multiprocessing pools. RenderCache and MediaStore pickle as well.
 """
 
 from evaluation.metrics.executability import compute_executability
 from evaluation.metrics.version_conflict import detect_version_conflicts, detect_specific_conflicts
 from evaluation.metrics.alignment import compute_alignment
 from evaluation.metrics.coverage import compute_coverage
+from evaluation.metrics.frame_alignment import compute_frame_alignment
+from evaluation.metrics.reference_similarity import compute_reference_similarity
+from evaluation.metrics.media_store import MediaStore
+from evaluation.metrics.render_cache import RenderCache
 
 __all__ = [
     "compute_executability",
@@ -19,4 +27,8 @@ __all__ = [
     "detect_specific_conflicts",
     "compute_alignment",
     "compute_coverage",
+    "compute_frame_alignment",
+    "compute_reference_similarity",
+    "MediaStore",
+    "RenderCache",
 ]
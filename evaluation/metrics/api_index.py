@@ -0,0 +1,861 @@
+"""
+Manim CE API Index + Static API Check
+=======================================
+Most failed renders die on an AttributeError, NameError or TypeError from
+a hallucinated or GL-only API, and a render is an expensive way to find
+that out. This module predicts those failures without rendering.
+
+Index: the installed Manim CE is introspected once, in a subprocess so the
+evaluator never imports manim itself, and the result is stored as JSON
+under API_INDEX_DIR, one file per Manim version:
+
+  exports    every name `from manim import *` provides, with its kind
+             (class / function / module / value) and, for functions,
+             the call signature
+  classes    for every exported class and its bases: MRO, own attribute
+             names (class dict + `self.x = ...` stores found in the
+             source), method signatures, and the effective constructor
+             signature (keywords accepted along the `**kwargs` chain)
+
+Check: a sample's AST is resolved against the index.
+
+  - names used but never bound and not exported    → NameError
+  - `from manim import X` with X not exported      → ImportError
+  - attributes of an index class, of a variable assigned once from an
+    index constructor, of `self` in a Scene subclass, or after
+    `.animate` that the class cannot have                → AttributeError
+  - keyword arguments outside a closed signature, or too many positional
+    arguments, for constructors, functions and methods  → TypeError
+
+A finding is "certain" (an error) only when it sits on straight-line code
+that runs: module level or a method that is `construct`, `setup`, or
+referenced somewhere, and not inside try / if / while / lambda. Anything
+else is a warning. Classes whose attributes are set dynamically
+(`setattr(self, name, ...)`) or that have an arbitrary `__getattr__` only
+ever produce warnings; Mobject's accessor hook is honoured (`set_x` always
+resolves, `get_x` resolves iff `x` does).
+
+Usage:
+    python -m evaluation.metrics.api_index build
+    python -m evaluation.metrics.api_index check evaluation/generated_code
+"""
+
+import argparse
+import ast
+import builtins
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+from evaluation.config import API_INDEX_DIR
+from evaluation.metrics.render_cache import manim_version
+
+INDEX_FORMAT_VERSION = 1
+ENTRY_METHODS = {"construct", "setup"}       # called by Manim itself
+_BUILD_TIMEOUT = 300                         # seconds for the introspection subprocess
+_BUILTINS = set(dir(builtins)) | {"__name__", "__file__", "__doc__", "__spec__"}
+
+
+# ── Building (runs with manim importable) ─────────────────────────────────
+
+def _class_key(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _signature(fn: Any, bound: bool) -> dict[str, Any] | None:
+    """
+    Summarize a callable's signature as
+    {"max_positional": int | None, "keywords": [...], "var_kw": bool}.
+
+    Decorators are not followed: a wrapper taking (*args, **kwargs) is
+    recorded as open, since it may accept more than the wrapped function.
+    """
+    import inspect
+
+    try:
+        sig = inspect.signature(fn, follow_wrapped=False)
+    except (TypeError, ValueError):
+        return None
+    params = list(sig.parameters.values())
+    if bound and params and params[0].kind in (
+        inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD,
+    ):
+        params = params[1:]
+
+    max_positional: int | None = 0
+    keywords = []
+    var_kw = False
+    for p in params:
+        if p.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD):
+            if max_positional is not None:
+                max_positional += 1
+        if p.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY):
+            keywords.append(p.name)
+        elif p.kind == inspect.Parameter.VAR_POSITIONAL:
+            max_positional = None
+        elif p.kind == inspect.Parameter.VAR_KEYWORD:
+            var_kw = True
+    return {"max_positional": max_positional, "keywords": keywords, "var_kw": var_kw}
+
+
+def _closed(sig: dict[str, Any] | None) -> dict[str, Any]:
+    """Final form stored in the index: keywords is None when open."""
+    if sig is None:
+        return {"max_positional": None, "keywords": None}
+    return {
+        "max_positional": sig["max_positional"],
+        "keywords": None if sig["var_kw"] else sig["keywords"],
+    }
+
+
+def _source_tree(obj: Any) -> ast.AST | None:
+    import inspect
+    import textwrap
+
+    try:
+        return ast.parse(textwrap.dedent(inspect.getsource(obj)))
+    except (OSError, TypeError, SyntaxError, IndentationError):
+        return None
+
+
+def _forwards_kwargs(init: Any) -> bool:
+    """Whether an `__init__` passes its `**kwargs` on to another call."""
+    tree = _source_tree(init)
+    if tree is None:
+        return False
+    func = next((n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)), None)
+    if func is None or func.args.kwarg is None:
+        return False
+    name = func.args.kwarg.arg
+    forwarded = {
+        id(n.value) for n in ast.walk(func)
+        if isinstance(n, ast.keyword) and n.arg is None
+        and isinstance(n.value, ast.Name) and n.value.id == name
+    }
+    uses = [n for n in ast.walk(func) if isinstance(n, ast.Name) and n.id == name]
+    # Any other use (kwargs.pop("x"), kwargs["x"], ...) may consume keywords
+    return bool(forwarded) and all(id(n) in forwarded for n in uses)
+
+
+def _init_signature(cls: type) -> dict[str, Any]:
+    """
+    Constructor signature accumulated along the MRO: each `__init__` that
+    forwards `**kwargs` adds its keywords and defers to the next one. The
+    set is closed at the first `__init__` without `**kwargs`; it stays open
+    if kwargs are consumed, pass through a decorator, or reach `object`.
+    """
+    max_positional: int | None = None
+    keywords: set[str] = set()
+    first = True
+    for klass in cls.__mro__:
+        init = klass.__dict__.get("__init__")
+        if init is None or klass is object:
+            continue
+        if hasattr(init, "__wrapped__"):
+            return {"max_positional": None if first else max_positional, "keywords": None}
+        sig = _signature(init, bound=True)
+        if sig is None:
+            return {"max_positional": None if first else max_positional, "keywords": None}
+        if first:
+            max_positional = sig["max_positional"]
+            first = False
+        keywords.update(sig["keywords"])
+        if not sig["var_kw"]:
+            return {"max_positional": max_positional, "keywords": sorted(keywords)}
+        if not _forwards_kwargs(init):
+            break
+    return {"max_positional": max_positional, "keywords": None}
+
+
+def _kwargs_loop_vars(func: ast.FunctionDef) -> set[str]:
+    """Loop variables iterating over the function's own `**kwargs` keys."""
+    if func.args.kwarg is None:
+        return set()
+    kwname = func.args.kwarg.arg
+    names = set()
+    for node in ast.walk(func):
+        if not isinstance(node, (ast.For, ast.comprehension)):
+            continue
+        it = node.iter
+        if isinstance(it, ast.Call) and isinstance(it.func, ast.Attribute):
+            it = it.func.value
+        if isinstance(it, ast.Name) and it.id == kwname:
+            target = node.target.elts[0] if isinstance(node.target, ast.Tuple) else node.target
+            if isinstance(target, ast.Name):
+                names.add(target.id)
+    return names
+
+
+def _source_attrs(cls: type) -> tuple[set[str], bool]:
+    """
+    Attribute names stored in the class source, and whether any are set
+    under names the library chooses itself (dynamic). Names set from the
+    caller's own keywords (`for k, v in kwargs.items(): setattr(self, k, v)`)
+    and by a `__getattr__` accessor hook are not dynamic: the checker
+    treats every keyword the sample passes as a possible attribute.
+    """
+    tree = _source_tree(cls)
+    if tree is None:
+        return set(), False
+    names = set()
+    dynamic = False
+    funcs = [n for n in ast.walk(tree) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    for func in funcs or [tree]:
+        if getattr(func, "name", None) == "__getattr__":
+            continue
+        caller_names = _kwargs_loop_vars(func) if funcs else set()
+        for node in ast.walk(func):
+            if isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Store):
+                names.add(node.attr)
+            elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                  and node.func.id == "setattr" and len(node.args) >= 2):
+                arg = node.args[1]
+                if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    names.add(arg.value)
+                elif not (isinstance(arg, ast.Name) and arg.id in caller_names):
+                    dynamic = True
+            elif (isinstance(node, ast.Attribute) and node.attr == "__dict__"
+                  and isinstance(node.value, ast.Name) and node.value.id == "self"):
+                dynamic = True
+    return names, dynamic
+
+
+def _getattr_hook(cls: type) -> str | None:
+    """
+    "accessor" for a Mobject-style `__getattr__` that only synthesizes
+    get_x / set_x, "opaque" for any other hook, None without one.
+    """
+    hook = cls.__dict__.get("__getattr__") if cls is not object else None
+    if hook is None:
+        return None
+    tree = _source_tree(hook)
+    constants = {n.value for n in ast.walk(tree) if isinstance(n, ast.Constant)} if tree else set()
+    return "accessor" if {"get_", "set_"} <= constants else "opaque"
+
+
+def _index_class(cls: type, classes: dict[str, dict]) -> str:
+    key = _class_key(cls)
+    if key in classes:
+        return key
+    classes[key] = {}          # placeholder against cycles
+    for base in cls.__mro__[1:]:
+        _index_class(base, classes)
+
+    methods = {}
+    for name, value in cls.__dict__.items():
+        if isinstance(value, staticmethod):
+            methods[name] = _closed(_signature(value.__func__, bound=False))
+        elif isinstance(value, classmethod):
+            methods[name] = _closed(_signature(value.__func__, bound=True))
+        elif callable(value) and not isinstance(value, type):
+            methods[name] = _closed(_signature(value, bound=True))
+
+    source_attrs, dynamic = _source_attrs(cls) if cls is not object else (set(), False)
+    classes[key] = {
+        "name": cls.__qualname__,
+        "mro": [_class_key(c) for c in cls.__mro__],
+        "attrs": sorted(cls.__dict__),
+        "instance_attrs": sorted(source_attrs - set(cls.__dict__)),
+        "methods": methods,
+        "init": _init_signature(cls),
+        "getattr_hook": _getattr_hook(cls),
+        "dynamic": dynamic,
+    }
+    return key
+
+
+def build_api_index() -> dict[str, Any]:
+    """Introspect the installed Manim CE. Imports manim (slow, heavy)."""
+    import importlib
+    import inspect
+    import pkgutil
+
+    manim = importlib.import_module("manim")
+    names = getattr(manim, "__all__", None)
+    if names is None:
+        names = [n for n in dir(manim) if not n.startswith("_")]
+
+    exports: dict[str, dict] = {}
+    classes: dict[str, dict] = {}
+    for name in names:
+        obj = getattr(manim, name, None)
+        if inspect.isclass(obj):
+            exports[name] = {"kind": "class", "ref": _index_class(obj, classes)}
+        elif inspect.ismodule(obj):
+            exports[name] = {"kind": "module"}
+        elif callable(obj):
+            exports[name] = {"kind": "function", "signature": _closed(_signature(obj, bound=False))}
+        else:
+            exports[name] = {"kind": "value"}
+
+    return {
+        "format": INDEX_FORMAT_VERSION,
+        "manim_version": manim_version(),
+        "python": sys.version.split()[0],
+        "exports": exports,
+        "submodules": sorted(m.name for m in pkgutil.iter_modules(manim.__path__)),
+        "classes": classes,
+    }
+
+
+def write_api_index(path: Path | str) -> Path:
+    """Build the index in this process and write it atomically to `path`."""
+    path = Path(path)
+    data = build_api_index()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path
+
+
+# ── Loading ───────────────────────────────────────────────────────────────
+
+class ApiIndex:
+    """Read-only view over a stored index with MRO-aware lookups."""
+
+    def __init__(self, data: dict[str, Any]):
+        self.manim_version = data.get("manim_version", "unknown")
+        self.exports: dict[str, dict] = data["exports"]
+        self.submodules = set(data.get("submodules", []))
+        self.classes: dict[str, dict] = data["classes"]
+        self._attrs: dict[tuple[str, bool], frozenset[str]] = {}
+
+    @classmethod
+    def load(cls, path: Path | str) -> "ApiIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def export_class(self, name: str) -> str | None:
+        entry = self.exports.get(name)
+        return entry["ref"] if entry and entry["kind"] == "class" else None
+
+    def _mro(self, key: str) -> list[dict]:
+        return [self.classes[k] for k in self.classes[key]["mro"] if k in self.classes]
+
+    def attrs(self, key: str, instance: bool = True) -> frozenset[str]:
+        """Every attribute name reachable on the class (or its instances)."""
+        cached = self._attrs.get((key, instance))
+        if cached is None:
+            names = set()
+            for entry in self._mro(key):
+                names.update(entry["attrs"])
+                if instance:
+                    names.update(entry["instance_attrs"])
+            cached = self._attrs[(key, instance)] = frozenset(names)
+        return cached
+
+    def dynamic(self, key: str) -> bool:
+        return any(entry["dynamic"] for entry in self._mro(key))
+
+    def getattr_hook(self, key: str) -> str | None:
+        """Kind of the nearest `__getattr__` hook in the MRO (see _getattr_hook)."""
+        return next((e["getattr_hook"] for e in self._mro(key) if e["getattr_hook"]), None)
+
+    def method_signature(self, key: str, name: str) -> dict[str, Any] | None:
+        for entry in self._mro(key):
+            if name in entry["methods"]:
+                return entry["methods"][name]
+            if name in entry["attrs"]:
+                return None
+        return None
+
+    def init_signature(self, key: str) -> dict[str, Any]:
+        return self.classes[key]["init"]
+
+
+def api_index_path(version: str | None = None) -> Path:
+    return API_INDEX_DIR / f"manim-{version or manim_version()}.json"
+
+
+_loaded: dict[str, ApiIndex | None] = {}
+_load_lock = threading.Lock()
+
+
+def load_api_index(build: bool = True) -> ApiIndex | None:
+    """
+    Index for the installed Manim, built on first use (in a subprocess)
+    when `build` is set. None if Manim is not installed or the build fails.
+    Loaded once per process.
+    """
+    version = manim_version()
+    if version == "unknown":
+        return None
+    with _load_lock:
+        if version in _loaded:
+            return _loaded[version]
+        path = api_index_path(version)
+        if not path.exists() and build:
+            try:
+                subprocess.run(
+                    [sys.executable, "-m", "evaluation.metrics.api_index",
+                     "build", "--output", str(path)],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=_BUILD_TIMEOUT,
+                    check=True,
+                )
+            except (OSError, subprocess.SubprocessError):
+                pass
+        try:
+            index = ApiIndex.load(path)
+        except (OSError, ValueError, KeyError):
+            index = None
+        _loaded[version] = index
+        return index
+
+
+# ── Checking ──────────────────────────────────────────────────────────────
+
+class _ModuleFacts:
+    """Whole-module facts the checker needs before walking: scopes are
+    deliberately ignored, so every judgement errs towards "defined"."""
+
+    def __init__(self, tree: ast.Module, index: ApiIndex):
+        self.bound: set[str] = set()
+        self.referenced: set[str] = set()
+        self.stored_attrs: set[str] = set()
+        self.star_manim = False
+        self.unknown_star = False
+        self.manim_modules: set[str] = set()       # aliases of `import manim`
+        self.manim_names: dict[str, str] = {}      # local name → export name
+        self.user_classes: dict[str, ast.ClassDef] = {}
+        assigned: dict[str, list[ast.expr]] = {}
+        simple_targets: set[int] = set()     # ids of `name = value` target nodes
+        rebound: set[str] = set()            # names bound any other way
+
+        # ast.walk is breadth-first, so an Assign is seen before its targets
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name):
+                if isinstance(node.ctx, ast.Load):
+                    self.referenced.add(node.id)
+                else:
+                    self.bound.add(node.id)
+                    if id(node) not in simple_targets:
+                        rebound.add(node.id)
+            elif isinstance(node, ast.Attribute):
+                if isinstance(node.ctx, ast.Store):
+                    self.stored_attrs.add(node.attr)
+                else:
+                    self.referenced.add(node.attr)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.bound.add(node.name)
+            elif isinstance(node, ast.ClassDef):
+                self.bound.add(node.name)
+                self.user_classes[node.name] = node
+            elif isinstance(node, ast.arg):
+                self.bound.add(node.arg)
+            elif isinstance(node, ast.ExceptHandler) and node.name:
+                self.bound.add(node.name)
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                self.bound.update(node.names)
+            elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+                self.bound.add(node.name)
+            elif isinstance(node, ast.MatchMapping) and node.rest:
+                self.bound.add(node.rest)
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    local = alias.asname or alias.name.split(".")[0]
+                    self.bound.add(local)
+                    if alias.name == "manim":
+                        self.manim_modules.add(local)
+            elif isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    if alias.name == "*":
+                        if node.module == "manim":
+                            self.star_manim = True
+                        else:
+                            self.unknown_star = True
+                        continue
+                    local = alias.asname or alias.name
+                    self.bound.add(local)
+                    if node.module == "manim" and node.level == 0:
+                        self.manim_names[local] = alias.name
+            elif isinstance(node, ast.Call):
+                # Keywords may become attributes (Mobject.set(**kwargs), ...)
+                self.stored_attrs.update(kw.arg for kw in node.keywords if kw.arg)
+                if (isinstance(node.func, ast.Name) and node.func.id == "setattr"
+                        and len(node.args) >= 2 and isinstance(node.args[1], ast.Constant)
+                        and isinstance(node.args[1].value, str)):
+                    self.stored_attrs.add(node.args[1].value)
+            if isinstance(node, (ast.Assign, ast.AnnAssign)) and node.value is not None:
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        simple_targets.add(id(target))
+                        assigned.setdefault(target.id, []).append(node.value)
+
+        # A variable has a known type only if every binding is `name = Cls(...)`
+        # with the same index class
+        self._index = index
+        rebound |= self.bound - set(assigned)
+        self.var_types: dict[str, str] = {}
+        for name, values in assigned.items():
+            types = {self.constructed_class(v) for v in values}
+            if name not in rebound and len(types) == 1 and None not in types:
+                self.var_types[name] = types.pop()
+
+    def export_name(self, node: ast.expr) -> str | None:
+        """The export a Name / `manim.X` expression refers to, if any."""
+        if isinstance(node, ast.Name):
+            if node.id in self.manim_names:
+                return self.manim_names[node.id]
+            if self.star_manim and node.id not in self.bound and node.id in self._index.exports:
+                return node.id
+        elif (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+              and node.value.id in self.manim_modules):
+            return node.attr
+        return None
+
+    def index_class(self, node: ast.expr) -> str | None:
+        name = self.export_name(node)
+        return self._index.export_class(name) if name else None
+
+    def constructed_class(self, node: ast.expr) -> str | None:
+        if isinstance(node, ast.Call):
+            return self.index_class(node.func)
+        return None
+
+
+class _ApiChecker(ast.NodeVisitor):
+    """Walks the module once, collecting findings (see module docstring)."""
+
+    def __init__(self, index: ApiIndex, facts: _ModuleFacts):
+        self.index = index
+        self.facts = facts
+        self.findings: list[dict[str, Any]] = []
+        self._guarded = 0
+        self._class_stack: list[str] = []
+        self._user_bases: dict[str, str | None] = {}
+        self._user_names: dict[str, set[str]] = {}
+
+    # ── Findings ───────────────────────────────────────────────────────
+
+    def _report(self, node: ast.AST, error_type: str, message: str, certain: bool = True):
+        self.findings.append({
+            "error_type": error_type,
+            "line": getattr(node, "lineno", None),
+            "message": message,
+            "certain": certain and self._guarded == 0,
+        })
+
+    def _guard(self, nodes, delta: int = 1):
+        self._guarded += delta
+        for node in nodes:
+            self.visit(node)
+        self._guarded -= delta
+
+    # ── User classes ───────────────────────────────────────────────────
+
+    def _user_base(self, name: str, seen: frozenset = frozenset()) -> str | None:
+        """Index class a user class ultimately derives from (None if unknown)."""
+        if name in self._user_bases:
+            return self._user_bases[name]
+        node = self.facts.user_classes[name]
+        base_key = None
+        for base in node.bases:
+            key = self.facts.index_class(base)
+            if key is None and isinstance(base, ast.Name) and base.id in self.facts.user_classes \
+                    and base.id not in seen:
+                key = self._user_base(base.id, seen | {name})
+            if key is None:
+                base_key = None
+                break
+            base_key = base_key or key
+        self._user_bases[name] = base_key
+        return base_key
+
+    def _user_attrs(self, name: str, seen: frozenset = frozenset()) -> set[str]:
+        if name in self._user_names:
+            return self._user_names[name]
+        node = self.facts.user_classes[name]
+        names = set()
+        for sub in ast.walk(node):
+            if isinstance(sub, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names.add(sub.name)
+            elif isinstance(sub, ast.Name) and isinstance(sub.ctx, ast.Store):
+                names.add(sub.id)
+        for base in node.bases:
+            if isinstance(base, ast.Name) and base.id in self.facts.user_classes \
+                    and base.id not in seen:
+                names |= self._user_attrs(base.id, seen | {name})
+        self._user_names[name] = names
+        return names
+
+    # ── Types ──────────────────────────────────────────────────────────
+
+    def _type_of(self, node: ast.expr) -> tuple[str, str] | None:
+        """("index", key) or ("user", class name) for an instance expression."""
+        if isinstance(node, ast.Name):
+            if node.id == "self" and self._class_stack:
+                return ("user", self._class_stack[-1])
+            key = self.facts.var_types.get(node.id)
+            return ("index", key) if key else None
+        if isinstance(node, ast.Call):
+            key = self.facts.constructed_class(node)
+            return ("index", key) if key else None
+        if isinstance(node, ast.Attribute) and node.attr == "animate":
+            return self._type_of(node.value)
+        return None
+
+    def _attr_status(self, typ: tuple[str, str], attr: str) -> str:
+        """ok | error | warning for `instance.attr`."""
+        kind, ref = typ
+        if attr in self.facts.stored_attrs or attr.startswith("__"):
+            return "ok"
+        if kind == "user":
+            if attr in self._user_attrs(ref):
+                return "ok"
+            key = self._user_base(ref)
+            if key is None:
+                return "ok"
+        else:
+            key = ref
+        names = self.index.attrs(key)
+        if attr in names:
+            return "ok"
+        hook = self.index.getattr_hook(key)
+        if hook == "opaque":
+            return "warning"
+        if hook == "accessor":
+            if attr.startswith("set_"):
+                return "ok"
+            if attr.startswith("get_") and (attr[4:] in names or attr[4:] in self.facts.stored_attrs):
+                return "ok"
+        return "warning" if self.index.dynamic(key) else "error"
+
+    def _method_signature(self, typ: tuple[str, str], attr: str) -> dict[str, Any] | None:
+        kind, ref = typ
+        if kind == "user":
+            if attr in self._user_attrs(ref):
+                return None
+            ref = self._user_base(ref)
+            if ref is None:
+                return None
+        return self.index.method_signature(ref, attr)
+
+    def _check_call(self, node: ast.Call, sig: dict[str, Any] | None, what: str):
+        if sig is None:
+            return
+        if sig["keywords"] is not None:
+            for kw in node.keywords:
+                if kw.arg is not None and kw.arg not in sig["keywords"]:
+                    self._report(node, "TypeError",
+                                 f"{what}() got an unexpected keyword argument '{kw.arg}'")
+        positional = len(node.args)
+        if (sig["max_positional"] is not None and positional > sig["max_positional"]
+                and not any(isinstance(a, ast.Starred) for a in node.args)):
+            self._report(node, "TypeError",
+                         f"{what}() takes at most {sig['max_positional']} positional "
+                         f"arguments but {positional} were given")
+
+    # ── Visitors ───────────────────────────────────────────────────────
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module == "manim" and node.level == 0:
+            for alias in node.names:
+                if (alias.name != "*" and alias.name not in self.index.exports
+                        and alias.name not in self.index.submodules):
+                    self._report(node, "ImportError",
+                                 f"cannot import name '{alias.name}' from 'manim'")
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        for sub in (*node.bases, *node.keywords, *node.decorator_list):
+            self.visit(sub)
+        self._class_stack.append(node.name)
+        for stmt in node.body:
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self._visit_function(stmt, method=True)
+            else:
+                self.visit(stmt)
+        self._class_stack.pop()
+
+    def _visit_function(self, node, method: bool = False):
+        for sub in (*node.decorator_list, *node.args.defaults, *node.args.kw_defaults):
+            if sub is not None:
+                self.visit(sub)
+        runs = node.name in ENTRY_METHODS or node.name in self.facts.referenced or (
+            method and node.name.startswith("__") and node.name.endswith("__"))
+        stack = self._class_stack
+        if not method:
+            self._class_stack = []      # `self` in a nested function is not the scene
+        self._guard(node.body, 0 if runs else 1)
+        self._class_stack = stack
+
+    def visit_FunctionDef(self, node):
+        self._visit_function(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda):
+        self._guard([node.body])
+
+    def visit_If(self, node: ast.If):
+        self.visit(node.test)
+        self._guard([*node.body, *node.orelse])
+
+    def visit_While(self, node: ast.While):
+        self.visit(node.test)
+        self._guard([*node.body, *node.orelse])
+
+    def visit_Try(self, node: ast.Try):
+        self._guard([*node.body, *node.handlers, *node.orelse])
+        for stmt in node.finalbody:
+            self.visit(stmt)
+
+    visit_TryStar = visit_Try
+
+    def visit_Name(self, node: ast.Name):
+        if not isinstance(node.ctx, ast.Load):
+            return
+        name = node.id
+        if name in self.facts.bound or name in _BUILTINS or name in self.facts.manim_names:
+            return
+        if self.facts.unknown_star:
+            return
+        if self.facts.star_manim and name in self.index.exports:
+            return
+        self._report(node, "NameError", f"name '{name}' is not defined")
+
+    def visit_Attribute(self, node: ast.Attribute):
+        self.visit(node.value)
+        if not isinstance(node.ctx, ast.Load):
+            return
+        value = node.value
+        if isinstance(value, ast.Name) and value.id in self.facts.manim_modules:
+            if node.attr not in self.index.exports and node.attr not in self.index.submodules:
+                self._report(node, "AttributeError",
+                             f"module 'manim' has no attribute '{node.attr}'")
+            return
+        key = self.facts.index_class(value)
+        if key is not None:
+            if node.attr not in self.index.attrs(key, instance=False):
+                status = "warning" if self.index.dynamic(key) else "error"
+                self._report(node, "AttributeError",
+                             f"type object '{self.index.classes[key]['name']}' has no "
+                             f"attribute '{node.attr}'", certain=status == "error")
+            return
+        typ = self._type_of(value)
+        if typ is None:
+            return
+        status = self._attr_status(typ, node.attr)
+        if status != "ok":
+            owner = typ[1] if typ[0] == "user" else self.index.classes[typ[1]]["name"]
+            self._report(node, "AttributeError",
+                         f"'{owner}' object has no attribute '{node.attr}'",
+                         certain=status == "error")
+
+    def visit_Call(self, node: ast.Call):
+        self.generic_visit(node)
+        func = node.func
+        name = self.facts.export_name(func)
+        if name is not None:
+            entry = self.index.exports.get(name)
+            if entry and entry["kind"] == "class":
+                self._check_call(node, self.index.init_signature(entry["ref"]), name)
+            elif entry and entry["kind"] == "function":
+                self._check_call(node, entry.get("signature"), name)
+            return
+        if isinstance(func, ast.Attribute):
+            typ = self._type_of(func.value)
+            if typ is not None and self._attr_status(typ, func.attr) == "ok":
+                self._check_call(node, self._method_signature(typ, func.attr), func.attr)
+
+
+def check_api(code: str, index: ApiIndex) -> dict[str, Any]:
+    """
+    Resolve a sample's names, attributes and call signatures against `index`.
+
+    Returns:
+        {
+            "checked": bool,                 # False if unparsable or no manim import
+            "manim_version": str,
+            "errors": [finding, ...],        # certain failures
+            "warnings": [finding, ...],      # likely failures on guarded paths
+            "predicted_error": str | None,   # error type of the first error
+        }
+        where finding = {"error_type", "line", "message", "certain"}.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return {"checked": False, "manim_version": index.manim_version,
+                "errors": [], "warnings": [], "predicted_error": None}
+
+    facts = _ModuleFacts(tree, index)
+    checker = _ApiChecker(index, facts)
+    checked = bool(facts.star_manim or facts.manim_modules or facts.manim_names)
+    if checked:
+        checker.visit(tree)
+    findings = sorted(checker.findings, key=lambda f: f["line"] or 0)
+    errors = [f for f in findings if f["certain"]]
+    return {
+        "checked": checked,
+        "manim_version": index.manim_version,
+        "errors": errors,
+        "warnings": [f for f in findings if not f["certain"]],
+        "predicted_error": errors[0]["error_type"] if errors else None,
+    }
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────
+
+def _iter_sources(paths: list[str]):
+    for p in map(Path, paths):
+        if p.is_dir():
+            yield from sorted(p.rglob("*.py"))
+        else:
+            yield p
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manim CE API index + static API check")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="Introspect the installed Manim and store the index")
+    p_build.add_argument("--output", type=str, default=None,
+                         help="Index path (default: API_INDEX_DIR/manim-<version>.json)")
+    p_check = sub.add_parser("check", help="Check .py files (or directories of them)")
+    p_check.add_argument("paths", nargs="+")
+    p_check.add_argument("--index", type=str, default=None, help="Index path to use")
+    p_check.add_argument("--warnings", action="store_true", help="Also list warnings")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if manim_version() == "unknown":
+            print("ERROR: manim is not installed; nothing to index.")
+            sys.exit(1)
+        path = write_api_index(args.output or api_index_path())
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        print(f"Indexed Manim {data['manim_version']}: {len(data['exports'])} exports, "
+              f"{len(data['classes'])} classes → {path}")
+        return
+
+    index = ApiIndex.load(args.index) if args.index else load_api_index()
+    if index is None:
+        print("ERROR: no API index (is manim installed? try `build` first).")
+        sys.exit(1)
+    n_files = n_flagged = 0
+    by_type: dict[str, int] = {}
+    for path in _iter_sources(args.paths):
+        n_files += 1
+        result = check_api(path.read_text(encoding="utf-8", errors="replace"), index)
+        shown = result["errors"] + (result["warnings"] if args.warnings else [])
+        if result["errors"]:
+            n_flagged += 1
+            by_type[result["predicted_error"]] = by_type.get(result["predicted_error"], 0) + 1
+        for f in shown:
+            mark = "✗" if f["certain"] else "?"
+            print(f"  {mark} {path}:{f['line']}  {f['error_type']}: {f['message']}")
+    print(f"{n_flagged}/{n_files} files predicted to fail"
+          + (f"  ({', '.join(f'{k}: {v}' for k, v in sorted(by_type.items()))})" if by_type else ""))
+
+
+if __name__ == "__main__":
+    main()
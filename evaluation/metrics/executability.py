@@ -7,19 +7,46 @@ Checks:
   - Python syntax validity (ast.parse)
   - Import resolution (from manim import *)
   - Scene class presence
-  - Manim rendering (subprocess with timeout)
+  - Optional API check against the installed Manim's symbol index
+    (api_index.py): predicted failures are flagged, or failed unrendered
+  - Manim rendering (subprocess with timeout), optionally capped after N
+    play calls / T scene seconds with a full-render audit subset
+    (render_tiers.py)
 """
 
 import ast
+import json
+import os
 import re
+import signal
 import subprocess
 import sys
 import tempfile
 import textwrap
+import threading
+import time
+import warnings
+from collections import deque
 from pathlib import Path
 from typing import Any
 
-from evaluation.config import EvalConfig
+from evaluation.config import (
+    EvalConfig,
+    RENDER_MAX_OUTPUT_BYTES,
+    RENDER_OUTPUT_KEEP_CHARS,
+    RENDER_OUTPUT_TAIL_BYTES,
+    RenderCap,
+    RenderLimits,
+)
+from evaluation.metrics.api_index import check_api, load_api_index
+from evaluation.metrics.media_store import MediaStore
+from evaluation.metrics.render_cache import RenderCache
+from evaluation.metrics.render_tiers import cap_reached
+
+# Launcher that applies rlimits then execs manim (see render_sandbox.py)
+_SANDBOX_SCRIPT = Path(__file__).resolve().parent / "render_sandbox.py"
+_PROFILER_SCRIPT = Path(__file__).resolve().parent / "scene_profiler.py"
+_MB = 1024 * 1024
 
 
 def check_syntax(code: str) -> dict[str, Any]:
@@ -108,20 +135,206 @@ def check_imports(code: str) -> dict[str, Any]:
     }
 
 
+class _TailBuffer:
+    """
+    Fixed-size ring buffer holding the last `limit` bytes of a stream.
+
+    Memory stays bounded no matter how much a render prints; `total`
+    still counts every byte seen so runaway output can be detected.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.total = 0
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+
+    def append(self, data: bytes):
+        self.total += len(data)
+        if len(data) >= self.limit:
+            self._chunks.clear()
+            self._chunks.append(data[-self.limit:])
+            self._size = self.limit
+            return
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size > self.limit:
+            head = self._chunks[0]
+            excess = self._size - self.limit
+            if len(head) <= excess:
+                self._chunks.popleft()
+                self._size -= len(head)
+            else:
+                self._chunks[0] = head[excess:]
+                self._size -= excess
+
+    def text(self) -> str:
+        return b"".join(self._chunks).decode("utf-8", errors="replace")
+
+
+class _OutputCapture:
+    """
+    Drains a process's stdout and stderr on background threads into
+    per-stream tail buffers, killing the process once the combined output
+    exceeds `max_bytes`.
+    """
+
+    def __init__(self, proc: subprocess.Popen, tail_bytes: int, max_bytes: int):
+        self.proc = proc
+        self.max_bytes = max_bytes
+        self.stdout = _TailBuffer(tail_bytes)
+        self.stderr = _TailBuffer(tail_bytes)
+        self.overflowed = False
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._pump, args=(proc.stdout, self.stdout), daemon=True),
+            threading.Thread(target=self._pump, args=(proc.stderr, self.stderr), daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def _pump(self, stream, buf: _TailBuffer):
+        try:
+            for chunk in iter(lambda: stream.read1(65536), b""):
+                with self._lock:
+                    buf.append(chunk)
+                    over = self.stdout.total + self.stderr.total > self.max_bytes
+                if over and not self.overflowed:
+                    self.overflowed = True
+                    _kill_group(self.proc)
+        except (OSError, ValueError):
+            pass  # stream closed underneath us after kill
+        finally:
+            stream.close()
+
+    def join(self, timeout: float | None = None):
+        for t in self._threads:
+            t.join(timeout)
+
+
+def _kill_group(proc: subprocess.Popen):
+    """SIGKILL the render's whole process group (manim, ffmpeg, ...)."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass  # already gone
+
+
+def _wait_with_usage(proc: subprocess.Popen, timeout: float) -> tuple[bool, Any]:
+    """
+    Wait for `proc`, killing its process group after `timeout` seconds.
+
+    On POSIX the child is reaped with os.wait4 so its resource usage
+    (including reaped descendants such as ffmpeg) is available.
+
+    Returns:
+        (timed_out, rusage or None)
+    """
+    timed_out = threading.Event()
+
+    def _on_timeout():
+        timed_out.set()
+        _kill_group(proc)
+
+    timer = threading.Timer(timeout, _on_timeout)
+    timer.daemon = True
+    timer.start()
+    try:
+        if hasattr(os, "wait4"):
+            _, status, rusage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return timed_out.is_set(), rusage
+        proc.wait()
+        return timed_out.is_set(), None
+    finally:
+        timer.cancel()
+        # Reap stragglers left in the group (e.g. orphaned ffmpeg)
+        _kill_group(proc)
+
+
+def _usage_dict(rusage: Any, wall_s: float) -> dict[str, Any]:
+    """Summarize wall time, CPU time, and peak RSS for one render."""
+    if rusage is None:
+        return {"wall_s": round(wall_s, 3), "cpu_user_s": None,
+                "cpu_sys_s": None, "peak_rss_mb": None}
+    # ru_maxrss is bytes on macOS, KiB on Linux
+    rss_bytes = rusage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "wall_s": round(wall_s, 3),
+        "cpu_user_s": round(rusage.ru_utime, 3),
+        "cpu_sys_s": round(rusage.ru_stime, 3),
+        "peak_rss_mb": round(rss_bytes / _MB, 1),
+    }
+
+
+def _signal_error(returncode: int) -> tuple[str | None, str | None]:
+    """Classify a render killed by a resource-limit signal."""
+    if returncode >= 0:
+        return None, None
+    sig = -returncode
+    if sig == getattr(signal, "SIGXCPU", None):
+        return "CPUTimeLimit", "Render exceeded its CPU-time limit"
+    if sig == getattr(signal, "SIGXFSZ", None):
+        return "FileSizeLimit", "Render exceeded its output file-size limit"
+    if sig == getattr(signal, "SIGKILL", None):
+        return "Killed", "Render was killed (SIGKILL): hard CPU limit or out of memory"
+    return "Signal", f"Render terminated by signal {sig}"
+
+
 def run_manim_code(
     code: str,
     scene_name: str | None = None,
     timeout: int = 60,
     quality: str = "l",        # low quality for speed
+    max_output_bytes: int = RENDER_MAX_OUTPUT_BYTES,
+    limits: RenderLimits | None = None,
+    profile_scenes: bool = True,
+    cache: RenderCache | None = None,
+    media_store: MediaStore | None = None,
+    cap: RenderCap | None = None,
 ) -> dict[str, Any]:
     """
-    Execute Manim code in a subprocess and capture results.
+    Execute Manim code in a sandboxed subprocess and capture results.
+
+    The render runs in its own process group under the rlimits in
+    `limits` (CPU seconds, address space, file size, process count), which
+    every spawned process such as ffmpeg inherits. On timeout the whole
+    group is killed, not just the direct child.
+
+    stdout/stderr are streamed into fixed-size ring buffers rather than
+    buffered whole, so memory per render is bounded; a render whose
+    combined output exceeds `max_output_bytes` is killed.
+
+    With `profile_scenes`, Manim is launched through scene_profiler.py,
+    which records per-scene complexity (play calls, animation run time,
+    peak mobject/point counts, frames written) while it renders.
+
+    With a `cache`, a stored result for the same normalized code, scene,
+    Manim version and quality is returned without rendering (marked
+    `"cached": True`), and fresh results are stored.
+
+    Videos are discarded with the render's temp dir unless a `media_store`
+    is given, in which case the mp4 is moved into the store and a
+    thumbnail strip is made; both paths are returned.
+
+    With a `cap`, each scene switches to Manim's skip mode once it reaches
+    the cap (this implies `profile_scenes`); `cap_reached` reports whether
+    any scene did. Capped results are cached apart from full ones.
 
     Args:
         code: Python source code
         scene_name: Scene class to render (auto-detected if None)
-        timeout: Max seconds to wait
+        timeout: Max wall-clock seconds to wait
         quality: Manim quality flag (l=low, m=medium, h=high)
+        max_output_bytes: Combined stdout+stderr cap before the render is killed
+        limits: Resource limits (default: RenderLimits())
+        profile_scenes: Collect the scene-complexity profile
+        cache: Render-result cache to consult and fill (default: none)
+        media_store: Where to keep rendered videos (default: discard)
+        cap: Play-count / scene-time bounds for a capped render (default: full)
 
     Returns:
         {
@@ -129,9 +342,17 @@ def run_manim_code(
             "returncode": int,
             "stdout": str,
             "stderr": str,
-            "video_path": str | None,
-            "error_type": str | None,      # ImportError, AttributeError, etc.
+            "output_bytes": int,           # total bytes the render printed
+            "resources": {                 # wall/CPU time and peak RSS
+                "wall_s": float, "cpu_user_s": float | None,
+                "cpu_sys_s": float | None, "peak_rss_mb": float | None,
+            },
+            "video_path": str | None,      # in the media store, else None
+            "thumbnail_path": str | None,
+            "scene_profile": dict | None,  # {"scenes": {name: stats}} if profiled
+            "error_type": str | None,      # ImportError, Timeout, CPUTimeLimit, etc.
             "error_message": str | None,
+            "cap_reached": bool,           # only with `cap`
         }
     """
     # Auto-detect scene name if not provided
@@ -145,74 +366,207 @@ def run_manim_code(
                 "returncode": -1,
                 "stdout": "",
                 "stderr": "No Scene subclass found in code",
+                "output_bytes": 0,
+                "resources": _usage_dict(None, 0.0),
                 "video_path": None,
+                "thumbnail_path": None,
+                "scene_profile": None,
                 "error_type": "NoSceneClass",
                 "error_message": "No Scene subclass found in code",
             }
 
-    with tempfile.TemporaryDirectory(prefix="manibench_") as tmpdir:
-        # Write code to file
-        code_path = Path(tmpdir) / "scene.py"
-        code_path.write_text(code, encoding="utf-8")
-
-        # Build manim command
-        cmd = [
-            sys.executable, "-m", "manim", f"-q{quality}",
-            "--disable_caching",
-            "--media_dir", str(Path(tmpdir) / "media"),
-            str(code_path),
-            scene_name,
-        ]
-
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd=tmpdir,
+    limits = limits or RenderLimits()
+
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.key(code, scene_name, quality, variant=cap.label() if cap else "")
+        cached = cache.get(cache_key, timeout, limits,
+                           require_video=media_store is not None)
+        if cached is not None:
+            return cached
+
+    staging = media_store.staging_dir if media_store is not None else None
+    with tempfile.TemporaryDirectory(prefix="manibench_", dir=staging) as tmpdir:
+        result = _render_in_dir(
+            code, scene_name, Path(tmpdir), timeout, quality,
+            max_output_bytes, limits, profile_scenes or cap is not None, cap,
+        )
+        if cap is not None:
+            result["cap_reached"] = any(
+                s.get("capped_at_play") is not None
+                for s in (result["scene_profile"] or {}).get("scenes", {}).values()
+            )
+        result["thumbnail_path"] = None
+        if result["video_path"] and media_store is not None:
+            media = media_store.ingest(
+                result["video_path"], profiled_frame_count(result["scene_profile"]),
             )
+            result["video_path"] = media["video"]
+            result["thumbnail_path"] = media["thumbnail"]
+        else:
+            result["video_path"] = None     # deleted with the temp dir
+        if cache is not None:
+            cache.put(cache_key, result, timeout, limits)
+    return result
 
-            # Check for video output
-            video_path = None
-            media_dir = Path(tmpdir) / "media" / "videos" / "scene"
-            if media_dir.exists():
-                videos = list(media_dir.rglob("*.mp4"))
-                if videos:
-                    video_path = str(videos[0])
 
-            # Parse error type from stderr
-            error_type = None
-            error_message = None
-            if result.returncode != 0:
-                error_type, error_message = _parse_error(result.stderr)
+def profiled_frame_count(profile: dict[str, Any] | None) -> int | None:
+    """Total frames written according to the scene profile, if any."""
+    if not profile or not profile.get("scenes"):
+        return None
+    return sum(s.get("frames_rendered", 0) for s in profile["scenes"].values()) or None
 
-            return {
-                "success": result.returncode == 0,
-                "returncode": result.returncode,
-                "stdout": result.stdout[-2000:],  # Truncate
-                "stderr": result.stderr[-2000:],
-                "video_path": video_path,
-                "error_type": error_type,
-                "error_message": error_message,
-            }
 
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "returncode": -1,
-                "stdout": "",
-                "stderr": f"Timeout after {timeout}s",
-                "video_path": None,
-                "error_type": "Timeout",
-                "error_message": f"Rendering exceeded {timeout}s time limit",
-            }
+def _render_in_dir(
+    code: str,
+    scene_name: str,
+    tmpdir: Path,
+    timeout: int,
+    quality: str,
+    max_output_bytes: int,
+    limits: RenderLimits,
+    profile_scenes: bool,
+    cap: RenderCap | None = None,
+) -> dict[str, Any]:
+    """Render `scene_name` inside `tmpdir`; see `run_manim_code` for the result."""
+    # Write code to file
+    code_path = tmpdir / "scene.py"
+    code_path.write_text(code, encoding="utf-8")
+
+    # Build manim command, wrapped by the rlimit launcher
+    profile_path = tmpdir / "scene_profile.json"
+    if profile_scenes:
+        manim_cmd = [sys.executable, str(_PROFILER_SCRIPT), str(profile_path)]
+        if cap is not None and cap.max_plays is not None:
+            manim_cmd += ["--cap-plays", str(cap.max_plays)]
+        if cap is not None and cap.max_scene_s is not None:
+            manim_cmd += ["--cap-scene-s", str(cap.max_scene_s)]
+    else:
+        manim_cmd = [sys.executable, "-m", "manim"]
+    cmd = [
+        sys.executable, str(_SANDBOX_SCRIPT), json.dumps(limits.as_dict()),
+        *manim_cmd, f"-q{quality}",
+        "--disable_caching",
+        "--media_dir", str(tmpdir / "media"),
+        str(code_path),
+        scene_name,
+    ]
+
+    t0 = time.monotonic()
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=tmpdir,
+        start_new_session=True,     # own process group for killpg
+    )
+    capture = _OutputCapture(proc, RENDER_OUTPUT_TAIL_BYTES, max_output_bytes)
+    timed_out, rusage = _wait_with_usage(proc, timeout)
+    capture.join(timeout=5)
+    resources = _usage_dict(rusage, time.monotonic() - t0)
+
+    stdout = capture.stdout.text()
+    stderr = capture.stderr.text()
+    output_bytes = capture.stdout.total + capture.stderr.total
+    scene_profile = _read_profile(profile_path) if profile_scenes else None
+
+    if timed_out:
+        return {
+            "success": False,
+            "returncode": -1,
+            "stdout": stdout[-RENDER_OUTPUT_KEEP_CHARS:],
+            "stderr": f"Timeout after {timeout}s",
+            "output_bytes": output_bytes,
+            "resources": resources,
+            "video_path": None,
+            "scene_profile": scene_profile,
+            "error_type": "Timeout",
+            "error_message": f"Rendering exceeded {timeout}s time limit",
+        }
+
+    if capture.overflowed:
+        return {
+            "success": False,
+            "returncode": proc.returncode,
+            "stdout": stdout[-RENDER_OUTPUT_KEEP_CHARS:],
+            "stderr": stderr[-RENDER_OUTPUT_KEEP_CHARS:],
+            "output_bytes": output_bytes,
+            "resources": resources,
+            "video_path": None,
+            "scene_profile": scene_profile,
+            "error_type": "OutputLimitExceeded",
+            "error_message": (
+                f"Render output exceeded {max_output_bytes} bytes; process killed"
+            ),
+        }
+
+    # Check for video output
+    video_path = None
+    media_dir = tmpdir / "media" / "videos" / "scene"
+    if media_dir.exists():
+        videos = list(media_dir.rglob("*.mp4"))
+        if videos:
+            video_path = str(videos[0])
+
+    # Parse error type from the exit signal, else from stderr
+    error_type = None
+    error_message = None
+    if proc.returncode != 0:
+        error_type, error_message = _signal_error(proc.returncode)
+        if error_type is None:
+            error_type, error_message = _parse_error(stderr)
+
+    return {
+        "success": proc.returncode == 0,
+        "returncode": proc.returncode,
+        "stdout": stdout[-RENDER_OUTPUT_KEEP_CHARS:],  # Truncate
+        "stderr": stderr[-RENDER_OUTPUT_KEEP_CHARS:],
+        "output_bytes": output_bytes,
+        "resources": resources,
+        "video_path": video_path,
+        "scene_profile": scene_profile,
+        "error_type": error_type,
+        "error_message": error_message,
+    }
+
+
+def _audit_capped(
+    code: str,
+    full: dict[str, Any],
+    cap: RenderCap,
+    timeout: int,
+    limits: RenderLimits | None,
+    cache: RenderCache | None,
+) -> dict[str, Any]:
+    """Capped verdict for a fully rendered sample, rendering only if it can differ."""
+    derived = not cap_reached(full["scene_profile"], cap)
+    capped = full if derived else run_manim_code(
+        code, timeout=timeout, limits=limits, cache=cache, cap=cap,
+    )
+    return {
+        "capped_success": capped["success"],
+        "capped_error_type": capped["error_type"],
+        "capped_wall_s": None if derived else capped["resources"]["wall_s"],
+        "full_wall_s": full["resources"]["wall_s"],
+        "derived": derived,
+        "agree": capped["success"] == full["success"],
+    }
+
+
+def _read_profile(path: Path) -> dict[str, Any] | None:
+    """Load the profile written by scene_profiler.py, if any."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 
 def _parse_error(stderr: str) -> tuple[str | None, str | None]:
     """Extract error type and message from stderr."""
     # Look for common Python exception patterns
     patterns = [
+        (r"(OSError):\s*\[Errno 27\]\s*(.+)", "FileSizeLimit"),   # EFBIG from RLIMIT_FSIZE
         (r"(ImportError|ModuleNotFoundError):\s*(.+)", "ImportError"),
         (r"(AttributeError):\s*(.+)", "AttributeError"),
         (r"(TypeError):\s*(.+)", "TypeError"),
@@ -222,6 +576,7 @@ def _parse_error(stderr: str) -> tuple[str | None, str | None]:
         (r"(KeyError):\s*(.+)", "KeyError"),
         (r"(IndexError):\s*(.+)", "IndexError"),
         (r"(FileNotFoundError):\s*(.+)", "FileNotFoundError"),
+        (r"(MemoryError)\b:?\s*(.*)", "MemoryError"),
         (r"(Exception):\s*(.+)", "Exception"),
     ]
     for pattern, etype in patterns:
@@ -234,7 +589,17 @@ def _parse_error(stderr: str) -> tuple[str | None, str | None]:
     return None, None
 
 
-def compute_executability(code: str, timeout: int = 60, skip_render: bool = False) -> dict[str, Any]:
+def compute_executability(
+    code: str,
+    timeout: int = 60,
+    skip_render: bool = False,
+    limits: RenderLimits | None = None,
+    cache: RenderCache | None = None,
+    media_store: MediaStore | None = None,
+    api_check: str = "off",
+    cap: RenderCap | None = None,
+    audit: bool = False,
+) -> dict[str, Any]:
     """
     Full executability check pipeline.
 
@@ -242,6 +607,15 @@ def compute_executability(code: str, timeout: int = 60, skip_render: bool = Fals
         code: The generated Python/Manim code to check.
         timeout: Seconds to allow for Manim rendering.
         skip_render: If True, skip actual Manim execution (static analysis only).
+        limits: Resource limits for the render (default: RenderLimits()).
+        cache: Render-result cache; a hit skips rendering entirely.
+        media_store: Keep the rendered video (and thumbnail) here.
+        api_check: "off", "flag" (record predicted failures, render anyway)
+            or "skip" (fail predicted failures without rendering; this also
+            applies with skip_render).
+        cap: Render only up to these bounds (the rest in skip mode).
+        audit: With `cap`, render in full instead and also record the
+            capped verdict under "render_audit".
 
     Returns:
         {
@@ -254,9 +628,40 @@ def compute_executability(code: str, timeout: int = 60, skip_render: bool = Fals
             "error_type": str | None,
             "error_message": str | None,
             "scene_names": list[str],
+            "render_resources": dict | None,   # wall/CPU time + peak RSS when rendered
+            "scene_profile": dict | None,      # per-scene complexity when rendered
+            "render_cached": bool,             # result came from the render cache
+            "render_timeout_s": int | None,    # timeout the render ran under
+            "render_tier": str | None,         # "full" or "capped" when rendered
+            "cap_reached": bool | None,        # capped render skipped part of a scene
+            "render_audit": dict | None,       # capped vs. full verdicts (audited samples)
+            "media": dict | None,              # {"video", "thumbnail"} if stored
+            "api_check": dict | None,          # findings when api_check != "off"
+            "render_skipped": bool,            # failed on a prediction, not rendered
         }
     """
-    result = {
+    result = new_executability_result()
+    if not (apply_syntax_check(result, code) and apply_import_check(result, code)
+            and apply_scene_check(result, code)
+            and apply_api_check(result, code, api_check)):
+        return result
+    return apply_render(
+        result, code, timeout=timeout, skip_render=skip_render,
+        limits=limits, cache=cache, media_store=media_store,
+        cap=cap, audit=audit,
+    )
+
+
+# ── Steps ─────────────────────────────────────────────────────────────────
+#
+# Each step fills its fields of an executability result and returns False
+# once the verdict is decided, so later steps (above all the render) can
+# be skipped. compute_executability runs them in order; the metric
+# pipeline (pipeline.py) schedules them as separate stages.
+
+def new_executability_result() -> dict[str, Any]:
+    """An executability result before any step has run."""
+    return {
         "executability": 0,
         "syntax_valid": False,
         "has_scene": False,
@@ -266,41 +671,134 @@ def compute_executability(code: str, timeout: int = 60, skip_render: bool = Fals
         "error_type": None,
         "error_message": None,
         "scene_names": [],
+        "render_resources": None,
+        "scene_profile": None,
+        "render_cached": False,
+        "render_timeout_s": None,
+        "render_tier": None,
+        "cap_reached": None,
+        "render_audit": None,
+        "media": None,
+        "api_check": None,
+        "render_skipped": False,
     }
 
-    # Step 1: Syntax check
+
+def apply_syntax_check(result: dict[str, Any], code: str) -> bool:
     syntax = check_syntax(code)
     result["syntax_valid"] = syntax["valid"]
     if not syntax["valid"]:
         result["error_type"] = "SyntaxError"
         result["error_message"] = syntax["error"]
-        return result
+        return False
+    return True
+
 
-    # Step 2: Import check
+def apply_import_check(result: dict[str, Any], code: str) -> bool:
     imports = check_imports(code)
     result["has_manim_import"] = imports["has_manim_import"]
     result["has_gl_import"] = imports["has_gl_import"]
+    return True
 
-    # Step 3: Scene class check
+
+def apply_scene_check(result: dict[str, Any], code: str) -> bool:
     scene = check_scene_class(code)
     result["has_scene"] = scene["has_scene"]
     result["scene_names"] = scene["scene_names"]
     if not scene["has_scene"]:
         result["error_type"] = "NoSceneClass"
         result["error_message"] = "No Scene subclass found"
-        return result
+        return False
+    return True
+
 
-    # Step 4: Execution (skip if requested)
+_api_index_warned = False
+
+
+def apply_api_check(result: dict[str, Any], code: str, mode: str = "off") -> bool:
+    """
+    API check against the installed Manim's index. Without one (Manim not
+    installed, or the index build failed) the sample is marked
+    `"status": "unavailable"` and goes on to render; warns once per process.
+    """
+    global _api_index_warned
+    if mode == "off":
+        return True
+    index = load_api_index()
+    if index is None:
+        result["api_check"] = {
+            "checked": False, "status": "unavailable", "manim_version": None,
+            "errors": [], "warnings": [], "predicted_error": None,
+        }
+        if not _api_index_warned:
+            _api_index_warned = True
+            warnings.warn(
+                f"api_check={mode!r}: no Manim API index is available (is Manim CE "
+                "installed? try `make api-index`); samples are rendered unchecked",
+                RuntimeWarning, stacklevel=2,
+            )
+        return True
+    check = check_api(code, index)
+    result["api_check"] = check
+    if check["errors"] and mode == "skip":
+        first = check["errors"][0]
+        result["error_type"] = first["error_type"]
+        result["error_message"] = f"Predicted (line {first['line']}): {first['message']}"
+        result["render_skipped"] = True
+        return False
+    return True
+
+
+def apply_render(
+    result: dict[str, Any],
+    code: str,
+    timeout: int = 60,
+    skip_render: bool = False,
+    limits: RenderLimits | None = None,
+    cache: RenderCache | None = None,
+    media_store: MediaStore | None = None,
+    cap: RenderCap | None = None,
+    audit: bool = False,
+) -> dict[str, Any]:
+    """
+    Render (unless `skip_render`) and set the final verdict; returns `result`.
+
+    With `cap` the render is capped, unless `audit`: then it is rendered in
+    full and scored on that, and the capped verdict is recorded beside it.
+    """
     if skip_render:
         # Static analysis passed — count as executable
         result["render_success"] = True
         result["executability"] = 1
         return result
 
-    render = run_manim_code(code, timeout=timeout)
+    capped = cap is not None and not audit
+    render = run_manim_code(
+        code, timeout=timeout, limits=limits, cache=cache, media_store=media_store,
+        cap=cap if capped else None,
+    )
     result["render_success"] = render["success"]
     result["error_type"] = render["error_type"]
     result["error_message"] = render["error_message"]
+    result["render_resources"] = render["resources"]
+    result["scene_profile"] = render["scene_profile"]
+    result["render_cached"] = render.get("cached", False)
+    result["render_timeout_s"] = timeout
+    result["render_tier"] = "capped" if capped else "full"
+    if capped:
+        result["cap_reached"] = render.get("cap_reached", False)
+    elif cap is not None:
+        result["render_audit"] = _audit_capped(code, render, cap, timeout, limits, cache)
+    if render["video_path"]:
+        result["media"] = {
+            "video": render["video_path"],
+            "thumbnail": render["thumbnail_path"],
+        }
+
+    if result["api_check"] and result["api_check"]["predicted_error"]:
+        result["api_check"]["confirmed"] = (
+            render["error_type"] == result["api_check"]["predicted_error"]
+        )
 
     # Final verdict
     result["executability"] = 1 if render["success"] else 0
@@ -0,0 +1,260 @@
+"""
+Frame-Based Alignment (optional)
+==================================
+Render-grounded companion to the keyword-based alignment metric, used
+when videos are kept (`--save-video --frame-alignment`).
+
+A handful of frames are decoded from the rendered video in one ffmpeg
+pass — downscaled to FRAME_SAMPLE_SIZE and written as raw RGB to a temp
+file that is read back through `numpy.memmap` — and summarized with
+cheap vectorized statistics:
+
+  - content mass   fraction of pixels that differ from the background
+  - change energy  mean absolute difference to the previous sampled frame
+                   (undefined for the first frame, which is left out of scoring)
+  - color spread   entropy of a 64-bin RGB histogram
+
+Each required visual event's `timing` hint (scene_start, after_transform,
+continuous_throughout, ...) is mapped to a window of normalized scene time,
+and the event's visual support is how consistently that window shows
+content and motion:
+
+    support = 0.5 × (frames with content) + 0.5 × (frames with change)
+
+    frame_alignment_score = Σ(weight_i × support_i) / Σ(weight_i)
+
+Samples are spread over the whole video: by frame index when the rendered
+frame count is known, otherwise by the duration reported by ffprobe. If
+neither is available the video is not scored, since frames bunched at the
+start would be mapped across the whole scene time.
+
+This is a diagnostic, not a replacement for `alignment_score`: it cannot
+tell *what* is on screen, only whether something is there and moving when
+the problem says it should be.
+
+NumPy is imported on first use, so importing the metrics package stays cheap.
+"""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from evaluation.config import FRAME_SAMPLE_COUNT, FRAME_SAMPLE_SIZE
+
+DECODE_TIMEOUT = 60            # seconds for the ffmpeg decode pass
+_BG_TOLERANCE = 24             # max channel difference still counted as background
+_CONTENT_MIN = 0.002           # content mass above which a frame "has content"
+_CHANGE_MIN = 1.0              # change energy (0–255 scale) that counts as motion
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Timing-hint fragments → normalized (start, end) window; first match wins
+_TIMING_WINDOWS: list[tuple[tuple[str, ...], tuple[float, float]]] = [
+    (("continuous", "throughout", "repeated", "gradual", "progressive",
+      "visible_across", "each_", "sequential", "synchronized", "persistent"), (0.0, 1.0)),
+    (("scene_start",), (0.0, 0.25)),
+    (("scene_end", "end_of"), (0.75, 1.0)),
+    (("before_",), (0.0, 0.5)),
+    (("during", "main_animation", "mid_scene", "first_"), (0.2, 0.8)),
+    (("after_", "second_"), (0.5, 1.0)),
+]
+
+
+def timing_window(timing: str | None) -> tuple[float, float]:
+    """Map a `timing` hint to a (start, end) window in [0, 1] scene time."""
+    hint = (timing or "").lower()
+    for fragments, window in _TIMING_WINDOWS:
+        if any(f in hint for f in fragments):
+            return window
+    return (0.0, 1.0)
+
+
+def probe_duration(video_path: str | Path) -> float | None:
+    """Video duration in seconds via ffprobe, or None if it cannot be read."""
+    if shutil.which("ffprobe") is None:
+        return None
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", str(video_path)],
+            capture_output=True,
+            text=True,
+            timeout=DECODE_TIMEOUT,
+            check=True,
+        ).stdout
+        duration = float(out.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    return duration if duration > 0 else None
+
+
+def sample_frames(
+    video_path: str | Path,
+    n_frames: int = FRAME_SAMPLE_COUNT,
+    total_frames: int | None = None,
+    size: tuple[int, int] = FRAME_SAMPLE_SIZE,
+) -> np.ndarray | None:
+    """
+    Decode up to `n_frames` evenly spaced frames as a (n, h, w, 3) uint8 array.
+
+    Without `total_frames` the spacing comes from the probed duration.
+    Returns None if ffmpeg is unavailable, the spacing cannot be
+    determined, or decoding fails.
+    """
+    if shutil.which("ffmpeg") is None:
+        return None
+    import numpy as np
+
+    width, height = size
+    if total_frames:
+        step = max(1, total_frames // n_frames)
+        pick = f"select='not(mod(n\\,{step}))'"
+    else:
+        duration = probe_duration(video_path)
+        if duration is None:
+            return None
+        pick = f"fps={n_frames / duration:.6f}"
+
+    with tempfile.NamedTemporaryFile(prefix="manibench_frames_", suffix=".rgb") as tmp:
+        try:
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-i", str(video_path),
+                 "-vf", f"{pick},scale={width}:{height}",
+                 "-frames:v", str(n_frames),
+                 "-f", "rawvideo", "-pix_fmt", "rgb24", tmp.name],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=DECODE_TIMEOUT,
+                check=True,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+        frame_bytes = width * height * 3
+        n = Path(tmp.name).stat().st_size // frame_bytes
+        if n == 0:
+            return None
+        frames = np.memmap(tmp.name, dtype=np.uint8, mode="r", shape=(n, height, width, 3))
+        return np.array(frames)    # copy out before the temp file is removed
+
+
+def frame_statistics(frames: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Per-frame content mass, change energy, and color entropy (vectorized).
+
+    Change energy of the first frame has no predecessor and is reported as 0.
+    """
+    import numpy as np
+
+    n = frames.shape[0]
+
+    # Background = median border colour across all sampled frames
+    border = np.concatenate([
+        frames[:, 0, :, :], frames[:, -1, :, :],
+        frames[:, :, 0, :], frames[:, :, -1, :],
+    ], axis=1).reshape(-1, 3)
+    background = np.median(border, axis=0).astype(np.int16)
+
+    diff_bg = np.abs(frames.astype(np.int16) - background).max(axis=-1)
+    content_mass = (diff_bg > _BG_TOLERANCE).mean(axis=(1, 2))
+
+    change = np.zeros(n)
+    if n > 1:
+        change[1:] = np.abs(np.diff(frames.astype(np.int16), axis=0)).mean(axis=(1, 2, 3))
+
+    # 4×4×4 RGB histogram per frame via one bincount over offset bin ids
+    q = (frames >> 6).astype(np.int32)
+    bins = (q[..., 0] << 4) | (q[..., 1] << 2) | q[..., 2]
+    bins = bins.reshape(n, -1) + (np.arange(n)[:, None] * 64)
+    hist = np.bincount(bins.ravel(), minlength=n * 64).reshape(n, 64).astype(float)
+    p = hist / hist.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = -np.nansum(np.where(p > 0, p * np.log2(p), 0.0), axis=1)
+
+    return {
+        "content_mass": content_mass,
+        "change_energy": change,
+        "color_entropy": entropy,
+    }
+
+
+def compute_frame_alignment(
+    video_path: str | Path,
+    required_visual_events: list[dict],
+    total_frames: int | None = None,
+    n_frames: int = FRAME_SAMPLE_COUNT,
+) -> dict[str, Any] | None:
+    """
+    Score visual support for each required event from sampled frames.
+
+    Args:
+        video_path: Rendered mp4
+        required_visual_events: Problem events with "weight" and "timing"
+        total_frames: Frame count if known (spaces the samples evenly)
+        n_frames: Frames to sample
+
+    Returns:
+        None if frames could not be decoded or spaced over the video, else
+        {
+            "frame_alignment_score": float (0.0–1.0),
+            "n_frames": int,
+            "content_mass": [float, ...],     # per sampled frame
+            "change_energy": [float, ...],
+            "color_entropy_mean": float,
+            "per_event": [
+                {"event": str, "timing": str, "window": [float, float],
+                 "support": float},
+                ...
+            ],
+        }
+    """
+    frames = sample_frames(video_path, n_frames, total_frames)
+    if frames is None:
+        return None
+    import numpy as np
+
+    stats = frame_statistics(frames)
+    n = frames.shape[0]
+    t = (np.arange(n) + 0.5) / n       # sample midpoints in normalized time
+    has_prev = np.arange(n) > 0        # frame 0 has no change energy to score
+
+    per_event = []
+    total_weight = 0.0
+    weighted = 0.0
+    for spec in required_visual_events:
+        start, end = timing_window(spec.get("timing"))
+        in_window = (t >= start) & (t <= end)
+        if not in_window.any():
+            in_window[np.argmin(np.abs(t - (start + end) / 2))] = True
+        has_content = (stats["content_mass"][in_window] > _CONTENT_MIN).mean()
+        moving = in_window & has_prev
+        if moving.any():
+            has_change = (stats["change_energy"][moving] > _CHANGE_MIN).mean()
+        else:
+            has_change = has_content    # no motion evidence either way
+        support = 0.5 * has_content + 0.5 * has_change
+
+        weight = float(spec.get("weight", 1.0))
+        total_weight += weight
+        weighted += weight * support
+        per_event.append({
+            "event": spec.get("event", spec.get("id", "")),
+            "timing": spec.get("timing"),
+            "window": [start, end],
+            "support": round(float(support), 4),
+        })
+
+    score = weighted / total_weight if total_weight else 1.0
+    return {
+        "frame_alignment_score": round(float(score), 4),
+        "n_frames": int(n),
+        "content_mass": [round(float(x), 4) for x in stats["content_mass"]],
+        "change_energy": [round(float(x), 3) for x in stats["change_energy"]],
+        "color_entropy_mean": round(float(stats["color_entropy"].mean()), 4),
+        "per_event": per_event,
+    }
@@ -0,0 +1,174 @@
+"""
+Rendered-Media Store
+======================
+Opt-in home for rendered videos (`EvalConfig.save_video`), so reviewers can
+browse outputs without re-rendering.
+
+Layout under MEDIA_DIR:
+
+    videos/<ab>/<blake2>.mp4     content-addressed video
+    thumbs/<ab>/<blake2>.jpg     thumbnail strip (one row of frames)
+    index.jsonl                  (model, strategy, problem, trial) → media
+    .staging/                    render temp dirs live here
+
+Renders run in a temp dir under `.staging/`, on the same filesystem as the
+store, so a finished video is *moved* (`os.replace`) into place rather than
+copied. Identical videos collapse onto one file. The thumbnail strip comes
+from a single ffmpeg pass over the stored video and is skipped when ffmpeg
+is not on PATH.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any
+
+from evaluation.config import MEDIA_DIR
+
+THUMB_FRAMES = 8          # frames per strip
+THUMB_WIDTH = 160         # px per frame
+THUMB_TIMEOUT = 60        # seconds for the ffmpeg pass
+
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class MediaStore:
+    """Content-addressed video store with thumbnail strips and a sample index."""
+
+    def __init__(self, root: Path | str = MEDIA_DIR, thumbnails: bool = True):
+        self.root = Path(root)
+        self.thumbnails = thumbnails and shutil.which("ffmpeg") is not None
+        self.index_path = self.root / "index.jsonl"
+        self._lock = threading.Lock()
+
+    # Locks do not pickle; drop on the way out so the store can be shipped
+    # to process-pool workers.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def staging_dir(self) -> Path:
+        """Parent for render temp dirs (same filesystem as the store)."""
+        path = self.root / ".staging"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    # ── Ingest ─────────────────────────────────────────────────────────
+
+    def ingest(self, video_path: str | Path, total_frames: int | None = None) -> dict[str, Any]:
+        """
+        Move a freshly rendered video into the store.
+
+        Args:
+            video_path: The render's mp4 (consumed: moved or deleted).
+            total_frames: Frame count if known (from the scene profile);
+                used to space the thumbnail frames evenly.
+
+        Returns:
+            {"video": str, "thumbnail": str | None, "digest": str}
+        """
+        src = Path(video_path)
+        digest = _file_digest(src)
+        dest = self.root / "videos" / digest[:2] / f"{digest}.mp4"
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            src.unlink(missing_ok=True)        # identical video already stored
+        else:
+            try:
+                os.replace(src, dest)
+            except OSError:
+                shutil.move(str(src), dest)    # different filesystem
+
+        thumb = self.root / "thumbs" / digest[:2] / f"{digest}.jpg"
+        if not thumb.exists() and self.thumbnails:
+            self._make_thumbnail(dest, thumb, total_frames)
+
+        return {
+            "video": str(dest),
+            "thumbnail": str(thumb) if thumb.exists() else None,
+            "digest": digest,
+        }
+
+    def _make_thumbnail(self, video: Path, thumb: Path, total_frames: int | None):
+        """Write a THUMB_FRAMES-wide strip with one ffmpeg decode pass."""
+        if total_frames:
+            step = max(1, total_frames // THUMB_FRAMES)
+            pick = f"select='not(mod(n\\,{step}))'"
+        else:
+            pick = "fps=1"
+        vf = f"{pick},scale={THUMB_WIDTH}:-2,tile={THUMB_FRAMES}x1"
+        thumb.parent.mkdir(parents=True, exist_ok=True)
+        tmp = thumb.with_suffix(".tmp.jpg")
+        try:
+            subprocess.run(
+                ["ffmpeg", "-v", "error", "-y", "-i", str(video),
+                 "-vf", vf, "-frames:v", "1", str(tmp)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=THUMB_TIMEOUT,
+                check=True,
+            )
+            os.replace(tmp, thumb)
+        except (OSError, subprocess.SubprocessError):
+            tmp.unlink(missing_ok=True)
+
+    # ── Index ──────────────────────────────────────────────────────────
+
+    @staticmethod
+    def sample_key(model: str, strategy: str, problem_id: str, trial: int) -> str:
+        return f"{model}/{strategy}/{problem_id}/trial{trial}"
+
+    def index(
+        self,
+        model: str,
+        strategy: str,
+        problem_id: str,
+        trial: int,
+        media: dict[str, Any],
+    ) -> None:
+        """Record which stored video belongs to a sample (latest entry wins)."""
+        entry = {
+            "key": self.sample_key(model, strategy, problem_id, trial),
+            "model": model,
+            "strategy": strategy,
+            "problem_id": problem_id,
+            "trial": trial,
+            **media,
+        }
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def load_index(self) -> dict[str, dict[str, Any]]:
+        """Return {sample_key: media entry}, keeping the latest per sample."""
+        index: dict[str, dict[str, Any]] = {}
+        if not self.index_path.exists():
+            return index
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                index[entry["key"]] = entry
+        return index
@@ -0,0 +1,307 @@
+"""
+Metric Pipeline
+=================
+Schedules the scoring of one sample as stages that declare a cost and
+their dependencies:
+
+    stage              cost (≈ms)  requires
+    syntax                 1.2
+    imports                1.8     syntax
+    scene                  1.7     syntax
+    api_check              5       scene
+    version_conflict       1
+    alignment              0.5
+    coverage               4
+    render             20000       imports, scene, api_check
+    frame_alignment     2000       render
+    reference_similarity   2       syntax
+
+(static costs are per-sample means over generated_code/; each run's
+actual stage times are reported under "pipeline").
+
+Stages run cheapest-first among those whose dependencies are done. A
+stage that decides the outcome (invalid syntax, no Scene class, a
+predicted failure under `api_check="skip"`) vetoes every stage that
+depends on it, so the render only runs when cheap checks leave the
+verdict open.
+
+Stages costing DEFER_COST_MS or more are deferred: before the first of
+them starts, `on_partial` receives the metrics known so far (executability
+pending), so callers can publish static results immediately and patch in
+the render verdict when it arrives. With `skip_render` nothing slow is
+left, so no partial is sent.
+
+The assembled result has the same shape as before the pipeline existed,
+plus a "pipeline" entry with each stage's status and wall time.
+"""
+
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from evaluation.config import RenderCap, RenderLimits
+from evaluation.metrics.alignment import compute_alignment
+from evaluation.metrics.coverage import compute_coverage
+from evaluation.metrics.executability import (
+    apply_api_check,
+    apply_import_check,
+    apply_render,
+    apply_scene_check,
+    apply_syntax_check,
+    new_executability_result,
+    profiled_frame_count,
+)
+from evaluation.metrics.frame_alignment import compute_frame_alignment
+from evaluation.metrics.media_store import MediaStore
+from evaluation.metrics.reference_similarity import compute_reference_similarity
+from evaluation.metrics.render_cache import RenderCache
+from evaluation.metrics.render_tiers import audit_selected
+from evaluation.metrics.version_conflict import (
+    detect_specific_conflicts,
+    detect_version_conflicts,
+)
+
+DEFER_COST_MS = 1000            # stages at or above this wait behind on_partial
+
+
+@dataclass
+class MetricContext:
+    """Inputs and accumulated results for scoring one sample."""
+    code: str
+    problem: dict
+    skip_render: bool = False
+    manim_timeout: int = 60
+    render_limits: RenderLimits | None = None
+    render_cache: RenderCache | None = None
+    render_mode: str = "full"       # full | capped | tiered (render_tiers.py)
+    render_cap: RenderCap | None = None
+    audit_fraction: float = 0.0
+    seed: int = 42
+    media_store: MediaStore | None = None
+    frame_alignment: bool = False
+    reference_similarity: bool = False
+    api_check: str = "off"
+    dedup: Any = None               # SampleDeduper: share renders by fingerprint
+    fingerprint: str | None = None
+    executability: dict[str, Any] = field(default_factory=new_executability_result)
+    results: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One unit of scoring. `run` returns False when it decides the outcome,
+    which vetoes every stage that (transitively) requires it.
+    """
+    name: str
+    cost_ms: float
+    run: Callable[[MetricContext], bool | None]
+    requires: tuple[str, ...] = ()
+
+    @property
+    def deferred(self) -> bool:
+        return self.cost_ms >= DEFER_COST_MS
+
+
+# ── Stages ────────────────────────────────────────────────────────────────
+
+def _syntax(ctx: MetricContext) -> bool:
+    return apply_syntax_check(ctx.executability, ctx.code)
+
+
+def _imports(ctx: MetricContext) -> bool:
+    return apply_import_check(ctx.executability, ctx.code)
+
+
+def _scene(ctx: MetricContext) -> bool:
+    return apply_scene_check(ctx.executability, ctx.code)
+
+
+def _api_check(ctx: MetricContext) -> bool:
+    return apply_api_check(ctx.executability, ctx.code, ctx.api_check)
+
+
+def _version_conflict(ctx: MetricContext) -> None:
+    known_incompat = []
+    vcn = ctx.problem.get("version_conflict_notes", {})
+    if isinstance(vcn, dict):
+        known_incompat = vcn.get("known_incompatibilities", [])
+    ctx.results["version_conflict"] = {
+        **detect_version_conflicts(ctx.code),
+        "problem_specific": detect_specific_conflicts(ctx.code, known_incompat),
+    }
+
+
+def _alignment(ctx: MetricContext) -> None:
+    ctx.results["alignment"] = compute_alignment(
+        ctx.code, ctx.problem.get("required_visual_events", []),
+    )
+
+
+def _coverage(ctx: MetricContext) -> None:
+    ctx.results["coverage"] = compute_coverage(
+        ctx.code, ctx.problem.get("coverage_requirements", []),
+    )
+
+
+def _render(ctx: MetricContext) -> None:
+    static = ctx.executability
+    cap = None
+    if ctx.render_mode in ("capped", "tiered"):
+        cap = ctx.render_cap or RenderCap()
+    audit = ctx.render_mode == "tiered" and audit_selected(
+        ctx.code, ctx.audit_fraction, ctx.seed,
+    )
+
+    def compute() -> dict[str, Any]:
+        return apply_render(
+            dict(static), ctx.code,
+            timeout=ctx.manim_timeout,
+            skip_render=ctx.skip_render,
+            limits=ctx.render_limits,
+            cache=ctx.render_cache,
+            media_store=ctx.media_store,
+            cap=cap,
+            audit=audit,
+        )
+
+    if ctx.dedup is not None and ctx.fingerprint:
+        # Same code under another timeout or render cap can get another verdict
+        variant = f"{cap.label() if cap else 'full'}{'-audit' if audit else ''}"
+        key = f"{ctx.fingerprint}:t{ctx.manim_timeout}:{variant}"
+        result, reused = ctx.dedup.executability(key, compute)
+        result["render_reused"] = reused
+    else:
+        result = compute()
+    ctx.executability = result
+
+
+def _frame_alignment(ctx: MetricContext) -> None:
+    media = ctx.executability.get("media")
+    if ctx.frame_alignment and media:
+        ctx.results["frame_alignment"] = compute_frame_alignment(
+            media["video"],
+            ctx.problem.get("required_visual_events", []),
+            total_frames=profiled_frame_count(ctx.executability.get("scene_profile")),
+        )
+
+
+def _reference_similarity(ctx: MetricContext) -> None:
+    if ctx.reference_similarity:
+        ctx.results["reference_similarity"] = compute_reference_similarity(
+            ctx.code, ctx.problem,
+        )
+
+
+METRIC_STAGES: tuple[Stage, ...] = (
+    Stage("syntax", 1.2, _syntax),
+    Stage("imports", 1.8, _imports, requires=("syntax",)),
+    Stage("scene", 1.7, _scene, requires=("syntax",)),
+    Stage("api_check", 5, _api_check, requires=("scene",)),
+    Stage("version_conflict", 1, _version_conflict),
+    Stage("alignment", 0.5, _alignment),
+    Stage("coverage", 4, _coverage),
+    Stage("render", 20000, _render, requires=("imports", "scene", "api_check")),
+    Stage("frame_alignment", 2000, _frame_alignment, requires=("render",)),
+    Stage("reference_similarity", 2, _reference_similarity, requires=("syntax",)),
+)
+
+
+# ── Scheduling ────────────────────────────────────────────────────────────
+
+class MetricPipeline:
+    """Runs stages cheapest-first in dependency order, honouring vetoes."""
+
+    def __init__(self, stages: tuple[Stage, ...] = METRIC_STAGES):
+        names = [s.name for s in stages]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate stage names: {names}")
+        for s in stages:
+            unknown = set(s.requires) - set(names)
+            if unknown:
+                raise ValueError(f"Stage {s.name!r} requires unknown {sorted(unknown)}")
+        self.stages = stages
+        self.order = self._schedule(stages)
+
+    @staticmethod
+    def _schedule(stages: tuple[Stage, ...]) -> list[Stage]:
+        """Topological order, picking the cheapest ready stage each time."""
+        position = {s.name: i for i, s in enumerate(stages)}
+        waiting = {s.name: set(s.requires) for s in stages}
+        ready = [(s.cost_ms, position[s.name], s) for s in stages if not s.requires]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, _, stage = heapq.heappop(ready)
+            order.append(stage)
+            for s in stages:
+                if stage.name in waiting[s.name]:
+                    waiting[s.name].discard(stage.name)
+                    if not waiting[s.name]:
+                        heapq.heappush(ready, (s.cost_ms, position[s.name], s))
+        if len(order) != len(stages):
+            raise ValueError("Stage dependencies contain a cycle")
+        return order
+
+    def run(
+        self,
+        ctx: MetricContext,
+        on_partial: Callable[[dict[str, Any]], None] | None = None,
+    ) -> dict[str, Any]:
+        """Score `ctx` and return the assembled metrics."""
+        status: dict[str, dict[str, Any]] = {}
+        vetoed: dict[str, str] = {}     # stage → stage that decided the outcome
+        partial_sent = False
+        for stage in self.order:
+            blocked = [r for r in stage.requires if r in vetoed]
+            if blocked:
+                vetoed[stage.name] = vetoed[blocked[0]]
+                status[stage.name] = {
+                    "status": "skipped", "ms": 0.0, "decided_by": vetoed[blocked[0]],
+                }
+                continue
+            if stage.deferred and not partial_sent and not ctx.skip_render:
+                partial_sent = True
+                if on_partial is not None:
+                    on_partial(self.assemble(ctx, status, pending=True))
+            t0 = time.perf_counter()
+            outcome = stage.run(ctx)
+            status[stage.name] = {
+                "status": "ran",
+                "ms": round((time.perf_counter() - t0) * 1000, 3),
+            }
+            if outcome is False:
+                vetoed[stage.name] = stage.name
+                status[stage.name]["decided"] = True
+        return self.assemble(ctx, status)
+
+    @staticmethod
+    def assemble(
+        ctx: MetricContext,
+        status: dict[str, dict[str, Any]],
+        pending: bool = False,
+    ) -> dict[str, Any]:
+        """Metrics in the compute_all_metrics shape (executability None while pending)."""
+        vc = ctx.results.get("version_conflict", {})
+        align = ctx.results.get("alignment", {})
+        cov = ctx.results.get("coverage", {})
+        return {
+            "executability": None if pending else ctx.executability,
+            "version_conflict": vc,
+            "alignment": align,
+            "coverage": cov,
+            "frame_alignment": ctx.results.get("frame_alignment"),
+            "reference_similarity": ctx.results.get("reference_similarity"),
+            "pipeline": {"stages": {k: dict(v) for k, v in status.items()}, "pending": pending},
+            # Summary scalars (for quick aggregation)
+            "_scores": {
+                "executability": None if pending else ctx.executability.get("executability", 0),
+                "version_conflict_rate": vc.get("version_conflict_rate", 1.0),
+                "alignment_score": align.get("alignment_score", 0.0),
+                "coverage_score": cov.get("coverage_score", 0.0),
+            },
+        }
+
+
+METRIC_PIPELINE = MetricPipeline()
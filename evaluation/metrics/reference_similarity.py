@@ -0,0 +1,353 @@
+"""
+Reference Similarity
+======================
+Optional diagnostic (`--reference-similarity`): how closely a sample's
+code structure follows its problem's 3Blue1Brown reference scenes in
+raw_code/. Not part of the four headline metrics; high values on a
+ManimGL-only idiom are a memorization signal, low values are normal (the
+references target ManimGL, samples target Manim CE).
+
+Features, per scene class (references) or per sample (all of its code):
+
+  - AST n-grams    REFERENCE_AST_NGRAM consecutive node types in a
+                   pre-order walk (expression contexts dropped)
+  - API calls      called names (`FadeIn`, `.shift`, ...) in source order,
+                   as unigrams and bigrams
+
+weighted TF-IDF: sublinear term frequency, smoothed IDF over every class
+in raw_code/.
+
+Index: built once and stored at REFERENCE_INDEX_PATH (numpy .npz). For
+each problem it holds the L2-normalized TF-IDF rows of its reference
+scenes — the classes of its `raw_code_files` named in
+`reference_code_analysis.scene_classes` (all their classes if none are
+named) — restricted to the problem's own feature columns. The index is
+rebuilt automatically when raw_code/ or the dataset changes.
+
+Scoring a sample is one dictionary pass over its features and one
+matrix-vector product with its problem's rows, so the cost does not grow
+with the rest of the corpus:
+
+    reference_similarity   max cosine over the problem's reference scenes
+    centroid_similarity    cosine to the mean of those scenes
+    top_matches            the REFERENCE_TOP_SCENES best scenes
+
+Usage:
+    python -m evaluation.metrics.reference_similarity build
+    python -m evaluation.metrics.reference_similarity score MB-001 evaluation/generated_code/GPT-4o/zero_shot/MB-001_trial1.py
+"""
+
+import argparse
+import ast
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterator
+
+from evaluation.code_hash import code_hash
+from evaluation.config import (
+    DATASET_PATH,
+    RAW_CODE_DIR,
+    REFERENCE_AST_NGRAM,
+    REFERENCE_INDEX_PATH,
+    REFERENCE_TOP_SCENES,
+)
+
+INDEX_FORMAT_VERSION = 1
+_CONTEXT_NODES = (ast.Load, ast.Store, ast.Del)
+
+
+# ── Features ──────────────────────────────────────────────────────────────
+
+def _preorder(node: ast.AST) -> Iterator[ast.AST]:
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(list(ast.iter_child_nodes(current))))
+
+
+def _call_name(node: ast.Call) -> str | None:
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        return "." + func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return None
+
+
+def extract_features(node: ast.AST, n: int = REFERENCE_AST_NGRAM) -> Counter:
+    """AST node-type n-grams and API-call uni/bigrams under `node`."""
+    features: Counter = Counter()
+    kinds = []
+    calls = []
+    for child in _preorder(node):
+        if isinstance(child, _CONTEXT_NODES):
+            continue
+        kinds.append(type(child).__name__)
+        if isinstance(child, ast.Call):
+            name = _call_name(child)
+            if name:
+                calls.append(name)
+    for i in range(len(kinds) - n + 1):
+        features["a:" + ">".join(kinds[i:i + n])] += 1
+    for i, name in enumerate(calls):
+        features["c:" + name] += 1
+        if i:
+            features[f"c2:{calls[i - 1]}>{name}"] += 1
+    return features
+
+
+def _tf(count: int) -> float:
+    return 1.0 + math.log(count)
+
+
+def _idf(df: int, n_units: int) -> float:
+    return math.log((1 + n_units) / (1 + df)) + 1.0
+
+
+# ── Index ─────────────────────────────────────────────────────────────────
+
+def _reference_files(raw_root: Path) -> list[Path]:
+    return sorted(raw_root.rglob("*.py"))
+
+
+def _dataset_problems(dataset_path: Path) -> list[dict]:
+    with open(dataset_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["problems"] if isinstance(data, dict) else data
+
+
+def corpus_fingerprint(raw_root: Path | str = RAW_CODE_DIR,
+                       dataset_path: Path | str = DATASET_PATH) -> str:
+    """Changes whenever a reference file, the dataset or the feature set changes."""
+    raw_root = Path(raw_root)
+    parts = [f"v{INDEX_FORMAT_VERSION}", f"n{REFERENCE_AST_NGRAM}"]
+    for path in [Path(dataset_path), *_reference_files(raw_root)]:
+        st = path.stat()
+        parts.append(f"{path.name}:{path.parent.name}:{st.st_size}:{st.st_mtime_ns}")
+    return code_hash("\n".join(parts), normalize=False)
+
+
+def _class_units(raw_root: Path) -> dict[str, Counter]:
+    """Features of every top-level class in raw_code/, keyed "<dir>/<file>::<Class>"."""
+    units = {}
+    for path in _reference_files(raw_root):
+        rel = path.relative_to(raw_root).as_posix()
+        try:
+            tree = ast.parse(path.read_text(encoding="utf-8", errors="replace"))
+        except (SyntaxError, ValueError):
+            continue
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                units[f"{rel}::{node.name}"] = extract_features(node)
+    return units
+
+
+def _problem_scenes(problem: dict, units: dict[str, Counter]) -> list[str]:
+    """The problem's reference scene keys (named scene classes, else all classes)."""
+    folder = Path(problem.get("raw_code_path") or "").name
+    files = {f"{folder}/{f}" for f in problem.get("raw_code_files", []) if f.endswith(".py")}
+    in_files = [k for k in units if k.split("::")[0] in files]
+    named = {s.get("class_name") for s in
+             (problem.get("reference_code_analysis") or {}).get("scene_classes", [])}
+    listed = [k for k in in_files if k.split("::")[1] in named]
+    return listed or in_files
+
+
+def build_reference_index(raw_root: Path | str = RAW_CODE_DIR,
+                          dataset_path: Path | str = DATASET_PATH) -> dict[str, Any]:
+    """Arrays of the reference index (see write_reference_index)."""
+    import numpy as np
+
+    raw_root = Path(raw_root)
+    units = _class_units(raw_root)
+    df: Counter = Counter()
+    for feats in units.values():
+        df.update(feats.keys())
+    n_units = len(units)
+    idf = {f: _idf(d, n_units) for f, d in df.items()}
+
+    arrays: dict[str, Any] = {
+        "meta": np.array(json.dumps({
+            "format": INDEX_FORMAT_VERSION,
+            "fingerprint": corpus_fingerprint(raw_root, dataset_path),
+            "n_units": n_units,
+        })),
+        "idf_features": np.array(sorted(idf), dtype=str),
+    }
+    arrays["idf_values"] = np.array([idf[f] for f in arrays["idf_features"]], dtype=np.float32)
+
+    for problem in _dataset_problems(Path(dataset_path)):
+        scenes = _problem_scenes(problem, units)
+        if not scenes:
+            continue
+        features = sorted({f for s in scenes for f in units[s]})
+        col = {f: j for j, f in enumerate(features)}
+        matrix = np.zeros((len(scenes), len(features)), dtype=np.float32)
+        for i, scene in enumerate(scenes):
+            for f, count in units[scene].items():
+                matrix[i, col[f]] = _tf(count) * idf[f]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 0, norms, 1.0)
+        pid = problem["id"]
+        arrays[f"{pid}:scenes"] = np.array(scenes, dtype=str)
+        arrays[f"{pid}:features"] = np.array(features, dtype=str)
+        arrays[f"{pid}:matrix"] = matrix
+    return arrays
+
+
+def write_reference_index(path: Path | str = REFERENCE_INDEX_PATH,
+                          raw_root: Path | str = RAW_CODE_DIR,
+                          dataset_path: Path | str = DATASET_PATH) -> Path:
+    """Build the index and write it atomically to `path`."""
+    import numpy as np
+
+    path = Path(path)
+    arrays = build_reference_index(raw_root, dataset_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".npz")
+    with os.fdopen(fd, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+    return path
+
+
+class ReferenceIndex:
+    """Loaded index: IDF table plus per-problem reference rows."""
+
+    def __init__(self, arrays):
+        import numpy as np
+
+        self.meta = json.loads(str(arrays["meta"]))
+        n_units = self.meta["n_units"]
+        self.idf = dict(zip(arrays["idf_features"].tolist(), arrays["idf_values"].tolist()))
+        self.unseen_idf = _idf(0, n_units)
+        self.problems: dict[str, dict[str, Any]] = {}
+        for key in arrays.files:
+            if not key.endswith(":matrix"):
+                continue
+            pid = key.rsplit(":", 1)[0]
+            matrix = arrays[key]
+            centroid = matrix.mean(axis=0)
+            norm = np.linalg.norm(centroid)
+            self.problems[pid] = {
+                "scenes": arrays[f"{pid}:scenes"].tolist(),
+                "columns": {f: j for j, f in enumerate(arrays[f"{pid}:features"].tolist())},
+                "matrix": matrix,
+                "centroid": centroid / norm if norm > 0 else centroid,
+            }
+
+    @classmethod
+    def load(cls, path: Path | str) -> "ReferenceIndex":
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(arrays)
+
+    def score(self, tree: ast.AST, problem_id: str) -> dict[str, Any]:
+        """Similarity of a parsed sample to the problem's reference scenes."""
+        import numpy as np
+
+        entry = self.problems.get(problem_id)
+        if entry is None:
+            return {"reference_similarity": None, "reason": "no_reference"}
+        features = extract_features(tree)
+        vector = np.zeros(len(entry["columns"]), dtype=np.float32)
+        norm_sq = 0.0
+        for f, count in features.items():
+            weight = _tf(count) * self.idf.get(f, self.unseen_idf)
+            norm_sq += weight * weight
+            j = entry["columns"].get(f)
+            if j is not None:
+                vector[j] = weight
+        if norm_sq == 0:
+            return {"reference_similarity": None, "reason": "no_features"}
+        vector /= math.sqrt(norm_sq)
+        scores = entry["matrix"] @ vector
+        top = np.argsort(-scores)[:REFERENCE_TOP_SCENES]
+        return {
+            "reference_similarity": round(float(scores[top[0]]), 4),
+            "centroid_similarity": round(float(entry["centroid"] @ vector), 4),
+            "best_match": entry["scenes"][top[0]],
+            "top_matches": [
+                {"scene": entry["scenes"][i], "score": round(float(scores[i]), 4)} for i in top
+            ],
+            "reference_scenes": len(entry["scenes"]),
+            "features": len(features),
+        }
+
+
+_loaded: dict[str, ReferenceIndex | None] = {}
+_load_lock = threading.Lock()
+
+
+def load_reference_index(path: Path | str = REFERENCE_INDEX_PATH) -> ReferenceIndex | None:
+    """
+    The stored index, (re)built first if missing or stale. None if raw_code/
+    or the dataset is unavailable. Loaded once per process.
+    """
+    path = Path(path)
+    with _load_lock:
+        if str(path) in _loaded:
+            return _loaded[str(path)]
+        index = None
+        try:
+            fingerprint = corpus_fingerprint()
+            try:
+                index = ReferenceIndex.load(path)
+            except (OSError, ValueError, KeyError):
+                index = None
+            if index is None or index.meta.get("fingerprint") != fingerprint:
+                index = ReferenceIndex.load(write_reference_index(path))
+        except (OSError, ValueError, KeyError):
+            index = None
+        _loaded[str(path)] = index
+        return index
+
+
+def compute_reference_similarity(code: str, problem: dict) -> dict[str, Any]:
+    """Reference-similarity result for `code` (see module docstring)."""
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return {"reference_similarity": None, "reason": "syntax"}
+    index = load_reference_index()
+    if index is None:
+        return {"reference_similarity": None, "reason": "no_index"}
+    return index.score(tree, problem["id"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reference-similarity index and scoring")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="(Re)build the reference index")
+    build.add_argument("--output", type=str, default=str(REFERENCE_INDEX_PATH))
+    score = sub.add_parser("score", help="Score code files against a problem's references")
+    score.add_argument("problem", help="Problem id, e.g. MB-001")
+    score.add_argument("files", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        path = write_reference_index(args.output)
+        index = ReferenceIndex.load(path)
+        print(f"Reference index: {path}  ({index.meta['n_units']} classes, "
+              f"{len(index.idf)} features)")
+        for pid, entry in sorted(index.problems.items()):
+            print(f"  {pid}  {len(entry['scenes']):>3} scenes  "
+                  f"{len(entry['columns']):>6} features")
+        return
+
+    for name in args.files:
+        result = compute_reference_similarity(
+            Path(name).read_text(encoding="utf-8"), {"id": args.problem},
+        )
+        print(f"{name}: {json.dumps(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Render-Result Cache
+=====================
+Persistent cache of `run_manim_code` results, so re-scoring unchanged
+samples (reruns, byte-identical temperature-0 trials) skips rendering.
+
+Entries are keyed by:
+    normalized code hash + scene name + Manim version + quality flag
+    (+ the RenderCap label for capped renders)
+
+and stored as one JSON file each under RENDER_CACHE_DIR, sharded by the
+first two hex characters of the key. Writes go through a temp file and
+`os.replace`, so concurrent workers never see a partial entry.
+
+Outcomes that depend on the run's budget are only reused when they would
+reproduce under the current one:
+  - a Timeout is reused only if the current timeout is not longer
+  - a resource-limit failure is reused only under the same RenderLimits
+  - a success is reused only if it finished within the current timeout
+    and was rendered under limits no looser than the current ones
+  - when the caller keeps videos (`require_video`), a success whose stored
+    video is gone is re-rendered so the video exists again
+"""
+
+import json
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from evaluation.code_hash import code_hash
+from evaluation.config import RENDER_CACHE_DIR, RenderLimits
+
+CACHE_FORMAT_VERSION = 1
+
+# Error types produced by a limit rather than by the code itself
+_LIMIT_ERRORS = {
+    "CPUTimeLimit", "FileSizeLimit", "MemoryError", "Killed", "OutputLimitExceeded",
+}
+
+
+def _looser(stored: dict[str, Any] | None, current: RenderLimits) -> bool:
+    """True if any stored limit allowed more than the current one (None = unlimited)."""
+    if stored is None:
+        return True
+    for name, now in current.as_dict().items():
+        then = stored.get(name)
+        if now is not None and (then is None or then > now):
+            return True
+    return False
+
+
+@lru_cache(maxsize=1)
+def manim_version() -> str:
+    """Installed Manim CE version, or "unknown" if it is not installed."""
+    from importlib import metadata    # slow to import; only needed once a render runs
+
+    try:
+        return metadata.version("manim")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+class RenderCache:
+    """File-backed store of render results."""
+
+    def __init__(self, cache_dir: Path | str = RENDER_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    # Locks do not pickle; drop on the way out so the cache can be shipped
+    # to process-pool workers (counters then track each process separately).
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # ── Keys ───────────────────────────────────────────────────────────
+
+    def key(self, code: str, scene_name: str, quality: str, variant: str = "") -> str:
+        parts = [
+            f"v{CACHE_FORMAT_VERSION}",
+            code_hash(code),
+            scene_name,
+            manim_version(),
+            quality,
+        ]
+        if variant:
+            parts.append(variant)
+        return code_hash("\x1f".join(parts), normalize=False)
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _path(self, key: str, suffix: str = ".json") -> Path:
+        return self.cache_dir / key[:2] / f"{key}{suffix}"
+
+    # ── Lookup / store ─────────────────────────────────────────────────
+
+    def get(
+        self,
+        key: str,
+        timeout: int,
+        limits: RenderLimits,
+        require_video: bool = False,
+    ) -> dict[str, Any] | None:
+        """
+        Return the cached result for `key` if it is valid for this budget
+        (and, with `require_video`, still has its video on disk).
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(False)
+            return None
+
+        result = entry.get("result", {})
+        error_type = result.get("error_type")
+        if error_type == "Timeout" and timeout > entry.get("timeout", 0):
+            self._count(False)
+            return None
+        if error_type in _LIMIT_ERRORS and entry.get("limits") != limits.as_dict():
+            self._count(False)
+            return None
+        if result.get("success") and (
+            (result.get("resources") or {}).get("wall_s", 0) > timeout
+            or _looser(entry.get("limits"), limits)
+        ):
+            self._count(False)              # might not succeed under this budget
+            return None
+
+        for media_key in ("video_path", "thumbnail_path"):
+            path = result.get(media_key)
+            if path and not Path(path).exists():
+                result[media_key] = None
+        if require_video and result.get("success") and not result.get("video_path"):
+            self._count(False)              # render again to keep the video
+            return None
+
+        self._count(True)
+        return {**result, "cached": True}
+
+    def put(
+        self,
+        key: str,
+        result: dict[str, Any],
+        timeout: int,
+        limits: RenderLimits,
+    ) -> None:
+        """
+        Store a fresh render result. Its video path is kept only if the
+        video has been moved somewhere persistent (see media_store.py).
+        """
+        result = {k: v for k, v in result.items() if k != "cached"}
+
+        entry = {
+            "format": CACHE_FORMAT_VERSION,
+            "manim_version": manim_version(),
+            "timeout": timeout,
+            "limits": limits.as_dict(),
+            "result": result,
+        }
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,74 @@
+"""
+Render Sandbox Launcher
+=========================
+Applies POSIX resource limits to the current process, then `exec`s the
+render command so Manim (and every process it spawns, e.g. ffmpeg)
+inherits them.
+
+Run as a script, not imported — it has no package dependencies so it
+works from the render's temporary working directory:
+
+    python render_sandbox.py '<limits-json>' <command> [args ...]
+
+where <limits-json> holds any of:
+
+    {"cpu_seconds": int, "address_space_mb": int,
+     "file_size_mb": int, "max_processes": int}
+
+Missing or null keys leave that limit untouched. On platforms without the
+`resource` module the command is exec'd unchanged.
+"""
+
+import json
+import os
+import sys
+
+try:
+    import resource
+except ImportError:          # Windows
+    resource = None
+
+_MB = 1024 * 1024
+_CPU_GRACE_S = 5      # hard CPU limit sits above the soft one so SIGXCPU fires first
+
+
+def apply_limits(limits: dict) -> None:
+    """Lower the soft+hard rlimits of this process according to `limits`."""
+    if resource is None:
+        return
+
+    wanted = [
+        ("cpu_seconds", "RLIMIT_CPU", 1),
+        ("address_space_mb", "RLIMIT_AS", _MB),
+        ("file_size_mb", "RLIMIT_FSIZE", _MB),
+        # NB: RLIMIT_NPROC counts every process of the user, not only
+        # descendants, and is ignored for root.
+        ("max_processes", "RLIMIT_NPROC", 1),
+    ]
+    for key, rname, scale in wanted:
+        value = limits.get(key)
+        rlimit = getattr(resource, rname, None)
+        if value is None or rlimit is None:
+            continue
+        soft = new_hard = int(value) * scale
+        if key == "cpu_seconds":
+            new_hard = soft + _CPU_GRACE_S
+        _, hard = resource.getrlimit(rlimit)
+        if hard != resource.RLIM_INFINITY:
+            soft, new_hard = min(soft, hard), min(new_hard, hard)
+        try:
+            resource.setrlimit(rlimit, (soft, new_hard))
+        except (ValueError, OSError):
+            pass  # cannot lower further (e.g. macOS RLIMIT_AS) — best effort
+
+
+def main(argv: list[str]) -> None:
+    if len(argv) < 3:
+        sys.stderr.write("usage: render_sandbox.py '<limits-json>' <command> [args ...]\n")
+        sys.exit(2)
+    apply_limits(json.loads(argv[1]))
+    os.execvp(argv[2], argv[2:])
+
+
+if __name__ == "__main__":
+    main(sys.argv)
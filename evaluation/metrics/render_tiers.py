@@ -0,0 +1,110 @@
+"""
+Tiered Rendering
+==================
+Render modes for executability (`render_mode` in EvalConfig):
+
+    full     every sample is rendered completely (default)
+    capped   every sample is rendered up to its RenderCap; past the cap the
+             scene runs in Manim's skip mode, so construct() errors still
+             fail it but later frames are never drawn (scene_profiler.py)
+    tiered   capped for most samples; an audit subset is rendered in full
+             as well, and the full verdict is the one scored
+
+Audit design: each distinct program (normalized code hash) is audited
+with probability `audit_fraction`, decided by hashing it with the run
+seed. The draw does not depend on model, problem, strategy or outcome, so
+the audited programs are a uniform random sample and the share whose
+capped and full verdicts differ is an unbiased estimate of that share
+over all capped samples; `tier_report` gives it with a Wilson 95%
+interval and the direction of each disagreement. Duplicate samples count
+once, as the unit of sampling is the program.
+
+A capped render only differs from a full one after the cap is reached.
+When an audited sample's full render never reached it, the capped verdict
+is the full verdict and no second render runs (`derived`).
+"""
+
+import math
+from collections import Counter
+from typing import Any
+
+from evaluation.code_hash import code_hash
+from evaluation.config import RenderCap
+
+RENDER_MODES = ("full", "capped", "tiered")
+
+
+def audit_selected(code: str, fraction: float, seed: int = 42) -> bool:
+    """Whether `code` falls in the full-render audit subset."""
+    if fraction <= 0:
+        return False
+    if fraction >= 1:
+        return True
+    digest = code_hash(f"{seed}\x1f{code_hash(code)}", normalize=False)
+    return int(digest[:13], 16) / 16 ** 13 < fraction
+
+
+def cap_reached(profile: dict[str, Any] | None, cap: RenderCap) -> bool:
+    """
+    Whether a full render with this scene profile went past `cap`, i.e.
+    whether a capped render of the same code would have skipped anything.
+    A render that wrote no profile never reached a play call.
+    """
+    if not profile:
+        return False
+    for stats in profile.get("scenes", {}).values():
+        plays = stats.get("per_play", [])
+        scene_s = 0.0
+        for i, play in enumerate(plays):
+            if ((cap.max_plays is not None and i >= cap.max_plays)
+                    or (cap.max_scene_s is not None and scene_s >= cap.max_scene_s)):
+                return True
+            scene_s += play.get("run_time", 0.0)
+        if stats.get("play_calls", 0) > len(plays):
+            return True             # per_play truncated; assume the worst
+    return False
+
+
+def wilson_interval(k: int, n: int, z: float = 1.96) -> tuple[float, float] | None:
+    """Wilson score interval for k successes in n trials."""
+    if n == 0:
+        return None
+    p = k / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return round(max(0.0, centre - half), 4), round(min(1.0, centre + half), 4)
+
+
+def tier_report(results: list[dict]) -> dict[str, Any]:
+    """
+    Render tiers used in `results` and the capped-vs-full disagreement
+    estimated from the audited programs.
+    """
+    tiers: Counter = Counter()
+    audits: dict[str, dict[str, Any]] = {}
+    for i, r in enumerate(results):
+        ex = (r.get("metrics_detail") or {}).get("executability") or {}
+        tier = ex.get("render_tier")
+        if not tier:
+            continue
+        tiers[tier] += 1
+        if ex.get("render_audit") and not ex.get("render_reused"):
+            audits.setdefault(r.get("code_fingerprint") or f"#{i}", ex["render_audit"])
+
+    directions: Counter = Counter()
+    for audit in audits.values():
+        if not audit["agree"]:
+            directions["capped_pass_full_fail" if audit["capped_success"]
+                       else "capped_fail_full_pass"] += 1
+    n = len(audits)
+    disagree = sum(directions.values())
+    return {
+        "tiers": dict(tiers),
+        "audited": n,
+        "derived": sum(1 for a in audits.values() if a["derived"]),
+        "disagree": disagree,
+        "disagreement_rate": round(disagree / n, 4) if n else None,
+        "ci95": wilson_interval(disagree, n),
+        "directions": dict(directions),
+    }
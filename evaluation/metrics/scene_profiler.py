@@ -0,0 +1,204 @@
+"""
+Scene-Complexity Profiler
+===========================
+Runs the Manim CE command line with lightweight hooks on `Scene` that
+record, per rendered scene:
+
+  - number of `play` calls (and how many of them were `wait`s)
+  - total animation run_time (scene seconds)
+  - wall-clock time spent in each `play` call
+  - peak top-level mobject count, peak family size (all submobjects),
+    and peak number of points across the scene
+  - frames written by the file writer
+
+With a cap (`--cap-plays N` and/or `--cap-scene-s T`), once a scene has
+made N play calls or reached T seconds of scene time, the rest of it runs
+in Manim's skip mode — every later call still executes, but no frames are
+drawn — and the scene records the play at which it was capped.
+
+Run as a script, not imported — it must not pull in the evaluation
+package from inside the sandboxed render:
+
+    python scene_profiler.py <profile.json> [--cap-plays N] [--cap-scene-s T] [manim CLI args ...]
+
+The profile is written to <profile.json> after every scene and again at
+interpreter exit, so a scene that crashes mid-way still reports the
+animations it completed.
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+
+# Running as a script puts this directory first on sys.path, where the
+# metric modules could shadow real packages — drop it.
+if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+    sys.path.pop(0)
+
+MAX_PLAY_RECORDS = 200        # per-scene cap on the per-play timing list
+
+_profile: dict = {"scenes": {}}
+_current: dict | None = None
+_out_path: str | None = None
+_cap: dict = {"plays": None, "scene_s": None}
+
+
+def _dump():
+    if _out_path is None:
+        return
+    try:
+        with open(_out_path, "w", encoding="utf-8") as f:
+            json.dump(_profile, f)
+    except OSError:
+        pass
+
+
+def _scene_stats(scene) -> tuple[int, int, int]:
+    """(top-level mobjects, family size, total points) currently in the scene."""
+    mobjects = list(getattr(scene, "mobjects", []))
+    family_size = 0
+    points = 0
+    for mob in mobjects:
+        try:
+            family = mob.get_family()
+        except Exception:
+            family = [mob]
+        family_size += len(family)
+        for sub in family:
+            pts = getattr(sub, "points", None)
+            if pts is not None:
+                try:
+                    points += len(pts)
+                except TypeError:
+                    pass
+    return len(mobjects), family_size, points
+
+
+def _renderer_time(scene) -> float:
+    return float(getattr(getattr(scene, "renderer", None), "time", 0.0) or 0.0)
+
+
+def _apply_cap(scene, stats: dict) -> None:
+    """Switch the rest of the scene to skip mode once the cap is reached."""
+    if stats["capped_at_play"] is not None:
+        return
+    plays, scene_s = _cap["plays"], _cap["scene_s"]
+    if not ((plays is not None and stats["play_calls"] >= plays)
+            or (scene_s is not None and stats["total_run_time"] >= scene_s)):
+        return
+    renderer = getattr(scene, "renderer", None)
+    if renderer is None:
+        return
+    # play() resets skip_animations from _original_skipping_status each call
+    renderer._original_skipping_status = True
+    renderer.skip_animations = True
+    stats["capped_at_play"] = stats["play_calls"]
+
+
+def _install_hooks():
+    from manim.scene.scene import Scene
+    from manim.scene.scene_file_writer import SceneFileWriter
+
+    orig_render = Scene.render
+    orig_play = Scene.play
+    orig_write_frame = SceneFileWriter.write_frame
+
+    def render(self, *args, **kwargs):
+        global _current
+        name = type(self).__name__
+        stats = _current = _profile["scenes"].setdefault(name, {
+            "play_calls": 0,
+            "wait_calls": 0,
+            "animations": 0,
+            "total_run_time": 0.0,
+            "peak_mobjects": 0,
+            "peak_family_size": 0,
+            "peak_points": 0,
+            "frames_rendered": 0,
+            "render_wall_s": 0.0,
+            "completed": False,
+            "capped_at_play": None,
+            "per_play": [],
+            "per_play_truncated": False,
+        })
+        t0 = time.perf_counter()
+        completed = False
+        try:
+            result = orig_render(self, *args, **kwargs)
+            completed = True
+            return result
+        finally:
+            stats["render_wall_s"] = round(time.perf_counter() - t0, 4)
+            stats["total_run_time"] = round(stats["total_run_time"], 4)
+            stats["completed"] = completed
+            _dump()
+
+    def play(self, *args, **kwargs):
+        stats = _current
+        if stats is None:
+            return orig_play(self, *args, **kwargs)
+        _apply_cap(self, stats)
+        names = [type(a).__name__ for a in args]
+        t_scene = _renderer_time(self)
+        t0 = time.perf_counter()
+        try:
+            return orig_play(self, *args, **kwargs)
+        finally:
+            wall = time.perf_counter() - t0
+            run_time = max(0.0, _renderer_time(self) - t_scene)
+            stats["play_calls"] += 1
+            stats["animations"] += len(args)
+            if names == ["Wait"]:
+                stats["wait_calls"] += 1
+            stats["total_run_time"] += run_time
+            n_mobs, family, points = _scene_stats(self)
+            stats["peak_mobjects"] = max(stats["peak_mobjects"], n_mobs)
+            stats["peak_family_size"] = max(stats["peak_family_size"], family)
+            stats["peak_points"] = max(stats["peak_points"], points)
+            if len(stats["per_play"]) < MAX_PLAY_RECORDS:
+                stats["per_play"].append({
+                    "animations": names,
+                    "run_time": round(run_time, 4),
+                    "wall_s": round(wall, 4),
+                })
+            else:
+                stats["per_play_truncated"] = True
+
+    def write_frame(self, *args, **kwargs):
+        if _current is not None:
+            n = kwargs.get("num_frames", args[1] if len(args) > 1 else 1)
+            _current["frames_rendered"] += int(n or 1)
+        return orig_write_frame(self, *args, **kwargs)
+
+    Scene.render = render
+    Scene.play = play
+    SceneFileWriter.write_frame = write_frame
+
+
+def main(argv: list[str]) -> None:
+    global _out_path
+    if len(argv) < 2:
+        sys.stderr.write("usage: scene_profiler.py <profile.json> "
+                         "[--cap-plays N] [--cap-scene-s T] [manim args ...]\n")
+        sys.exit(2)
+    _out_path = argv[1]
+    args = argv[2:]
+    while len(args) >= 2 and args[0] in ("--cap-plays", "--cap-scene-s"):
+        if args[0] == "--cap-plays":
+            _cap["plays"] = int(args[1])
+        else:
+            _cap["scene_s"] = float(args[1])
+        args = args[2:]
+    atexit.register(_dump)
+
+    _install_hooks()
+    from manim.__main__ import main as manim_main
+
+    sys.argv = ["manim", *args]
+    manim_main(prog_name="manim")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
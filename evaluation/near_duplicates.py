@@ -0,0 +1,358 @@
+"""
+ManiBench Evaluation — Near-Duplicate Detection
+=================================================
+Finds generated samples that are near-copies of each other (shared
+boilerplate, the same memorized snippet from several models) and of the
+3Blue1Brown reference code in raw_code/, without comparing every pair.
+
+Each document becomes a set of shingles: runs of NEAR_DUP_SHINGLE
+consecutive Python tokens (comments and whitespace dropped), hashed with
+CRC-32. Reference files are split into one document per top-level class,
+since a sample reproduces a scene, not a whole file.
+
+  1. MinHash  every shingle set is reduced to NEAR_DUP_NUM_PERM minima of
+              random multiply-shift hashes (vectorized with numpy); the
+              share of equal minima between two signatures estimates their
+              Jaccard similarity
+  2. LSH      signatures are cut into bands; documents that agree on a
+              whole band share a bucket. Band count and width are chosen so
+              the candidate probability crosses ½ at NEAR_DUP_THRESHOLD
+  3. verify   candidate pairs whose estimated Jaccard reaches the threshold
+              are near-duplicates; clusters are their connected components
+
+Work is linear in the number of documents plus the candidate pairs. A
+bucket larger than NEAR_DUP_MAX_BUCKET (boilerplate everybody emits) is
+checked against one member instead of pairwise, so one popular template
+cannot make the pass quadratic.
+
+Per model the report gives the share of samples with a near-duplicate
+(any model / another model / a reference scene) and the mean containment
+of each sample's shingles in the whole reference corpus — an exact,
+threshold-free measure of how much of its code appears in raw_code/.
+
+Usage:
+    python -m evaluation.near_duplicates
+    python -m evaluation.near_duplicates --threshold 0.5 --json near_dups.json
+"""
+
+import argparse
+import ast
+import io
+import json
+import re
+import tokenize
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from evaluation.config import (
+    GENERATED_CODE_DIR,
+    NEAR_DUP_MAX_BUCKET,
+    NEAR_DUP_NUM_PERM,
+    NEAR_DUP_SHINGLE,
+    NEAR_DUP_THRESHOLD,
+    RAW_CODE_DIR,
+    RESULTS_DIR,
+)
+
+REFERENCE = "reference"         # `model` of reference documents
+
+_SKIP_TOKENS = {
+    tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT,
+    tokenize.DEDENT, tokenize.ENCODING, tokenize.ENDMARKER,
+}
+_FALLBACK_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@dataclass
+class Document:
+    """One shingled unit: a generated sample or a reference scene."""
+    name: str                       # path (samples) or path::Class (references)
+    model: str                      # model directory, or REFERENCE
+    problem_id: str | None
+    shingles: Any                   # np.ndarray[uint64], sorted unique
+
+
+# ── Shingling ─────────────────────────────────────────────────────────────
+
+def code_tokens(code: str) -> list[str]:
+    """Python tokens without comments or layout; a regex split if tokenizing fails."""
+    try:
+        return [
+            tok.string for tok in tokenize.generate_tokens(io.StringIO(code).readline)
+            if tok.type not in _SKIP_TOKENS
+        ]
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return _FALLBACK_TOKEN_RE.findall(code)
+
+
+def shingle_hashes(code: str, k: int = NEAR_DUP_SHINGLE):
+    """Sorted unique CRC-32 hashes of the code's k-token shingles."""
+    import numpy as np
+
+    tokens = code_tokens(code)
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    grams = ("\x1f".join(tokens[i:i + k]) for i in range(max(1, len(tokens) - k + 1)))
+    return np.unique(np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64,
+    ))
+
+
+def reference_units(raw_root: Path | str = RAW_CODE_DIR) -> list[tuple[str, str]]:
+    """
+    (name, source) for every top-level class in raw_code/ — one unit per
+    scene. A file that does not parse is one unit.
+    """
+    raw_root = Path(raw_root)
+    units = []
+    for path in sorted(raw_root.rglob("*.py")):
+        rel = str(path.relative_to(raw_root))
+        source = path.read_text(encoding="utf-8", errors="replace")
+        try:
+            tree = ast.parse(source)
+        except (SyntaxError, ValueError):
+            units.append((rel, source))
+            continue
+        lines = source.splitlines(keepends=True)
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                segment = "".join(lines[node.lineno - 1:node.end_lineno])
+                units.append((f"{rel}::{node.name}", segment))
+    return units
+
+
+def load_documents(
+    code_root: Path | str = GENERATED_CODE_DIR,
+    raw_root: Path | str | None = RAW_CODE_DIR,
+    k: int = NEAR_DUP_SHINGLE,
+) -> list[Document]:
+    """Generated samples (<model>/<strategy>/<problem>_trialN.py) plus reference scenes."""
+    code_root = Path(code_root)
+    docs = []
+    for path in sorted(code_root.rglob("*.py")):
+        rel = path.relative_to(code_root)
+        shingles = shingle_hashes(path.read_text(encoding="utf-8", errors="replace"), k)
+        if len(shingles):
+            docs.append(Document(str(rel), rel.parts[0], path.stem.split("_trial")[0],
+                                 shingles))
+    if raw_root is not None:
+        for name, source in reference_units(raw_root):
+            shingles = shingle_hashes(source, k)
+            if len(shingles):
+                docs.append(Document(name, REFERENCE, None, shingles))
+    return docs
+
+
+# ── MinHash + LSH ─────────────────────────────────────────────────────────
+
+class MinHasher:
+    """Multiply-shift hash family: h(x) = ((a·x + b) mod 2⁶⁴) >> 32."""
+
+    def __init__(self, num_perm: int = NEAR_DUP_NUM_PERM, seed: int = 1):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+
+    def signature(self, shingles, chunk: int = 4096):
+        """MinHash signature (uint32[num_perm]) of a shingle-hash array."""
+        import numpy as np
+
+        sig = np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for start in range(0, len(shingles), chunk):
+                x = shingles[start:start + chunk]
+                h = (self.a[:, None] * x[None, :] + self.b[:, None]) >> np.uint64(32)
+                np.minimum(sig, h.min(axis=1), out=sig)
+        return sig.astype(np.uint32)
+
+
+def lsh_params(num_perm: int, threshold: float) -> tuple[int, int]:
+    """(bands, rows) with bands·rows = num_perm whose ½-point (1/b)^(1/r) is nearest `threshold`."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+def candidate_pairs(signatures, bands: int, rows: int,
+                    max_bucket: int = NEAR_DUP_MAX_BUCKET) -> set[tuple[int, int]]:
+    """Index pairs sharing at least one LSH bucket (large buckets: star around one member)."""
+    pairs: set[tuple[int, int]] = set()
+    for band in range(bands):
+        buckets: dict[bytes, list[int]] = defaultdict(list)
+        block = signatures[:, band * rows:(band + 1) * rows]
+        for i, row in enumerate(block):
+            buckets[row.tobytes()].append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > max_bucket:
+                pairs.update((members[0], j) for j in members[1:])
+            else:
+                pairs.update((i, j) for n, i in enumerate(members) for j in members[n + 1:])
+    return pairs
+
+
+def _clusters(n: int, edges: Iterable[tuple[int, int]]) -> list[list[int]]:
+    """Connected components with more than one member (union-find)."""
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in edges:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[rj] = ri
+    groups: dict[int, list[int]] = defaultdict(list)
+    for i in range(n):
+        groups[find(i)].append(i)
+    return sorted((g for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+
+# ── Report ────────────────────────────────────────────────────────────────
+
+def _containment(shingles, sorted_corpus) -> float:
+    """Share of `shingles` present in the sorted array `sorted_corpus`."""
+    import numpy as np
+
+    if not len(sorted_corpus):
+        return 0.0
+    idx = np.searchsorted(sorted_corpus, shingles).clip(max=len(sorted_corpus) - 1)
+    return float((sorted_corpus[idx] == shingles).mean())
+
+
+def near_duplicate_report(
+    docs: list[Document],
+    threshold: float = NEAR_DUP_THRESHOLD,
+    num_perm: int = NEAR_DUP_NUM_PERM,
+    max_bucket: int = NEAR_DUP_MAX_BUCKET,
+    seed: int = 1,
+) -> dict[str, Any]:
+    """Near-duplicate pairs, clusters and per-model overlap for `docs`."""
+    import numpy as np
+
+    hasher = MinHasher(num_perm, seed)
+    signatures = (np.stack([hasher.signature(d.shingles) for d in docs])
+                  if docs else np.empty((0, num_perm), dtype=np.uint32))
+    bands, rows = lsh_params(num_perm, threshold)
+    candidates = candidate_pairs(signatures, bands, rows, max_bucket)
+
+    pairs = np.array(sorted(candidates), dtype=np.int64).reshape(-1, 2)
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    keep = similarity >= threshold
+    edges = [(int(i), int(j), float(sim))
+             for (i, j), sim in zip(pairs[keep], similarity[keep])]
+
+    ref_ids = [i for i, d in enumerate(docs) if d.model == REFERENCE]
+    ref_shingles = (np.unique(np.concatenate([docs[i].shingles for i in ref_ids]))
+                    if ref_ids else np.empty(0, dtype=np.uint64))
+
+    dup_with: dict[int, set[str]] = defaultdict(set)   # doc → models it duplicates
+    for i, j, _ in edges:
+        dup_with[i].add(docs[j].model)
+        dup_with[j].add(docs[i].model)
+
+    per_model: dict[str, dict[str, Any]] = {}
+    samples_by_model: dict[str, list[int]] = defaultdict(list)
+    for i, d in enumerate(docs):
+        if d.model != REFERENCE:
+            samples_by_model[d.model].append(i)
+    for model, ids in sorted(samples_by_model.items()):
+        n = len(ids)
+        contained = [_containment(docs[i].shingles, ref_shingles) for i in ids]
+        per_model[model] = {
+            "samples": n,
+            "near_dup_rate": round(sum(1 for i in ids if dup_with[i] - {REFERENCE}) / n, 4),
+            "cross_model_rate": round(
+                sum(1 for i in ids if dup_with[i] - {model, REFERENCE}) / n, 4),
+            "reference_match_rate": round(
+                sum(1 for i in ids if REFERENCE in dup_with[i]) / n, 4),
+            "reference_containment": round(sum(contained) / n, 4),
+        }
+
+    clusters = []
+    for members in _clusters(len(docs), ((i, j) for i, j, _ in edges)):
+        models = Counter(docs[i].model for i in members)
+        clusters.append({
+            "size": len(members),
+            "models": dict(models),
+            "problems": sorted({docs[i].problem_id for i in members if docs[i].problem_id}),
+            "has_reference": REFERENCE in models,
+            "members": [docs[i].name for i in members],
+        })
+
+    return {
+        "params": {
+            "threshold": threshold, "num_perm": num_perm, "bands": bands, "rows": rows,
+            "shingle": NEAR_DUP_SHINGLE, "max_bucket": max_bucket, "seed": seed,
+        },
+        "documents": {"samples": len(docs) - len(ref_ids), "reference_scenes": len(ref_ids)},
+        "candidate_pairs": len(candidates),
+        "near_dup_pairs": len(edges),
+        "clusters": clusters,
+        "cross_model_clusters": sum(
+            1 for c in clusters if len(set(c["models"]) - {REFERENCE}) > 1),
+        "per_model": per_model,
+    }
+
+
+def print_report(report: dict[str, Any], top: int = 10):
+    p = report["params"]
+    docs = report["documents"]
+    print(f"{docs['samples']} samples, {docs['reference_scenes']} reference scenes  "
+          f"(J ≥ {p['threshold']}, {p['bands']} bands × {p['rows']} rows)")
+    print(f"{report['candidate_pairs']} candidate pairs → {report['near_dup_pairs']} "
+          f"near-duplicates, {len(report['clusters'])} clusters "
+          f"({report['cross_model_clusters']} across models)\n")
+    print(f"{'Model':<20} {'Samples':>7} {'Near-dup':>9} {'Cross-model':>12} "
+          f"{'Ref match':>10} {'Ref contain':>12}")
+    print(f"{'─'*20} {'─'*7} {'─'*9} {'─'*12} {'─'*10} {'─'*12}")
+    for model, s in report["per_model"].items():
+        print(f"{model:<20} {s['samples']:>7} {s['near_dup_rate']:>9.1%} "
+              f"{s['cross_model_rate']:>12.1%} {s['reference_match_rate']:>10.1%} "
+              f"{s['reference_containment']:>12.1%}")
+    if report["clusters"]:
+        print(f"\nLargest clusters (top {top}):")
+        for c in report["clusters"][:top]:
+            models = ", ".join(f"{m}×{n}" for m, n in sorted(c["models"].items()))
+            print(f"  {c['size']:>4}  {','.join(c['problems']) or '—':<14} {models[:90]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="MinHash/LSH near-duplicate detection over generated code",
+    )
+    parser.add_argument("--code-dir", type=str, default=str(GENERATED_CODE_DIR))
+    parser.add_argument("--raw-dir", type=str, default=str(RAW_CODE_DIR))
+    parser.add_argument("--no-reference", action="store_true",
+                        help="Skip the raw_code/ reference scenes")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUP_THRESHOLD,
+                        help=f"Jaccard threshold (default: {NEAR_DUP_THRESHOLD})")
+    parser.add_argument("--num-perm", type=int, default=NEAR_DUP_NUM_PERM,
+                        help=f"MinHash permutations (default: {NEAR_DUP_NUM_PERM})")
+    parser.add_argument("--top", type=int, default=10, help="Clusters to print")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Report path (default: results/analysis/near_duplicates.json)")
+    args = parser.parse_args()
+
+    docs = load_documents(args.code_dir, None if args.no_reference else args.raw_dir)
+    report = near_duplicate_report(docs, args.threshold, args.num_perm)
+    print_report(report, args.top)
+
+    out_path = Path(args.json) if args.json else RESULTS_DIR / "analysis" / "near_duplicates.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
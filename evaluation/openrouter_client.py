@@ -5,27 +5,25 @@ Handles LLM code generation via OpenRouter's unified API.
 Supports retries, rate limiting, token tracking, and error handling.
 """
 
+import os
 import time
 import json
-import re
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from evaluation.code_extract import extract_code
 from evaluation.config import (
-    OPENROUTER_API_KEY,
     OPENROUTER_BASE_URL,
     OPENROUTER_HEADERS,
     REQUEST_TIMEOUT,
     MAX_RETRIES,
     RETRY_DELAY,
     ModelSpec,
+    load_env,
 )
-
-
-class OpenRouterError(Exception):
-    """Raised on unrecoverable API errors."""
-    pass
+from evaluation.errors import OpenRouterError
 
 
 class OpenRouterClient:
@@ -37,16 +35,28 @@ class OpenRouterClient:
         result = client.generate(model_spec, messages)
     """
 
-    def __init__(self, api_key: str | None = None):
-        self.api_key = api_key or OPENROUTER_API_KEY
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        retry_delay: float = RETRY_DELAY,
+    ):
+        if api_key is None:
+            load_env()                     # .env fills in what the environment lacks
+        self.api_key = api_key or os.getenv("OPENROUTER_API_KEY", "")
         if not self.api_key:
             raise OpenRouterError(
                 "OPENROUTER_API_KEY not set. "
                 "Export it or create an .env file. "
                 "Get a key at https://openrouter.ai/keys"
             )
-        self.base_url = OPENROUTER_BASE_URL
+        self.base_url = base_url or os.getenv("OPENROUTER_BASE_URL", OPENROUTER_BASE_URL)
+        self.retry_delay = retry_delay
         self.session = requests.Session()
+        # Size the pool for concurrent workers sharing this session
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.session.headers.update({
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -67,6 +77,7 @@ class OpenRouterClient:
             {
                 "content": str,          # Generated text
                 "code": str,             # Extracted Python code block
+                "extraction": dict,      # How the code was found (code_extract.py)
                 "prompt_tokens": int,
                 "completion_tokens": int,
                 "total_tokens": int,
@@ -96,7 +107,8 @@ class OpenRouterClient:
 
                 if resp.status_code == 429:
                     # Rate limited — wait and retry
-                    wait = RETRY_DELAY * attempt
+                    last_error = OpenRouterError("HTTP 429: rate limited")
+                    wait = self.retry_delay * attempt
                     time.sleep(wait)
                     continue
 
@@ -113,9 +125,11 @@ class OpenRouterClient:
                 content = choice["message"]["content"]
                 usage = data.get("usage", {})
 
+                extraction = extract_code(content, choice.get("finish_reason"))
                 return {
                     "content": content,
-                    "code": self._extract_code(content),
+                    "code": extraction.code,
+                    "extraction": extraction.metadata(),
                     "prompt_tokens": usage.get("prompt_tokens", 0),
                     "completion_tokens": usage.get("completion_tokens", 0),
                     "total_tokens": usage.get("total_tokens", 0),
@@ -127,50 +141,13 @@ class OpenRouterClient:
             except (requests.ConnectionError, requests.Timeout) as e:
                 last_error = e
                 if attempt < MAX_RETRIES:
-                    time.sleep(RETRY_DELAY * attempt)
+                    time.sleep(self.retry_delay * attempt)
                 continue
 
         raise OpenRouterError(
             f"Failed after {MAX_RETRIES} attempts: {last_error}"
         )
 
-    @staticmethod
-    def _extract_code(content: str) -> str:
-        """
-        Extract Python code from LLM response.
-
-        Handles:
-          - ```python ... ``` blocks
-          - ``` ... ``` blocks
-          - Raw code (if no code fence found)
-        """
-        # Try ```python block first
-        pattern = r"```python\s*\n(.*?)```"
-        matches = re.findall(pattern, content, re.DOTALL)
-        if matches:
-            # Return the longest match (in case of multiple blocks)
-            return max(matches, key=len).strip()
-
-        # Try generic ``` block
-        pattern = r"```\s*\n(.*?)```"
-        matches = re.findall(pattern, content, re.DOTALL)
-        if matches:
-            return max(matches, key=len).strip()
-
-        # Fallback: look for 'from manim import' as code start
-        lines = content.split("\n")
-        code_start = None
-        for i, line in enumerate(lines):
-            if "from manim import" in line or "import manim" in line:
-                code_start = i
-                break
-
-        if code_start is not None:
-            return "\n".join(lines[code_start:]).strip()
-
-        # Last resort: return full content
-        return content.strip()
-
     def list_models(self) -> list[dict]:
         """Fetch available models from OpenRouter."""
         resp = self.session.get(
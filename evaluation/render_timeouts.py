@@ -0,0 +1,264 @@
+"""
+ManiBench Evaluation — Adaptive Render Timeouts
+=================================================
+Learns a render timeout per problem from the render times stored in past
+results files, instead of one global `--timeout` for all problems.
+
+For each problem, every distinct past render (one per code fingerprint)
+that either succeeded or hit its timeout is an observation. The timeout
+is the ADAPTIVE_TIMEOUT_PERCENTILE of the successful render times × the
+margin, clamped to [floor, cap]:
+
+  - learned   at least ADAPTIVE_TIMEOUT_MIN_RENDERS successful renders
+  - default   too few; the run's `--timeout` is kept
+
+Timed-out renders say only that a sample ran past its budget, so they do
+not raise the timeout; a problem whose samples often hang gets a tight
+budget from its working renders and its hang rate is reported beside it.
+
+Renders that failed for other reasons stop early and say nothing about
+how long a working scene takes, so they are ignored, as are capped
+renders (render_tiers.py), which stop drawing part-way.
+
+A render that times out is reported against its problem's history
+(`timeout_report`): how far past the typical render time the budget
+went, so a hung sample is told apart from a slow but working one.
+
+Usage:
+    python -m evaluation.render_timeouts
+    python -m evaluation.render_timeouts --timeout 60 --cap 300 --percentile 99
+"""
+
+import argparse
+import json
+import math
+import re
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+from evaluation.config import (
+    ADAPTIVE_TIMEOUT_CAP_S,
+    ADAPTIVE_TIMEOUT_FLOOR_S,
+    ADAPTIVE_TIMEOUT_HISTORY_FILES,
+    ADAPTIVE_TIMEOUT_MARGIN,
+    ADAPTIVE_TIMEOUT_MIN_RENDERS,
+    ADAPTIVE_TIMEOUT_PERCENTILE,
+    RESULTS_DIR,
+)
+
+
+_STAMP_RE = re.compile(r"\d{8}_\d{6}")
+
+
+def _run_time(path: Path) -> str:
+    """The YYYYmmdd_HHMMSS stamp in a results file name (else its mtime)."""
+    match = _STAMP_RE.search(path.name)
+    if match:
+        return match.group()
+    return time.strftime("%Y%m%d_%H%M%S", time.gmtime(path.stat().st_mtime))
+
+
+def results_files(results_dir: Path | str = RESULTS_DIR,
+                  limit: int | None = ADAPTIVE_TIMEOUT_HISTORY_FILES) -> list[Path]:
+    """The newest `limit` results files, oldest first (run, queue and worker exports alike)."""
+    paths = sorted(Path(results_dir).glob("results_*.json"), key=lambda p: (_run_time(p), p.name))
+    return paths[-limit:] if limit else paths
+
+
+def collect_render_times(paths: Iterable[Path | str]) -> dict[str, list[tuple[float, bool]]]:
+    """
+    Past render times per problem as [(wall_s, timed_out)].
+
+    Later files win when the same code fingerprint was rendered more than
+    once; renders shared within a run (`render_reused`) count once.
+    """
+    seen: dict[tuple[str, str], tuple[float, bool]] = {}
+    anonymous: dict[str, list[tuple[float, bool]]] = {}
+    for path in paths:
+        try:
+            with open(path) as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not isinstance(records, list):
+            continue
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            ex = (record.get("metrics_detail") or {}).get("executability") or {}
+            wall = (ex.get("render_resources") or {}).get("wall_s")
+            if not wall or ex.get("render_reused") or ex.get("render_tier") == "capped":
+                continue
+            timed_out = ex.get("error_type") == "Timeout"
+            if not (ex.get("render_success") or timed_out):
+                continue
+            if timed_out and ex.get("render_timeout_s"):
+                wall = max(wall, ex["render_timeout_s"])
+            pid = record.get("problem_id")
+            fingerprint = record.get("code_fingerprint")
+            if fingerprint:
+                seen[(pid, fingerprint)] = (float(wall), timed_out)
+            else:
+                anonymous.setdefault(pid, []).append((float(wall), timed_out))
+
+    history = anonymous
+    for (pid, _), obs in seen.items():
+        history.setdefault(pid, []).append(obs)
+    return history
+
+
+def _nearest_rank(values: list[float], percentile: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    rank = max(1, math.ceil(percentile / 100 * len(values)))
+    return values[rank - 1]
+
+
+def learn_timeouts(
+    history: dict[str, list[tuple[float, bool]]],
+    default_s: int,
+    cap_s: int = ADAPTIVE_TIMEOUT_CAP_S,
+    percentile: float = ADAPTIVE_TIMEOUT_PERCENTILE,
+    margin: float = ADAPTIVE_TIMEOUT_MARGIN,
+    floor_s: int = ADAPTIVE_TIMEOUT_FLOOR_S,
+    min_renders: int = ADAPTIVE_TIMEOUT_MIN_RENDERS,
+) -> dict[str, dict[str, Any]]:
+    """
+    Per-problem timeout profile from `history` (see collect_render_times).
+
+    Percentiles are over successful renders only; `timeouts` / `hang_rate`
+    count the renders that hit their budget.
+
+    Returns {problem_id: {"timeout_s", "source", "renders", "timeouts",
+    "hang_rate", "p50_s", "percentile", "percentile_s", "max_s"}}.
+    """
+    profile = {}
+    for pid, observations in sorted(history.items()):
+        ok = sorted(wall for wall, timed_out in observations if not timed_out)
+        n = len(observations)
+        stats = {
+            "timeout_s": default_s,
+            "source": "default",
+            "renders": n,
+            "timeouts": n - len(ok),
+            "hang_rate": round((n - len(ok)) / n, 3) if n else None,
+            "p50_s": round(_nearest_rank(ok, 50), 2) if ok else None,
+            "percentile": percentile,
+            "percentile_s": None,
+            "max_s": round(ok[-1], 2) if ok else None,
+        }
+        if len(ok) >= min_renders:
+            wall = _nearest_rank(ok, percentile)
+            stats["source"] = "learned"
+            stats["percentile_s"] = round(wall, 2)
+            stats["timeout_s"] = min(cap_s, max(floor_s, math.ceil(wall * margin)))
+        profile[pid] = stats
+    return profile
+
+
+def learn_from_results(
+    default_s: int,
+    cap_s: int = ADAPTIVE_TIMEOUT_CAP_S,
+    results_dir: Path | str = RESULTS_DIR,
+    **kwargs,
+) -> dict[str, dict[str, Any]]:
+    """learn_timeouts over the newest results files in `results_dir`."""
+    history = collect_render_times(results_files(results_dir))
+    return learn_timeouts(history, default_s, cap_s, **kwargs)
+
+
+def timeout_report(timeout_s: float, stats: dict[str, Any] | None) -> dict[str, Any]:
+    """
+    Place a timed-out render against its problem's history.
+
+    `over_percentile` is the budget as a multiple of the problem's learned
+    percentile render time; a render killed at several times what working
+    samples need has almost certainly hung rather than being slow.
+    """
+    report: dict[str, Any] = {"timeout_s": timeout_s, "source": "default"}
+    if not stats:
+        return report
+    report.update({
+        "source": stats["source"],
+        "renders": stats["renders"],
+        "hang_rate": stats.get("hang_rate"),
+        "p50_s": stats["p50_s"],
+        "percentile": stats["percentile"],
+        "percentile_s": stats["percentile_s"],
+    })
+    if stats["percentile_s"]:
+        report["over_percentile"] = round(timeout_s / stats["percentile_s"], 2)
+    return report
+
+
+def describe_timeout(report: dict[str, Any]) -> str:
+    """One-line console form of a timeout_report."""
+    text = f"timeout {report['timeout_s']}s"
+    if "over_percentile" in report:
+        text += (f" = {report['over_percentile']:.1f}× p{report['percentile']:g} "
+                 f"of {report['renders']} renders")
+    if report.get("hang_rate"):
+        text += f", {report['hang_rate']:.0%} of past renders hung"
+    return text
+
+
+def print_profile(profile: dict[str, dict[str, Any]], problem_ids: Iterable[str] | None = None,
+                  default_s: int | None = None):
+    """Print the per-problem timeout table."""
+    ids = list(problem_ids) if problem_ids is not None else list(profile)
+    pct = next(iter(profile.values()))["percentile"] if profile else ADAPTIVE_TIMEOUT_PERCENTILE
+    print(f"{'Problem':<10} {'Timeout':>8}  {'Source':<9} {'Renders':>7} "
+          f"{'Hung':>5} {'Rate':>5}  {'p50':>7}  {'p' + format(pct, 'g'):>7}  {'max':>7}")
+    print(f"{'─'*10} {'─'*8}  {'─'*9} {'─'*7} {'─'*5} {'─'*5}  {'─'*7}  {'─'*7}  {'─'*7}")
+
+    def secs(v):
+        return f"{v:>6.1f}s" if v is not None else f"{'—':>7}"
+
+    def rate(v):
+        return f"{v:>5.0%}" if v is not None else f"{'—':>5}"
+
+    for pid in ids:
+        s = profile.get(pid)
+        if s is None:
+            print(f"{pid:<10} {str(default_s) + 's':>8}  {'default':<9} {0:>7} {0:>5} {'—':>5}  "
+                  f"{secs(None)}  {secs(None)}  {secs(None)}")
+            continue
+        print(f"{pid:<10} {str(s['timeout_s']) + 's':>8}  {s['source']:<9} {s['renders']:>7} "
+              f"{s['timeouts']:>5} {rate(s.get('hang_rate'))}  {secs(s['p50_s'])}  {secs(s['percentile_s'])}  "
+              f"{secs(s['max_s'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Learn per-problem render timeouts from past results",
+    )
+    parser.add_argument("--results-dir", type=str, default=str(RESULTS_DIR))
+    parser.add_argument("--history", type=int, default=ADAPTIVE_TIMEOUT_HISTORY_FILES,
+                        help="Newest results files to read (0 = all; "
+                             f"default: {ADAPTIVE_TIMEOUT_HISTORY_FILES})")
+    parser.add_argument("--timeout", type=int, default=60,
+                        help="Timeout for problems without enough history (default: 60)")
+    parser.add_argument("--cap", type=int, default=ADAPTIVE_TIMEOUT_CAP_S,
+                        help=f"Largest timeout assigned (default: {ADAPTIVE_TIMEOUT_CAP_S})")
+    parser.add_argument("--percentile", type=float, default=ADAPTIVE_TIMEOUT_PERCENTILE,
+                        help=f"Render-time percentile (default: {ADAPTIVE_TIMEOUT_PERCENTILE})")
+    parser.add_argument("--margin", type=float, default=ADAPTIVE_TIMEOUT_MARGIN,
+                        help=f"Multiplier on the percentile (default: {ADAPTIVE_TIMEOUT_MARGIN})")
+    parser.add_argument("--json", action="store_true", help="Print the profile as JSON")
+    args = parser.parse_args()
+
+    paths = results_files(args.results_dir, args.history)
+    profile = learn_timeouts(
+        collect_render_times(paths), args.timeout, args.cap,
+        percentile=args.percentile, margin=args.margin,
+    )
+    if args.json:
+        print(json.dumps(profile, indent=2))
+        return
+    print(f"Render timeouts from {len(paths)} results file(s) "
+          f"(p{args.percentile:g} × {args.margin:g}, cap {args.cap}s)")
+    print_profile(profile, default_s=args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,15 @@ Usage:
     # Specific strategy, skip rendering
     python -m evaluation.run --strategy cot --skip-render
 
+    # All five strategies in one sweep sharing the generation/render pools
+    python -m evaluation.run --strategy zero_shot few_shot cot constraint version_aware --workers 8
+
+    # Inference.net batch API (one JSONL batch per model)
+    python -m evaluation.run --provider inference --batch --strategy zero_shot cot
+
+    # Per-problem render timeouts learned from past results
+    python -m evaluation.run --adaptive-timeout --timeout-cap 300
+
     # Quick test run (1 trial)
     python -m evaluation.run --trials 1 --models claude-sonnet-4 --problems MB-001
 
@@ -27,9 +36,12 @@ import os
 import sys
 import time
 import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
 
 from evaluation.config import (
+    ADAPTIVE_TIMEOUT_CAP_S,
+    BATCH_TERMINAL_STATES,
     DATASET_PATH,
     DEFAULT_MODELS,
     INFERENCE_MODELS,
@@ -37,19 +49,30 @@ from evaluation.config import (
     EvalConfig,
     GENERATED_CODE_DIR,
     RESULTS_DIR,
+    RenderCap,
+    RenderLimits,
+    ensure_dirs,
+    load_env,
     get_model_by_short_name,
     get_models_for_provider,
 )
+from evaluation.adaptive_trials import TrialAllocator, pass_at_k_report
+from evaluation.code_hash import ast_fingerprint, code_hash
+from evaluation.dedup import SampleDeduper, duplication_report
 from evaluation.logger import StructuredLogger
-from evaluation.openrouter_client import OpenRouterClient, OpenRouterError
-from evaluation.inference_client import InferenceNetClient, InferenceNetError
+from evaluation.errors import APIClientError
 from evaluation.prompts import build_messages
-from evaluation.metrics import (
-    compute_executability,
-    detect_version_conflicts,
-    detect_specific_conflicts,
-    compute_alignment,
-    compute_coverage,
+from evaluation.metrics import MediaStore, RenderCache
+from evaluation.metrics.render_tiers import RENDER_MODES, tier_report
+from evaluation.metrics.pipeline import (
+    METRIC_PIPELINE,
+    MetricContext,
+)
+from evaluation.render_timeouts import (
+    describe_timeout,
+    learn_from_results,
+    print_profile,
+    timeout_report,
 )
 
 
@@ -101,15 +124,19 @@ def resolve_models(names: list[str] | None, provider: str = "openrouter"):
 
 def create_client(provider: str = "openrouter"):
     """Factory: return the right API client for the chosen provider."""
+    # Imported here so `--help` and analysis-only use skip requests/httpx
     if provider == "inference":
+        from evaluation.inference_client import InferenceNetClient
         return InferenceNetClient()
+    from evaluation.openrouter_client import OpenRouterClient
     return OpenRouterClient()
 
 
 def save_generated_code(code: str, model_name: str, problem_id: str,
-                        trial: int, strategy: str) -> Path:
+                        trial: int, strategy: str,
+                        out_root: Path = GENERATED_CODE_DIR) -> Path:
     """Persist generated code to disk for inspection."""
-    out_dir = GENERATED_CODE_DIR / model_name / strategy
+    out_dir = Path(out_root) / model_name / strategy
     out_dir.mkdir(parents=True, exist_ok=True)
     filename = f"{problem_id}_trial{trial}.py"
     out_path = out_dir / filename
@@ -122,71 +149,651 @@ def compute_all_metrics(
     problem: dict,
     skip_render: bool = False,
     manim_timeout: int = 60,
+    render_limits: RenderLimits | None = None,
+    render_cache: RenderCache | None = None,
+    render_mode: str = "full",
+    render_cap: RenderCap | None = None,
+    audit_fraction: float = 0.0,
+    seed: int = 42,
+    media_store: MediaStore | None = None,
+    frame_alignment: bool = False,
+    reference_similarity: bool = False,
+    api_check: str = "off",
+    dedup: SampleDeduper | None = None,
+    fingerprint: str | None = None,
+    on_partial=None,
 ) -> dict:
-    """Run all four metrics on a generated code sample."""
-
-    # 1. Executability
-    exec_result = compute_executability(
-        code,
-        timeout=manim_timeout,
+    """
+    Run all four metrics on a generated code sample through the metric
+    pipeline (metrics/pipeline.py): cheap stages first, the render only if
+    they leave the verdict open.
+
+    With `dedup` and the code's `fingerprint`, the render is shared by
+    AST-identical samples rendered under the same settings.
+    `on_partial` receives the static metrics before the render starts.
+    With `frame_alignment` and a kept video, sampled frames are scored
+    against the problem's event timing as an extra diagnostic.
+    With `reference_similarity` the code is also compared to the problem's
+    raw_code/ reference scenes (metrics/reference_similarity.py).
+    `render_mode` "capped" / "tiered" bounds the render by `render_cap`
+    (tiered: a seeded `audit_fraction` of programs is also rendered in
+    full; see metrics/render_tiers.py).
+    """
+    ctx = MetricContext(
+        code=code,
+        problem=problem,
         skip_render=skip_render,
+        manim_timeout=manim_timeout,
+        render_limits=render_limits,
+        render_cache=render_cache,
+        render_mode=render_mode,
+        render_cap=render_cap,
+        audit_fraction=audit_fraction,
+        seed=seed,
+        media_store=media_store,
+        frame_alignment=frame_alignment,
+        reference_similarity=reference_similarity,
+        api_check=api_check,
+        dedup=dedup,
+        fingerprint=fingerprint,
     )
+    return METRIC_PIPELINE.run(ctx, on_partial=on_partial)
 
-    # 2. Version-Conflict Error Rate
-    vc_result = detect_version_conflicts(code)
 
-    # Check problem-specific conflicts
-    known_incompat = []
-    vcn = problem.get("version_conflict_notes", {})
-    if isinstance(vcn, dict):
-        known_incompat = vcn.get("known_incompatibilities", [])
-    vc_specific = detect_specific_conflicts(code, known_incompat)
+def _failure_metrics() -> dict:
+    """Scores assigned to a sample that produced no usable code."""
+    return {
+        "executability": 0,
+        "version_conflict_rate": 1.0,
+        "alignment_score": 0.0,
+        "coverage_score": 0.0,
+    }
 
-    # 3. Alignment Score
-    required_events = problem.get("required_visual_events", [])
-    align_result = compute_alignment(code, required_events)
 
-    # 4. Coverage Score
-    coverage_reqs = problem.get("coverage_requirements", [])
-    cov_result = compute_coverage(code, coverage_reqs)
+def fail_record(record: dict, error: str) -> dict:
+    """Mark `record` as failed with `error` and zeroed metrics; returns it."""
+    record["error"] = error
+    record["metrics"] = _failure_metrics()
+    return record
 
+
+def new_record(model, problem_id: str, trial: int, strategy: str) -> dict:
+    """Skeleton result record for one (model, problem, trial, strategy) sample."""
     return {
-        "executability": exec_result,
-        "version_conflict": {
-            **vc_result,
-            "problem_specific": vc_specific,
-        },
-        "alignment": align_result,
-        "coverage": cov_result,
-        # Summary scalars (for quick aggregation)
-        "_scores": {
-            "executability": exec_result.get("executability", 0),
-            "version_conflict_rate": vc_result.get("version_conflict_rate", 1.0),
-            "alignment_score": align_result.get("alignment_score", 0.0),
-            "coverage_score": cov_result.get("coverage_score", 0.0),
-        },
+        "model": model.short_name,
+        "model_id": model.id,
+        "problem_id": problem_id,
+        "trial": trial,
+        "strategy": strategy,
     }
 
 
+def generate_sample(
+    record: dict,
+    client,
+    model,
+    problem: dict,
+    logger: StructuredLogger,
+    code_dir: Path = GENERATED_CODE_DIR,
+    result: dict | None = None,
+) -> str:
+    """
+    Generate and save code for `record`'s sample; returns the code.
+
+    Fills record["generation"], record["code_path"] and record["code_hash"].
+    Empty output is recorded as an "empty_code" error with zeroed metrics
+    and returns "". API errors propagate to the caller. A `result` already fetched
+    (batch mode) is recorded as-is instead of calling `client`.
+    """
+    pid = problem["id"]
+    trial = record["trial"]
+    strategy = record["strategy"]
+
+    if result is None:
+        messages = build_messages(problem, strategy)
+        gen_start = time.time()
+        result = client.generate(
+            model=model,
+            messages=messages,
+            max_tokens=model.max_tokens,
+            temperature=model.temperature,
+        )
+        gen_time = time.time() - gen_start
+    else:
+        gen_time = result.get("latency_ms", 0.0) / 1000
+
+    code = result.get("code", "")
+    extraction = result.get("extraction", {})
+    record["generation"] = {
+        "latency_s": round(gen_time, 2),
+        "prompt_tokens": result.get("prompt_tokens", 0),
+        "completion_tokens": result.get("completion_tokens", 0),
+        "code_length": len(code),
+        "code_lines": len(code.split("\n")) if code else 0,
+        "code_source": extraction.get("source"),
+        "truncated": extraction.get("truncated", False),
+    }
+
+    if not code:
+        fail_record(record, "empty_code")
+        return ""
+
+    # Save generated code
+    code_path = save_generated_code(
+        code, model.short_name, pid, trial, strategy, out_root=code_dir,
+    )
+    record["code_path"] = str(code_path)
+    record["code_hash"] = code_hash(code)
+
+    # Log generation
+    logger.log_generation(
+        model=model.short_name,
+        problem_id=pid,
+        trial=trial,
+        prompt_strategy=strategy,
+        prompt_tokens=result.get("prompt_tokens", 0),
+        completion_tokens=result.get("completion_tokens", 0),
+        latency_ms=result.get("latency_ms", gen_time * 1000),
+        code=code,
+        code_path=record["code_path"],
+    )
+    return code
+
+
+def score_sample(
+    record: dict,
+    code: str,
+    problem: dict,
+    config: EvalConfig,
+    logger: StructuredLogger,
+    render_cache: RenderCache | None = None,
+    dedup: SampleDeduper | None = None,
+    media_store: MediaStore | None = None,
+) -> dict:
+    """
+    Compute all metrics for `record`'s generated code; returns the record.
+
+    With `dedup`, the render runs once per distinct code fingerprint in
+    the run and is shared by every duplicate sample. With `media_store`,
+    the rendered video is kept and indexed under (model, strategy,
+    problem, trial). Metric errors propagate.
+
+    Static metrics are logged as soon as they are known; the record's
+    metrics are then completed with the render verdict. The render runs
+    under the problem's learned timeout when `config.timeout_profile` has
+    one, and a timeout is reported against that problem's history.
+    """
+    fingerprint = ast_fingerprint(code)
+    record["code_fingerprint"] = fingerprint
+
+    def _publish_partial(partial: dict):
+        record["metrics"] = partial["_scores"]
+        logger.log_partial_metrics(
+            model=record["model"],
+            problem_id=record["problem_id"],
+            trial=record["trial"],
+            metrics=partial["_scores"],
+        )
+
+    metrics = compute_all_metrics(
+        code, problem,
+        skip_render=config.skip_render,
+        manim_timeout=config.timeout_for(record["problem_id"]),
+        render_limits=config.render_limits,
+        render_cache=render_cache,
+        render_mode=config.render_mode,
+        render_cap=config.render_cap,
+        audit_fraction=config.audit_fraction,
+        seed=config.seed,
+        media_store=media_store,
+        frame_alignment=config.frame_alignment,
+        reference_similarity=config.reference_similarity,
+        api_check=config.api_check,
+        dedup=dedup,
+        fingerprint=fingerprint,
+        on_partial=_publish_partial,
+    )
+    executability = metrics["executability"]
+    if executability.get("error_type") == "Timeout":
+        executability["timeout_report"] = timeout_report(
+            executability.get("render_timeout_s") or config.timeout_for(record["problem_id"]),
+            (config.timeout_profile or {}).get(record["problem_id"]),
+        )
+    media = executability.get("media")
+    if media_store is not None and media:
+        media_store.index(
+            record["model"], record["strategy"], record["problem_id"],
+            record["trial"], media,
+        )
+    record["metrics"] = metrics["_scores"]
+    record["metrics_detail"] = {
+        k: v for k, v in metrics.items() if k != "_scores"
+    }
+
+    # Log metrics
+    logger.log_metrics(
+        model=record["model"],
+        problem_id=record["problem_id"],
+        trial=record["trial"],
+        metrics=metrics["_scores"],
+    )
+    return record
+
+
+def _generate_step(
+    client,
+    model,
+    problem: dict,
+    trial: int,
+    strategy: str,
+    logger: StructuredLogger,
+    code_dir: Path = GENERATED_CODE_DIR,
+    result: dict | None = None,
+) -> tuple[dict, str]:
+    """generate_sample that records failures instead of raising."""
+    record = new_record(model, problem["id"], trial, strategy)
+    try:
+        return record, generate_sample(
+            record, client, model, problem, logger, code_dir, result,
+        )
+    except APIClientError as e:
+        fail_record(record, str(e))
+    except Exception:
+        fail_record(record, traceback.format_exc())
+    return record, ""
+
+
+def _score_step(
+    record: dict,
+    code: str,
+    problem: dict,
+    config: EvalConfig,
+    logger: StructuredLogger,
+    render_cache: RenderCache | None = None,
+    dedup: SampleDeduper | None = None,
+    media_store: MediaStore | None = None,
+) -> dict:
+    """score_sample that records failures instead of raising."""
+    try:
+        score_sample(
+            record, code, problem, config, logger,
+            render_cache, dedup, media_store,
+        )
+    except Exception:
+        fail_record(record, traceback.format_exc())
+    return record
+
+
+def evaluate_sample(
+    client,
+    model,
+    problem: dict,
+    trial: int,
+    config: EvalConfig,
+    logger: StructuredLogger,
+    code_dir: Path = GENERATED_CODE_DIR,
+    render_cache: RenderCache | None = None,
+    dedup: SampleDeduper | None = None,
+    media_store: MediaStore | None = None,
+    strategy: str | None = None,
+) -> dict:
+    """
+    Generate, save, and score one (model, problem, trial) sample.
+
+    Never raises: API and metric failures are recorded in the returned
+    record's "error" field with zeroed metrics, so one bad sample cannot
+    abort a run. Safe to call from concurrent worker threads.
+    `strategy` defaults to config.prompt_strategy.
+    """
+    record, code = _generate_step(
+        client, model, problem, trial,
+        strategy or config.prompt_strategy, logger, code_dir,
+    )
+    if code:
+        _score_step(
+            record, code, problem, config, logger,
+            render_cache, dedup, media_store,
+        )
+    return record
+
+
+def format_outcome(record: dict) -> str:
+    """One-line console summary of an evaluated sample."""
+    error = record.get("error")
+    if error == "empty_code":
+        return "✗  (empty code)"
+    if error:
+        last_line = error.strip().splitlines()[-1] if error.strip() else error
+        return f"✗  Error: {last_line}"
+    scores = record["metrics"]
+    gen_time = record.get("generation", {}).get("latency_s", 0.0)
+    exec_sym = "✓" if scores["executability"] == 1 else "✗"
+    line = (f"{exec_sym}  exec={scores['executability']} "
+            f"vc={scores['version_conflict_rate']:.3f} "
+            f"align={scores['alignment_score']:.3f} "
+            f"cov={scores['coverage_score']:.3f} "
+            f"({gen_time:.1f}s)")
+    report = (record.get("metrics_detail", {}).get("executability") or {}).get("timeout_report")
+    if report:
+        line += f"  [{describe_timeout(report)}]"
+    return line
+
+
+def run_samples(
+    client,
+    models,
+    problems: list[dict],
+    config: EvalConfig,
+    logger: StructuredLogger,
+    code_dir: Path = GENERATED_CODE_DIR,
+    render_cache: RenderCache | None = None,
+    dedup: SampleDeduper | None = None,
+    media_store: MediaStore | None = None,
+    cells: list[tuple] | None = None,
+) -> list[dict]:
+    """
+    Evaluate every (strategy, model, problem, trial) cell and return the records.
+    Pass `cells` to evaluate just those (strategy, model, problem, trial) tuples.
+
+    With `config.workers > 1` the two stages run on separate thread pools:
+    `workers` threads generate (I/O-bound) and `render_workers` threads
+    score, each render being its own subprocess. A sample moves to the
+    render pool as soon as its code arrives, so all strategies and models
+    share one generation pool and one render pool and a sweep is bounded
+    by its slowest model rather than the sum of its strategies.
+
+    Cells are submitted trial-first and strategy/model innermost, so
+    concurrent requests are spread across models. Records are returned
+    in (strategy, model, problem, trial) order regardless of completion.
+    """
+    if cells is None:
+        cells = [
+            (strategy, model, problem, trial)
+            for strategy in config.strategy_list()
+            for model in models
+            for problem in problems
+            for trial in range(1, config.trials + 1)
+        ]
+    total = len(cells)
+    records: list[dict | None] = [None] * total
+
+    def _report(done: int, record: dict):
+        print(f"    [{done}/{total}] {record['model']} {record['problem_id']} "
+              f"t{record['trial']} {record['strategy']}  {format_outcome(record)}",
+              flush=True)
+
+    if config.workers <= 1:
+        for i, (strategy, model, problem, trial) in enumerate(cells):
+            records[i] = evaluate_sample(
+                client, model, problem, trial, config, logger, code_dir,
+                render_cache, dedup, media_store, strategy=strategy,
+            )
+            _report(i + 1, records[i])
+        return records
+
+    order = sorted(
+        range(total),
+        key=lambda i: (cells[i][3], cells[i][2]["id"], cells[i][0], cells[i][1].short_name),
+    )
+    render_workers = config.render_workers or os.cpu_count() or 1
+    done = 0
+    with ThreadPoolExecutor(max_workers=config.workers) as gen_pool, \
+            ThreadPoolExecutor(max_workers=render_workers) as render_pool:
+        generating = {
+            gen_pool.submit(
+                _generate_step, client, cells[i][1], cells[i][2], cells[i][3],
+                cells[i][0], logger, code_dir,
+            ): i
+            for i in order
+        }
+        rendering: dict = {}
+        while generating or rendering:
+            finished, _ = wait(
+                [*generating, *rendering], return_when=FIRST_COMPLETED,
+            )
+            for future in finished:
+                if future in generating:
+                    i = generating.pop(future)
+                    record, code = future.result()
+                    if code:
+                        rendering[render_pool.submit(
+                            _score_step, record, code, cells[i][2], config, logger,
+                            render_cache, dedup, media_store,
+                        )] = i
+                        continue
+                else:
+                    i = rendering.pop(future)
+                    record = future.result()
+                records[i] = record
+                done += 1
+                _report(done, record)
+    return records
+
+
+def run_adaptive_samples(
+    client,
+    models,
+    problems: list[dict],
+    config: EvalConfig,
+    logger: StructuredLogger,
+    code_dir: Path = GENERATED_CODE_DIR,
+    render_cache: RenderCache | None = None,
+    dedup: SampleDeduper | None = None,
+    media_store: MediaStore | None = None,
+) -> list[dict]:
+    """
+    Evaluate with trials allocated by pass-rate uncertainty
+    (adaptive_trials.py): `min_trials` per cell, then rounds of one more
+    trial for the most uncertain open cells until `trial_budget` is spent.
+    Each round runs through run_samples and its pools.
+    """
+    strategies = config.strategy_list()
+    budget = config.trial_budget or config.trials * len(strategies) * len(models) * len(problems)
+    allocator = TrialAllocator(
+        strategies, models, problems, budget,
+        min_trials=config.min_trials, max_trials=config.max_trials,
+    )
+    records: list[dict] = []
+    cells = allocator.initial()
+    n_round = 0
+    while cells:
+        n_round += 1
+        print(f"  Round {n_round}: {len(cells)} trials "
+              f"({allocator.used}/{budget} of budget)", flush=True)
+        batch = run_samples(
+            client, models, problems, config, logger, code_dir,
+            render_cache, dedup, media_store, cells=cells,
+        )
+        for record in batch:
+            allocator.observe(record)
+        records.extend(batch)
+        cells = allocator.next_round()
+
+    report = allocator.report()
+    logger.info("Adaptive trial allocation", **report)
+    print(f"  Adaptive trials: {report['used']}/{budget} API calls, "
+          f"settled {report['settled']}")
+    model_order = [m.short_name for m in models]
+    problem_order = [p["id"] for p in problems]
+    records.sort(key=lambda r: (
+        strategies.index(r["strategy"]),
+        model_order.index(r["model"]),
+        problem_order.index(r["problem_id"]),
+        r["trial"],
+    ))
+    return records
+
+
+def _batch_id(strategy: str, problem_id: str, trial: int) -> str:
+    return f"{strategy}:{problem_id}:t{trial}"
+
+
+def run_batch_samples(
+    client,
+    models,
+    problems: list[dict],
+    config: EvalConfig,
+    logger: StructuredLogger,
+    code_dir: Path = GENERATED_CODE_DIR,
+    render_cache: RenderCache | None = None,
+    dedup: SampleDeduper | None = None,
+    media_store: MediaStore | None = None,
+) -> list[dict]:
+    """
+    Like run_samples, but generation goes through the provider's batch API.
+
+    Each model's (strategy, problem, trial) requests are submitted as one
+    JSONL batch up front; batches are polled every `config.batch_poll_s`
+    seconds and, as each completes, its samples are scored on the render
+    pool. Requests a batch failed or dropped are recorded as errors.
+    Records are returned in the same order as run_samples.
+    """
+    cells = [
+        (strategy, model, problem, trial)
+        for strategy in config.strategy_list()
+        for model in models
+        for problem in problems
+        for trial in range(1, config.trials + 1)
+    ]
+    total = len(cells)
+    records: list[dict | None] = [None] * total
+    by_model: dict[str, list[int]] = {}
+    for i, (_, model, _, _) in enumerate(cells):
+        by_model.setdefault(model.short_name, []).append(i)
+
+    done = 0
+
+    def _report(record: dict):
+        nonlocal done
+        done += 1
+        print(f"    [{done}/{total}] {record['model']} {record['problem_id']} "
+              f"t{record['trial']} {record['strategy']}  {format_outcome(record)}",
+              flush=True)
+
+    # ── Submit one batch per model ──
+    pending: dict[str, str] = {}       # model short name → batch id
+    specs = {m.short_name: m for m in models}
+    for name, idx in by_model.items():
+        requests = [
+            (_batch_id(cells[i][0], cells[i][2]["id"], cells[i][3]),
+             build_messages(cells[i][2], cells[i][0]))
+            for i in idx
+        ]
+        try:
+            pending[name] = client.submit_batch(specs[name], requests)
+        except APIClientError as e:
+            print(f"    ✗ Batch submission failed for {name}: {e}")
+            for i in idx:
+                strategy, model, problem, trial = cells[i]
+                records[i] = fail_record(
+                    new_record(model, problem["id"], trial, strategy), str(e),
+                )
+                _report(records[i])
+            continue
+        print(f"    Submitted batch {pending[name]} for {name} ({len(requests)} requests)")
+
+    # ── Poll; score each batch as soon as it finishes ──
+    render_workers = config.render_workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=render_workers) as render_pool:
+        rendering: dict = {}
+        while pending:
+            for name, batch_id in list(pending.items()):
+                try:
+                    batch = client.get_batch(batch_id)
+                except APIClientError as e:
+                    print(f"    ⚠ Polling {batch_id} failed: {e}")
+                    continue
+                status = batch.get("status")
+                if status not in BATCH_TERMINAL_STATES:
+                    continue
+                del pending[name]
+                counts = batch.get("request_counts", {})
+                print(f"    Batch {batch_id} ({name}) {status}: "
+                      f"{counts.get('completed', 0)} ok, {counts.get('failed', 0)} failed")
+                try:
+                    results = client.batch_results(batch, specs[name])
+                except APIClientError as e:
+                    results = {}
+                    status = f"{status}; output unavailable: {e}"
+
+                for i in by_model[name]:
+                    strategy, model, problem, trial = cells[i]
+                    result = results.get(_batch_id(strategy, problem["id"], trial))
+                    if result is None:
+                        result = {"error": f"missing from batch {batch_id} ({status})"}
+                    if "error" in result:
+                        records[i] = fail_record(
+                            new_record(model, problem["id"], trial, strategy),
+                            result["error"],
+                        )
+                        _report(records[i])
+                        continue
+                    record, code = _generate_step(
+                        client, model, problem, trial, strategy, logger, code_dir,
+                        result=result,
+                    )
+                    record.setdefault("generation", {})["batch_id"] = batch_id
+                    if not code:
+                        records[i] = record
+                        _report(record)
+                        continue
+                    rendering[render_pool.submit(
+                        _score_step, record, code, problem, config, logger,
+                        render_cache, dedup, media_store,
+                    )] = i
+            if pending:
+                time.sleep(config.batch_poll_s)
+
+        for future in as_completed(rendering):
+            i = rendering[future]
+            records[i] = future.result()
+            _report(records[i])
+    return records
+
+
 def run_evaluation(config: EvalConfig):
     """Execute the full evaluation loop."""
+    ensure_dirs()
 
     # ── Load dataset ──
     problems = load_dataset(DATASET_PATH)
     problems = filter_problems(problems, config.problems)
     models = resolve_models(config.models, provider=config.provider)
 
-    total_calls = len(models) * len(problems) * config.trials
+    strategies = config.strategy_list()
+    total_calls = len(strategies) * len(models) * len(problems) * config.trials
+    if config.adaptive_trials and config.trial_budget:
+        total_calls = config.trial_budget
     print(f"\n{'='*60}")
     print(f"ManiBench Evaluation")
     print(f"{'='*60}")
     print(f"Provider:  {config.provider}")
     print(f"Models:    {[m.short_name for m in models]}")
     print(f"Problems:  {[p['id'] for p in problems]}")
-    print(f"Trials:    {config.trials}")
-    print(f"Strategy:  {config.prompt_strategy}")
-    print(f"Total API calls: {total_calls}")
+    if config.adaptive_trials:
+        print(f"Trials:    adaptive ({config.min_trials}–{config.max_trials} per cell)")
+    else:
+        print(f"Trials:    {config.trials}")
+    print(f"Strategy:  {', '.join(strategies)}")
+    print(f"Workers:   {config.workers}"
+          + (f" (render: {config.render_workers or os.cpu_count()})"
+             if config.workers > 1 else ""))
+    print(f"Total API calls: {total_calls}" + (" (batched)" if config.batch else "")
+          + (" (budget)" if config.adaptive_trials else ""))
     print(f"Skip render: {config.skip_render}")
+    if config.adaptive_timeout and not config.skip_render:
+        config.timeout_profile = learn_from_results(config.manim_timeout, config.timeout_cap)
+        print(f"Timeouts:  learned per problem (default {config.manim_timeout}s, "
+              f"cap {config.timeout_cap}s)")
+        print_profile(config.timeout_profile, [p["id"] for p in problems],
+                      default_s=config.manim_timeout)
+    elif not config.skip_render:
+        print(f"Timeout:   {config.manim_timeout}s")
+    if config.render_mode != "full" and not config.skip_render:
+        print(f"Render:    {config.render_mode} (cap: {config.render_cap.max_plays} plays / "
+              f"{config.render_cap.max_scene_s}s scene time"
+              + (f", audit {config.audit_fraction:.0%} in full" if config.render_mode == "tiered" else "")
+              + ")")
     print(f"{'='*60}\n")
 
     # ── Initialize components ──
@@ -200,141 +807,62 @@ def run_evaluation(config: EvalConfig):
         "model_ids": [m.id for m in models],
         "problems": [p["id"] for p in problems],
         "trials": config.trials,
+        "adaptive_trials": config.adaptive_trials,
+        "trial_budget": total_calls if config.adaptive_trials else None,
+        "min_trials": config.min_trials,
+        "max_trials": config.max_trials,
         "prompt_strategy": config.prompt_strategy,
+        "strategies": strategies,
         "skip_render": config.skip_render,
         "manim_timeout": config.manim_timeout,
+        "adaptive_timeout": config.adaptive_timeout,
+        "timeout_cap": config.timeout_cap,
+        "problem_timeouts": {
+            p["id"]: config.timeout_for(p["id"]) for p in problems
+        },
         "seed": config.seed,
+        "workers": config.workers,
+        "render_workers": config.render_workers,
+        "render_limits": config.render_limits.as_dict(),
+        "render_mode": config.render_mode,
+        "render_cap": config.render_cap.as_dict(),
+        "audit_fraction": config.audit_fraction,
+        "render_cache": config.render_cache,
+        "dedup_samples": config.dedup_samples,
+        "api_check": config.api_check,
+        "save_video": config.save_video,
+        "frame_alignment": config.frame_alignment,
+        "reference_similarity": config.reference_similarity,
+        "batch": config.batch,
     })
 
-    # ── Results accumulator ──
-    all_results: list[dict] = []
-    call_counter = 0
-
-    for model in models:
-        print(f"\n{'─'*50}")
-        print(f"Model: {model.short_name} ({model.id})")
-        print(f"{'─'*50}")
-
-        for problem in problems:
-            pid = problem["id"]
-            difficulty = problem.get("difficulty", "?")
-            print(f"\n  Problem {pid} (difficulty {difficulty})")
-
-            for trial in range(1, config.trials + 1):
-                call_counter += 1
-                print(f"    Trial {trial}/{config.trials} "
-                      f"[{call_counter}/{total_calls}] ... ", end="", flush=True)
-
-                record = {
-                    "model": model.short_name,
-                    "model_id": model.id,
-                    "problem_id": pid,
-                    "trial": trial,
-                    "strategy": config.prompt_strategy,
-                }
-
-                try:
-                    # ── Generate code ──
-                    messages = build_messages(problem, config.prompt_strategy)
-                    gen_start = time.time()
-                    result = client.generate(
-                        model=model,
-                        messages=messages,
-                        max_tokens=model.max_tokens,
-                        temperature=model.temperature,
-                    )
-                    gen_time = time.time() - gen_start
-
-                    code = result.get("code", "")
-                    record["generation"] = {
-                        "latency_s": round(gen_time, 2),
-                        "prompt_tokens": result.get("prompt_tokens", 0),
-                        "completion_tokens": result.get("completion_tokens", 0),
-                        "code_length": len(code),
-                        "code_lines": len(code.split("\n")) if code else 0,
-                    }
-
-                    # Save generated code
-                    if code:
-                        code_path = save_generated_code(
-                            code, model.short_name, pid, trial,
-                            config.prompt_strategy,
-                        )
-                        record["code_path"] = str(code_path)
-
-                        # Log generation
-                        logger.log_generation(
-                            model=model.short_name,
-                            problem_id=pid,
-                            trial=trial,
-                            prompt_strategy=config.prompt_strategy,
-                            prompt_tokens=result.get("prompt_tokens", 0),
-                            completion_tokens=result.get("completion_tokens", 0),
-                            latency_ms=result.get("latency_ms", gen_time * 1000),
-                            code=code,
-                        )
-
-                        # ── Compute metrics ──
-                        metrics = compute_all_metrics(
-                            code, problem,
-                            skip_render=config.skip_render,
-                            manim_timeout=config.manim_timeout,
-                        )
-                        record["metrics"] = metrics["_scores"]
-                        record["metrics_detail"] = {
-                            k: v for k, v in metrics.items() if k != "_scores"
-                        }
-
-                        # Log metrics
-                        logger.log_metrics(
-                            model=model.short_name,
-                            problem_id=pid,
-                            trial=trial,
-                            metrics=metrics["_scores"],
-                        )
-
-                        scores = metrics["_scores"]
-                        exec_sym = "✓" if scores["executability"] == 1 else "✗"
-                        print(f"{exec_sym}  exec={scores['executability']} "
-                              f"vc={scores['version_conflict_rate']:.3f} "
-                              f"align={scores['alignment_score']:.3f} "
-                              f"cov={scores['coverage_score']:.3f} "
-                              f"({gen_time:.1f}s)")
-                    else:
-                        record["error"] = "empty_code"
-                        record["metrics"] = {
-                            "executability": 0,
-                            "version_conflict_rate": 1.0,
-                            "alignment_score": 0.0,
-                            "coverage_score": 0.0,
-                        }
-                        print("✗  (empty code)")
-
-                except (OpenRouterError, InferenceNetError) as e:
-                    record["error"] = str(e)
-                    record["metrics"] = {
-                        "executability": 0,
-                        "version_conflict_rate": 1.0,
-                        "alignment_score": 0.0,
-                        "coverage_score": 0.0,
-                    }
-                    print(f"✗  API error: {e}")
-
-                except Exception as e:
-                    record["error"] = traceback.format_exc()
-                    record["metrics"] = {
-                        "executability": 0,
-                        "version_conflict_rate": 1.0,
-                        "alignment_score": 0.0,
-                        "coverage_score": 0.0,
-                    }
-                    print(f"✗  Error: {e}")
-
-                all_results.append(record)
+    # ── Evaluate all samples ──
+    render_cache = None
+    if config.render_cache and not config.skip_render:
+        render_cache = RenderCache()
+    media_store = None
+    if config.save_video and not config.skip_render:
+        media_store = MediaStore()
+    dedup = SampleDeduper() if config.dedup_samples else None
+    if config.batch:
+        runner = run_batch_samples
+    elif config.adaptive_trials:
+        runner = run_adaptive_samples
+    else:
+        runner = run_samples
+    all_results = runner(
+        client, models, problems, config, logger,
+        render_cache=render_cache, dedup=dedup, media_store=media_store,
+    )
 
     # ── Save & summarize ──
     print(f"\n{'='*60}")
     print(f"Evaluation complete: {len(all_results)} records")
+    if render_cache is not None:
+        stats = render_cache.stats()
+        print(f"Render cache: {stats['hits']} hits, {stats['misses']} misses")
+    if media_store is not None:
+        print(f"Videos: {media_store.root} (index: {media_store.index_path.name})")
     print(f"{'='*60}")
 
     # Save raw results
@@ -344,6 +872,11 @@ def run_evaluation(config: EvalConfig):
         json.dump(all_results, f, indent=2, default=str)
     print(f"Raw results saved: {results_path}")
 
+    from evaluation.code_index import CodeIndex
+
+    with CodeIndex() as index:
+        print(f"Code index: {index.update()} new samples ({index.path})")
+
     # Generate summary
     summary = _build_summary(all_results, models, problems, config)
     logger.save_summary(summary)
@@ -413,6 +946,20 @@ def _build_summary(
                 "cov": sum(s["coverage_score"] for s in scores) / max(n, 1),
             }
 
+    # Per-strategy aggregation (sweeps)
+    strategy_agg: dict[str, dict] = {}
+    for strategy in config.strategy_list():
+        scores = [r["metrics"] for r in results
+                  if r.get("strategy") == strategy and "metrics" in r]
+        n = len(scores)
+        strategy_agg[strategy] = {
+            "n_samples": n,
+            "executability_mean": sum(s["executability"] for s in scores) / max(n, 1),
+            "version_conflict_mean": sum(s["version_conflict_rate"] for s in scores) / max(n, 1),
+            "alignment_mean": sum(s["alignment_score"] for s in scores) / max(n, 1),
+            "coverage_mean": sum(s["coverage_score"] for s in scores) / max(n, 1),
+        }
+
     # Global aggregate
     all_scores = [r["metrics"] for r in results if "metrics" in r]
     n_all = len(all_scores)
@@ -427,6 +974,7 @@ def _build_summary(
     return {
         "config": {
             "strategy": config.prompt_strategy,
+            "strategies": config.strategy_list(),
             "trials": config.trials,
             "n_models": len(models),
             "n_problems": len(problems),
@@ -434,10 +982,59 @@ def _build_summary(
         "global": global_agg,
         "per_model": model_agg,
         "per_problem": problem_agg,
+        "per_strategy": strategy_agg,
         "grid": grid,
+        "duplication": duplication_report(results),
+        "timeouts": _timeout_summary(results, problems, config),
+        "render_tiers": tier_report(results) if config.render_mode != "full" else None,
+        "pass_at_k": pass_at_k_report(results, seed=config.seed),
+        "reference_similarity": (_reference_similarity_summary(results, models)
+                                 if config.reference_similarity else None),
     }
 
 
+def _reference_similarity_summary(results: list[dict], models: list) -> dict:
+    """Per-model mean best-scene and centroid similarity to the reference code."""
+    out = {}
+    for m in models:
+        sims = [
+            r["metrics_detail"]["reference_similarity"]
+            for r in results
+            if r["model"] == m.short_name
+            and ((r.get("metrics_detail") or {}).get("reference_similarity") or {})
+            .get("reference_similarity") is not None
+        ]
+        n = len(sims)
+        out[m.short_name] = {
+            "n_samples": n,
+            "best_mean": sum(s["reference_similarity"] for s in sims) / n if n else None,
+            "centroid_mean": sum(s["centroid_similarity"] for s in sims) / n if n else None,
+        }
+    return out
+
+
+def _timeout_summary(results: list[dict], problems: list[dict], config: EvalConfig) -> dict:
+    """Per-problem timeout used and how many renders hit it."""
+    out = {}
+    for p in problems:
+        pid = p["id"]
+        reports = [
+            r["metrics_detail"]["executability"]["timeout_report"]
+            for r in results
+            if r["problem_id"] == pid
+            and (r.get("metrics_detail", {}).get("executability") or {}).get("timeout_report")
+        ]
+        stats = (config.timeout_profile or {}).get(pid) or {}
+        out[pid] = {
+            "timeout_s": config.timeout_for(pid),
+            "source": stats.get("source", "default"),
+            "history_renders": stats.get("renders", 0),
+            "percentile_s": stats.get("percentile_s"),
+            "timed_out": len(reports),
+        }
+    return out
+
+
 def _print_summary_table(summary: dict):
     """Print a nice ASCII summary table."""
     print(f"\n{'='*80}")
@@ -461,6 +1058,52 @@ def _print_summary_table(summary: dict):
           f"{g['alignment_mean']:>7.3f}  "
           f"{g['coverage_mean']:>7.3f}")
 
+    if len(summary.get("per_strategy", {})) > 1:
+        print(f"\n{'Strategy':<20} {'N':>4}  {'Exec':>6}  {'VC-Rate':>8}  {'Align':>7}  {'Cover':>7}")
+        print(f"{'─'*20} {'─'*4}  {'─'*6}  {'─'*8}  {'─'*7}  {'─'*7}")
+        for strategy, agg in summary["per_strategy"].items():
+            print(f"{strategy:<20} {agg['n_samples']:>4}  "
+                  f"{agg['executability_mean']:>6.3f}  "
+                  f"{agg['version_conflict_mean']:>8.4f}  "
+                  f"{agg['alignment_mean']:>7.3f}  "
+                  f"{agg['coverage_mean']:>7.3f}")
+
+    pak = summary.get("pass_at_k")
+    if pak and pak["per_model"]:
+        ks = pak["k"]
+        print(f"\n{'Model':<20} " + "  ".join(f"{'pass@' + str(k):>22}" for k in ks))
+        print(f"{'─'*20} " + "  ".join("─" * 22 for _ in ks))
+        for model_name, est in pak["per_model"].items():
+            cols = []
+            for k in ks:
+                e = est[f"pass@{k}"]
+                cols.append(f"{'—':>22}" if e["estimate"] is None else
+                            f"{e['estimate']:.3f} [{e['ci95'][0]:.3f}, {e['ci95'][1]:.3f}]".rjust(22))
+            print(f"{model_name:<20} " + "  ".join(cols))
+
+    tiers = summary.get("render_tiers")
+    if tiers and tiers["tiers"]:
+        line = ", ".join(f"{n} {tier}" for tier, n in tiers["tiers"].items())
+        print(f"\nRenders: {line}")
+        if tiers["audited"]:
+            lo, hi = tiers["ci95"]
+            print(f"Capped vs. full: {tiers['disagree']}/{tiers['audited']} audited programs "
+                  f"disagree ({tiers['disagreement_rate']:.1%}, 95% CI {lo:.1%}–{hi:.1%})")
+
+    dup = summary.get("duplication")
+    if dup and dup["n"]:
+        print(f"\nDuplicate samples: {dup['n'] - dup['unique']}/{dup['n']} "
+              f"({dup['dup_rate']:.1%}), renders reused: {dup['renders_saved']}")
+
+    ref = summary.get("reference_similarity")
+    if ref:
+        print(f"\n{'Model':<20} {'N':>4}  {'RefSim':>7}  {'Centroid':>8}")
+        print(f"{'─'*20} {'─'*4}  {'─'*7}  {'─'*8}")
+        for model_name, agg in ref.items():
+            if agg["n_samples"]:
+                print(f"{model_name:<20} {agg['n_samples']:>4}  "
+                      f"{agg['best_mean']:>7.3f}  {agg['centroid_mean']:>8.3f}")
+
     print(f"\n{'='*80}")
     print("SUMMARY — Per-Problem Averages")
     print(f"{'='*80}")
@@ -505,9 +1148,26 @@ Examples:
         help="Number of trials per (model, problem) pair (default: 3)",
     )
     parser.add_argument(
-        "--strategy", type=str, default="zero_shot",
+        "--adaptive-trials", action="store_true",
+        help="Allocate trials by pass-rate uncertainty instead of --trials "
+             "per cell; the budget defaults to what --trials would spend",
+    )
+    parser.add_argument(
+        "--trial-budget", type=int, default=0,
+        help="Adaptive: total API calls (default: trials × cells)",
+    )
+    parser.add_argument(
+        "--min-trials", type=int, default=2,
+        help="Adaptive: trials every cell gets before allocation (default: 2)",
+    )
+    parser.add_argument(
+        "--max-trials", type=int, default=10,
+        help="Adaptive: most trials for one cell (default: 10)",
+    )
+    parser.add_argument(
+        "--strategy", type=str, nargs="+", default=["zero_shot"],
         choices=["zero_shot", "few_shot", "cot", "constraint", "version_aware"],
-        help="Prompt strategy (default: zero_shot)",
+        help="Prompt strategy (default: zero_shot); several run as one sweep",
     )
     parser.add_argument(
         "--skip-render", action="store_true",
@@ -517,21 +1177,111 @@ Examples:
         "--timeout", type=int, default=60,
         help="Manim render timeout in seconds (default: 60)",
     )
+    parser.add_argument(
+        "--adaptive-timeout", action="store_true",
+        help="Learn a render timeout per problem from past results "
+             "(high percentile of past render times; --timeout where "
+             "history is too thin)",
+    )
+    parser.add_argument(
+        "--timeout-cap", type=int, default=ADAPTIVE_TIMEOUT_CAP_S,
+        help=f"Largest learned timeout in seconds (default: {ADAPTIVE_TIMEOUT_CAP_S})",
+    )
+    parser.add_argument(
+        "--render-mode", type=str, default="full", choices=RENDER_MODES,
+        help="full: render every sample completely (default); capped: stop "
+             "drawing after --cap-plays play calls / --cap-scene-seconds and "
+             "dry-run the rest; tiered: capped, plus a full render of an "
+             "--audit-fraction subset to measure capped/full disagreement",
+    )
+    parser.add_argument(
+        "--cap-plays", type=int, default=RenderCap.max_plays,
+        help=f"Capped render: play calls drawn per scene (default: {RenderCap.max_plays})",
+    )
+    parser.add_argument(
+        "--cap-scene-seconds", type=float, default=RenderCap.max_scene_s,
+        help=f"Capped render: scene seconds drawn (default: {RenderCap.max_scene_s})",
+    )
+    parser.add_argument(
+        "--audit-fraction", type=float, default=0.1,
+        help="Tiered render: share of distinct programs also rendered in full (default: 0.1)",
+    )
+    parser.add_argument(
+        "--render-cpu-limit", type=int, default=RenderLimits.cpu_seconds,
+        help=f"Per-process CPU seconds for a render (default: {RenderLimits.cpu_seconds})",
+    )
+    parser.add_argument(
+        "--render-memory-mb", type=int, default=RenderLimits.address_space_mb,
+        help=f"Per-process address-space limit in MB (default: {RenderLimits.address_space_mb})",
+    )
+    parser.add_argument(
+        "--no-render-cache", action="store_true",
+        help="Always re-render, ignoring cached results for unchanged code",
+    )
+    parser.add_argument(
+        "--save-video", action="store_true",
+        help="Keep rendered videos + thumbnail strips in evaluation/media/",
+    )
+    parser.add_argument(
+        "--frame-alignment", action="store_true",
+        help="Also score sampled frames of each kept video against event "
+             "timing (implies --save-video; needs ffmpeg)",
+    )
+    parser.add_argument(
+        "--reference-similarity", action="store_true",
+        help="Also score AST/API-call TF-IDF similarity to the problem's "
+             "raw_code/ reference scenes",
+    )
+    parser.add_argument(
+        "--no-dedup", action="store_true",
+        help="Render every trial even when its code duplicates another trial's",
+    )
+    parser.add_argument(
+        "--api-check", type=str, default="off", choices=["off", "flag", "skip"],
+        help="Check code against the installed Manim's API index before "
+             "rendering: flag predicted failures, or skip rendering them "
+             "(default: off)",
+    )
     parser.add_argument(
         "--seed", type=int, default=42,
         help="Random seed for reproducibility (default: 42)",
     )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Samples evaluated concurrently (default: 1 = sequential)",
+    )
+    parser.add_argument(
+        "--render-workers", type=int, default=0,
+        help="Concurrent renders when --workers > 1 (default: 0 = CPU count)",
+    )
     parser.add_argument(
         "--provider", type=str, default="openrouter",
         choices=SUPPORTED_PROVIDERS,
         help="API provider: openrouter (default) or inference (inference.net)",
     )
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="Generate via the provider's batch API (inference only): one "
+             "batch per model, cheaper but slower to return",
+    )
+    parser.add_argument(
+        "--batch-poll", type=float, default=30.0,
+        help="Seconds between batch status polls (default: 30)",
+    )
     return parser.parse_args()
 
 
 def main():
     """Entry point."""
     args = parse_args()
+    load_env()
+
+    if args.batch and args.provider != "inference":
+        print("ERROR: --batch needs a provider with a batch API (--provider inference).")
+        sys.exit(1)
+    if args.batch and args.adaptive_trials:
+        print("ERROR: --adaptive-trials allocates trials round by round; it cannot use --batch.")
+        sys.exit(1)
 
     # Validate API key for the chosen provider
     if args.provider == "inference":
@@ -549,13 +1299,40 @@ def main():
 
     config = EvalConfig(
         trials=args.trials,
+        adaptive_trials=args.adaptive_trials,
+        trial_budget=max(0, args.trial_budget),
+        min_trials=args.min_trials,
+        max_trials=args.max_trials,
         problems=args.problems,
         models=args.models,
-        prompt_strategy=args.strategy,
+        prompt_strategy=args.strategy[0],
+        strategies=args.strategy if len(args.strategy) > 1 else None,
         manim_timeout=args.timeout,
+        adaptive_timeout=args.adaptive_timeout,
+        timeout_cap=args.timeout_cap,
         skip_render=args.skip_render,
         seed=args.seed,
+        workers=max(1, args.workers),
+        render_workers=max(0, args.render_workers),
+        render_limits=RenderLimits(
+            cpu_seconds=args.render_cpu_limit,
+            address_space_mb=args.render_memory_mb,
+        ),
+        render_mode=args.render_mode,
+        render_cap=RenderCap(
+            max_plays=args.cap_plays,
+            max_scene_s=args.cap_scene_seconds,
+        ),
+        audit_fraction=args.audit_fraction,
+        render_cache=not args.no_render_cache,
+        dedup_samples=not args.no_dedup,
+        api_check=args.api_check,
+        save_video=args.save_video or args.frame_alignment,
+        frame_alignment=args.frame_alignment,
+        reference_similarity=args.reference_similarity,
         provider=args.provider,
+        batch=args.batch,
+        batch_poll_s=args.batch_poll,
     )
 
     run_evaluation(config)
@@ -0,0 +1,235 @@
+"""
+ManiBench Evaluation — Render Worker
+======================================
+Pulls render jobs from a broker (broker.py), renders and scores them on
+this machine, and pushes the records back. Generation never happens here,
+so no API key is needed — only this repository (for the dataset), Manim,
+and network access to the broker.
+
+Each job is one generated sample. The worker scores it with the queue's
+stored settings (timeout, limits, render mode, ...) and its own render
+cache and media store, renewing its lease every BROKER_HEARTBEAT_S while
+the render runs. A worker that is stopped hands its current job back; one
+that dies loses it to the broker's lease expiry instead.
+
+Workers exit once the broker reports the queue drained.
+
+Usage:
+    python -m evaluation.worker --broker http://buildbox:8642
+    python -m evaluation.worker --broker http://buildbox:8642 --processes 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+from dataclasses import replace
+from typing import Any
+
+from evaluation.config import (
+    BROKER_HEARTBEAT_S,
+    BROKER_POLL_S,
+    BROKER_PORT,
+    DATASET_PATH,
+    MAX_RETRIES,
+    RETRY_DELAY,
+    ensure_dirs,
+)
+from evaluation.job_queue import config_from_settings, worker_id
+
+
+class BrokerError(RuntimeError):
+    """The broker could not be reached or rejected a request."""
+
+
+class BrokerClient:
+    """JSON-over-HTTP calls to a broker; connection errors are retried."""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _call(self, path: str, payload: dict | None = None) -> dict[str, Any]:
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(
+            self.url + path, data=data, headers={"Content-Type": "application/json"},
+        )
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                raise BrokerError(f"{path}: HTTP {e.code}: {e.read().decode()[-500:]}") from e
+            except (urllib.error.URLError, OSError) as e:
+                if attempt == MAX_RETRIES:
+                    raise BrokerError(f"{path}: broker unreachable at {self.url}: {e}") from e
+                time.sleep(RETRY_DELAY)
+        raise AssertionError("unreachable")
+
+    def settings(self) -> dict[str, Any]:
+        return self._call("/settings")
+
+    def status(self) -> dict[str, Any]:
+        return self._call("/status")
+
+    def claim(self, worker: str) -> dict[str, Any]:
+        return self._call("/claim", {"worker": worker})
+
+    def heartbeat(self, item_id: int, worker: str) -> bool:
+        return self._call("/heartbeat", {"id": item_id, "worker": worker})["ok"]
+
+    def complete(self, item_id: int, worker: str, record: dict) -> bool:
+        return self._call("/complete", {"id": item_id, "worker": worker, "record": record})["ok"]
+
+    def fail(self, item_id: int, worker: str, error: str, record: dict | None = None) -> bool:
+        return self._call("/fail", {
+            "id": item_id, "worker": worker, "error": error, "record": record,
+        })["ok"]
+
+    def release(self, item_id: int, worker: str) -> bool:
+        return self._call("/release", {"id": item_id, "worker": worker})["ok"]
+
+
+class _Heartbeat:
+    """Background lease renewal for one job while it is being scored."""
+
+    def __init__(self, client: BrokerClient, item_id: int, worker: str,
+                 interval: float = BROKER_HEARTBEAT_S):
+        self.client = client
+        self.item_id = item_id
+        self.worker = worker
+        self.interval = interval
+        self.lost = False               # broker re-queued the job meanwhile
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.client.heartbeat(self.item_id, self.worker):
+                    self.lost = True
+                    return
+            except BrokerError:
+                pass                    # transient; the lease has slack for a missed beat
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(broker_url: str, max_items: int | None = None) -> int:
+    """
+    Render jobs from `broker_url` until the queue is drained (or
+    `max_items` are done). Module-level so it can be the target of a
+    spawned process. Returns the number of jobs this worker finished.
+    """
+    from evaluation.logger import StructuredLogger
+    from evaluation.metrics import MediaStore, RenderCache
+    from evaluation.run import fail_record, format_outcome, load_dataset, score_sample
+
+    ensure_dirs()
+    client = BrokerClient(broker_url)
+    worker = worker_id()
+    config = config_from_settings(client.settings())
+    problems = {p["id"]: p for p in load_dataset(DATASET_PATH)}
+    logger = StructuredLogger(
+        run_id=f"{time.strftime('%Y%m%d_%H%M%S', time.gmtime())}_{worker.replace(':', '_')}",
+    )
+    render_cache = RenderCache() if config.render_cache and not config.skip_render else None
+    media_store = MediaStore() if config.save_video and not config.skip_render else None
+
+    done = 0
+    job = None
+    try:
+        while max_items is None or done < max_items:
+            reply = client.claim(worker)
+            job = reply["item"]
+            if job is None:
+                if reply["done"]:
+                    break
+                time.sleep(BROKER_POLL_S)
+                continue
+
+            record = job["record"]
+            problem = problems.get(job["problem_id"])
+            if problem is None:
+                client.fail(job["id"], worker, f"unknown problem on {worker}: "
+                            f"{job['problem_id']}", record)
+                job = None
+                continue
+            with _Heartbeat(client, job["id"], worker) as beat:
+                try:
+                    score_sample(
+                        record, job["code"], problem,
+                        replace(config, prompt_strategy=job["strategy"]),
+                        logger, render_cache, None, media_store,
+                    )
+                    error = None
+                except Exception:
+                    fail_record(record, traceback.format_exc())
+                    error = record["error"]
+            if error is not None:
+                accepted = client.fail(job["id"], worker, error, record)
+            else:
+                accepted = client.complete(job["id"], worker, record)
+            job = None
+            done += 1
+            outcome = format_outcome(record) if "metrics" in record else "✗"
+            if beat.lost or not accepted:
+                outcome = "lease lost, result dropped"
+            print(f"    [{worker}] {record['model']} {record['problem_id']} "
+                  f"t{record['trial']} {record.get('strategy', '')}  {outcome}",
+                  flush=True)
+    except BaseException:
+        if job is not None:                    # interrupted mid-job: hand it back
+            try:
+                client.release(job["id"], worker)
+            except BrokerError:
+                pass                           # lease expiry will re-queue it
+        raise
+    finally:
+        logger.close()
+    return done
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Render jobs from a ManiBench broker",
+    )
+    parser.add_argument("--broker", type=str, default=f"http://127.0.0.1:{BROKER_PORT}",
+                        help=f"Broker URL (default: http://127.0.0.1:{BROKER_PORT})")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Worker processes to start (default: 1)")
+    parser.add_argument("--max-items", type=int, default=None,
+                        help="Stop each worker after this many jobs")
+    return parser.parse_args()
+
+
+def main():
+    """Entry point."""
+    args = parse_args()
+    if args.processes <= 1:
+        done = run_worker(args.broker, args.max_items)
+        print(f"Worker finished {done} jobs")
+        return
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=run_worker, args=(args.broker, args.max_items))
+        for _ in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
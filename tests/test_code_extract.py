@@ -0,0 +1,53 @@
+"""Fence handling in evaluation.code_extract."""
+
+import pytest
+
+from evaluation.code_extract import CodeFenceScanner, extract_code
+
+CODE = "from manim import *\n\nclass A(Scene):\n    def construct(self):\n        print(1)"
+
+SHAPES = {
+    "own_lines": f"Here it is:\n```python\n{CODE}\n```\nDone.",
+    "prose_before_opening": f"Sure! ```python\n{CODE}\n```",
+    "closing_after_code": f"```python\n{CODE}```",
+    "closing_after_code_then_prose": f"Sure! ```python\n{CODE}```\nHope this helps!",
+    "untagged": f"```\n{CODE}\n```",
+}
+
+
+@pytest.mark.parametrize("name", sorted(SHAPES))
+def test_fence_shapes(name):
+    result = extract_code(SHAPES[name])
+    assert result.source == "fence"
+    assert result.code == CODE
+
+
+def test_prose_mentioning_a_fence_does_not_open_one():
+    text = f"Wrap code in ``` like this:\n```python\n{CODE}\n```"
+    assert extract_code(text).code == CODE
+
+
+def test_inline_span_is_not_a_fence():
+    text = f"Use ```x``` here.\n```python\n{CODE}\n```"
+    assert extract_code(text).code == CODE
+
+
+def test_unterminated_fence_drops_cut_off_line():
+    text = f"```python\n{CODE}\n    self.pl"
+    result = extract_code(text, finish_reason="length")
+    assert result.source == "unterminated_fence"
+    assert result.code == CODE
+
+
+@pytest.mark.parametrize("name", sorted(SHAPES))
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_chunked_feed_matches_single_feed(name, size):
+    text = SHAPES[name]
+    scanner = CodeFenceScanner()
+    for i in range(0, len(text), size):
+        scanner.feed(text[i:i + size])
+    chunked = scanner.finish()
+    whole = extract_code(text)
+    assert (chunked.code, chunked.source, chunked.chosen) == (
+        whole.code, whole.source, whole.chosen)
+    assert [b.describe() for b in chunked.blocks] == [b.describe() for b in whole.blocks]